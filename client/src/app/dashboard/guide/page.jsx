@@ -31,33 +31,55 @@ import { API_ENDPOINTS } from '@/utils/constants';
     setInput('');
     setLoading(true);
     
+    const assistantId = (Date.now() + 1).toString();
+    const setAssistantContent = (content) => {
+      setMessages(prev => prev.some(m => m.id === assistantId)
+        ? prev.map(m => (m.id === assistantId ? { ...m, content } : m))
+        : [...prev, { id: assistantId, role: 'assistant', content }]);
+    };
+
     try {
+      // Server-Sent Events: show tokens as the model produces them
       const res = await fetch(API_ENDPOINTS.AI_GUIDE, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ message: userMessage.content })
+        headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+        body: JSON.stringify({ message: userMessage.content, stream: true })
       });
 
       if (!res.ok) {
         throw new Error(`HTTP error! status: ${res.status}`);
       }
 
-      const data = await res.json();
-      const assistantMessage = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        content: data.response || 'Sorry, no response.'
-      };
-      setMessages(prev => [...prev, assistantMessage]);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let content = '';
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const block of events) {
+          const event = block.match(/^event: (.*)$/m)?.[1] || 'message';
+          const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (event === 'error') throw new Error(data.error);
+          if (event === 'done') {
+            content = data.response || content;
+            finished = true;
+          } else if (data.token) {
+            content += data.token;
+            setLoading(false);
+          }
+          setAssistantContent(content);
+        }
+      }
+      if (!content) setAssistantContent('Sorry, no response.');
     } catch (err) {
       console.error('AI Guide Error:', err);
       // Show error message to user
-      const errorMessage = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        content: 'Sorry, I encountered an error. Please try again.'
-      };
-      setMessages(prev => [...prev, errorMessage]);
+      setAssistantContent('Sorry, I encountered an error. Please try again.');
     } finally {
       setLoading(false);
     }
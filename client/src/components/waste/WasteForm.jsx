@@ -86,24 +86,9 @@ export default function WasteForm({ onSuccess, onDataChange, selectedFacility, o
   const uploadImage = async (file) => {
     if (!file) return null;
     
-    const formData = new FormData();
-    formData.append('file', file);
-    
     try {
-      const response = await fetch('http://127.0.0.1:5000/api/upload', {
-        method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('access_token')}`
-        },
-        body: formData,
-      });
-      
-      if (!response.ok) {
-        throw new Error('Image upload failed');
-      }
-      
-      const data = await response.json();
-      return data.url; // URL of the uploaded image
+      // Shared API client: refreshes an expired access token and retries
+      return await wasteService.uploadImage(file);
     } catch (err) {
       console.error('Error uploading image:', err);
       throw new Error('Failed to upload image. Please try again.');
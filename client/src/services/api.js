@@ -11,65 +11,77 @@ const getAuthHeaders = (additionalHeaders = {}) => {
   };
 };
 
-// Create a fetch-based API wrapper (compatible with Next.js, no dependencies needed)
-const api = {
-  get: async (url, config = {}) => {
-    const response = await fetch(`${BASE_URL}${url}`, {
-      method: 'GET',
-      headers: getAuthHeaders(config.headers),
-      credentials: 'include',
-    });
-    const data = await response.json();
-    if (!response.ok) {
-      const errorMessage = data.message || `HTTP error! status: ${response.status}`;
-      throw new Error(errorMessage);
-    }
-    return { data };
-  },
+// Access tokens are short-lived: on a 401, exchange the refresh token once and retry.
+// Concurrent 401s share one exchange, since each refresh token only works once.
+let refreshInFlight = null;
 
-  post: async (url, data, config = {}) => {
-    const response = await fetch(`${BASE_URL}${url}`, {
-      method: 'POST',
-      headers: getAuthHeaders(config.headers),
-      credentials: 'include',
-      body: JSON.stringify(data),
-    });
-    const responseData = await response.json();
-    if (!response.ok) {
-      const errorMessage = responseData.message || `HTTP error! status: ${response.status}`;
-      throw new Error(errorMessage);
-    }
-    return { data: responseData };
-  },
+// A 401 from these means bad credentials, not an expired access token
+const NO_REFRESH_URLS = ['/auth/login', '/auth/register', '/auth/google', '/auth/refresh', '/auth/logout'];
 
-  put: async (url, data, config = {}) => {
-    const response = await fetch(`${BASE_URL}${url}`, {
-      method: 'PUT',
-      headers: getAuthHeaders(config.headers),
-      credentials: 'include',
-      body: JSON.stringify(data),
+const refreshAccessToken = () => {
+  if (!refreshInFlight) {
+    refreshInFlight = (async () => {
+      const refreshToken = localStorage.getItem('refresh_token');
+      if (!refreshToken) return false;
+      const response = await fetch(`${BASE_URL}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      });
+      if (!response.ok) {
+        localStorage.removeItem('access_token');
+        localStorage.removeItem('refresh_token');
+        return false;
+      }
+      const data = await response.json();
+      localStorage.setItem('access_token', data.access_token);
+      localStorage.setItem('refresh_token', data.refresh_token);
+      return true;
+    })().catch(() => false).finally(() => {
+      refreshInFlight = null;
     });
-    const responseData = await response.json();
-    if (!response.ok) {
-      const errorMessage = responseData.message || `HTTP error! status: ${response.status}`;
-      throw new Error(errorMessage);
-    }
-    return { data: responseData };
-  },
+  }
+  return refreshInFlight;
+};
 
-  delete: async (url, config = {}) => {
-    const response = await fetch(`${BASE_URL}${url}`, {
-      method: 'DELETE',
-      headers: getAuthHeaders(config.headers),
+const request = async (method, url, body, config = {}) => {
+  // FormData (file uploads) goes as-is, so the browser sets the multipart Content-Type
+  const isFormData = typeof FormData !== 'undefined' && body instanceof FormData;
+  const send = () => {
+    const headers = getAuthHeaders(config.headers);
+    if (isFormData) delete headers['Content-Type'];
+    return fetch(`${BASE_URL}${url}`, {
+      method,
+      headers,
       credentials: 'include',
+      ...(body !== undefined && { body: isFormData ? body : JSON.stringify(body) }),
     });
-    const responseData = await response.json();
-    if (!response.ok) {
-      const errorMessage = responseData.message || `HTTP error! status: ${response.status}`;
-      throw new Error(errorMessage);
-    }
-    return { data: responseData };
-  },
+  };
+
+  let response = await send();
+  const canRefresh = typeof window !== 'undefined' && !NO_REFRESH_URLS.includes(url) && !config.headers?.Authorization;
+  if (response.status === 401 && canRefresh && await refreshAccessToken()) {
+    response = await send();
+  }
+
+  const responseData = await response.json();
+  if (!response.ok) {
+    const errorMessage = responseData.message || `HTTP error! status: ${response.status}`;
+    throw new Error(errorMessage);
+  }
+  return { data: responseData };
+};
+
+// Create a fetch-based API wrapper (compatible with Next.js, no dependencies needed)
+const api = {
+  get: (url, config = {}) => request('GET', url, undefined, config),
+
+  post: (url, data, config = {}) => request('POST', url, data, config),
+
+  put: (url, data, config = {}) => request('PUT', url, data, config),
+
+  delete: (url, config = {}) => request('DELETE', url, undefined, config),
 };
 
 export default api;
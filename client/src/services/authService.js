@@ -49,20 +49,24 @@ class AuthService {
       throw new Error('No refresh token');
     }
     
-    const response = await api.post('/auth/refresh', {}, {
-      headers: { 'Authorization': `Bearer ${refresh_token}` }
-    });
+    const response = await api.post('/auth/refresh', { refresh_token });
     const data = response.data;
     
+    // Refresh tokens rotate: the one we sent no longer works
     if (data.access_token) {
-      localStorage.setItem('access_token', data.access_token);
+      this.setTokens(data.access_token, data.refresh_token);
     }
     return data;
   }
 
   logout() {
+    const refresh_token = localStorage.getItem('refresh_token');
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
+    if (refresh_token) {
+      // Revoke the session on the server; signing out locally doesn't wait for it
+      Promise.resolve(api.post('/auth/logout', { refresh_token })).catch(() => {});
+    }
   }
 
   setTokens(accessToken, refreshToken) {
@@ -12,6 +12,14 @@ class WasteService {
     return await api.post('/waste-logs/', data);
   }
 
+  // Upload a waste photo, returns the stored image URL
+  async uploadImage(file) {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await api.post('/upload', formData);
+    return response.data.url;
+  }
+
   // Get waste logs for current user
   async getWasteLogs(limit) {
     const endpoint = limit ? `/waste-logs/?limit=${limit}` : '/waste-logs/';
@@ -1,5 +1,9 @@
 import os
+import re
 from dotenv import load_dotenv
+from ai.knowledge_base import knowledge_base
+from ai.response_cache import normalize_prompt, response_cache
+from ai.single_flight import SingleFlight
 
 load_dotenv()
 
@@ -18,78 +22,153 @@ except ImportError:
     client_available = False
     print("❌ Warning: Groq library not installed")
 
+# Local development and TTFB checks without network access (see ai/fake_upstream.py)
+if os.getenv("AI_FAKE_UPSTREAM"):
+    from ai.fake_upstream import FakeGroqClient
+    client = FakeGroqClient()
+    client_available = True
+    print("⚠️ Using the fake AI upstream (AI_FAKE_UPSTREAM is set)")
+
+# Concurrent identical prompts share one upstream call; others wait at most this long for it
+in_flight = SingleFlight()
+COALESCE_WAIT_SECONDS = 60
+
+def _completion_request(message):
+    return dict(
+        model="llama-3.3-70b-versatile",
+        messages=[
+            {
+                "role": "system", 
+                "content": """You are ReGen, an AI waste and sustainability assistant. 
+                Provide specific, actionable advice. Avoid repeating the list of topics.
+                If asked for sustainable living tips, give practical examples and tips 
+                without restating the list of topics you can help with."""
+            },
+            {"role": "user", "content": message}
+        ],
+        max_tokens=300,
+        temperature=0.7
+    )
+
 def get_ai_response(message):
-    """Return a real AI response from Groq LLM or fallback response."""
+    """Return a local knowledge base answer, or a real AI response from Groq LLM (cached by normalized prompt), or fallback response."""
+    
+    # Common questions are answered in-process; only the rest go to the model
+    local_answer = knowledge_base.answer(message)
+    if local_answer is not None:
+        return local_answer
+    
+    # Repeat questions are answered from the cache without an upstream call
+    prompt_key = normalize_prompt(message)
+    cached = response_cache.get(prompt_key)
+    if cached is not None:
+        return cached
     
     # If Groq is not configured, return a helpful fallback response
     if not client_available:
         print(f"⚠️ Using fallback response - Groq not available")
         return get_fallback_response(message)
     
+    # An identical prompt already being answered: share that upstream call
+    flight, is_leader = in_flight.join(prompt_key)
+    if not is_leader:
+        try:
+            ai_response = flight.result(COALESCE_WAIT_SECONDS)
+        except TimeoutError as e:
+            print(f"❌ Groq API Error: {e}")
+            ai_response = None
+        return ai_response if ai_response is not None else get_fallback_response(message)
+    
     try:
         print(f"🤖 Calling Groq API for message: {message[:50]}...")
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """You are ReGen, an AI waste and sustainability assistant. 
-                    Provide specific, actionable advice. Avoid repeating the list of topics.
-                    If asked for sustainable living tips, give practical examples and tips 
-                    without restating the list of topics you can help with."""
-                },
-                {"role": "user", "content": message}
-            ],
-            max_tokens=300,
-            temperature=0.7
-        )
+        response = client.chat.completions.create(**_completion_request(message))
 
         ai_response = response.choices[0].message.content.strip()
         print(f"✅ Groq response received: {ai_response[:50]}...")
+        # Only model answers are cached; a fallback would hide the model once it is back
+        response_cache.set(prompt_key, ai_response)
+        flight.publish(ai_response)
+        flight.finish()
         return ai_response
 
     except Exception as e:
         print(f"❌ Groq API Error: {e}")
         return get_fallback_response(message)
+    finally:
+        in_flight.release(prompt_key, flight)
 
-def get_fallback_response(message):
-    """Provide helpful fallback responses when OpenAI is not available."""
-    message_lower = message.lower()
-    
-    if any(word in message_lower for word in ['plastic', 'recycle plastic']):
-        return """To recycle plastic properly:
-
-1. Check the recycling number (1-7) on the bottom
-2. Rinse containers to remove food residue
-3. Remove caps and labels when possible
-4. Flatten bottles to save space
-5. Place in your recycling bin
+def _chunk_text(text):
+    # Local and cached answers go out word by word, like a model stream
+    return re.findall(r'\S+\s*|\s+', text)
 
-Most recycling centers accept plastics #1 (PET) and #2 (HDPE). Check with your local center for other types."""
-
-    elif any(word in message_lower for word in ['biogas', 'organic', 'compost']):
-        return """Converting organic waste to biogas:
-
-1. Collect organic waste (food scraps, agricultural waste)
-2. Use a biogas digester or composting system
-3. Maintain proper moisture and temperature
-4. The process produces methane gas and nutrient-rich fertilizer
-
-Benefits: Renewable energy, reduces landfill waste, creates organic fertilizer."""
-
-    elif any(word in message_lower for word in ['paper', 'cardboard']):
-        return """Recycling paper and cardboard:
-
-1. Keep paper dry and clean
-2. Remove plastic windows from envelopes
-3. Flatten cardboard boxes
-4. Don't recycle: greasy pizza boxes, tissues, paper towels
-5. Shred sensitive documents before recycling
-
-Paper can be recycled 5-7 times before fibers break down."""
+def _follow_stream(flight, message):
+    # Relay another request's upstream call, falling back if it produced nothing
+    sent = False
+    try:
+        for part in flight.stream(COALESCE_WAIT_SECONDS):
+            sent = sent or bool(part)
+            yield part
+    except TimeoutError as e:
+        print(f"❌ Groq API Error: {e}")
+    if not sent:
+        yield from _chunk_text(get_fallback_response(message))
+
+def stream_ai_response(message):
+    """
+    Yield the answer to a message in pieces, as soon as the model produces them
+
+    Knowledge base, cached and fallback answers are yielded the same way.
+    A complete model answer is cached; one cut short by an upstream error
+    is not.
+    """
+    local_answer = knowledge_base.answer(message)
+    if local_answer is not None:
+        yield from _chunk_text(local_answer)
+        return
+    
+    prompt_key = normalize_prompt(message)
+    cached = response_cache.get(prompt_key)
+    if cached is not None:
+        yield from _chunk_text(cached)
+        return
+    
+    if not client_available:
+        print(f"⚠️ Using fallback response - Groq not available")
+        yield from _chunk_text(get_fallback_response(message))
+        return
+    
+    flight, is_leader = in_flight.join(prompt_key)
+    if not is_leader:
+        yield from _follow_stream(flight, message)
+        return
+    
+    parts = []
+    try:
+        print(f"🤖 Streaming Groq API response for message: {message[:50]}...")
+        for chunk in client.chat.completions.create(**_completion_request(message), stream=True):
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if not parts and token:
+                token = token.lstrip()
+            if token:
+                parts.append(token)
+                flight.publish(token)
+                yield token
+        
+        ai_response = ''.join(parts).strip()
+        if ai_response:
+            print(f"✅ Groq stream finished: {ai_response[:50]}...")
+            response_cache.set(prompt_key, ai_response)
+            flight.finish()
+    except Exception as e:
+        print(f"❌ Groq API Error: {e}")
+    finally:
+        # Also runs when the client disconnects mid-stream
+        in_flight.release(prompt_key, flight)
+    
+    if flight.failed and not parts:
+        yield from _chunk_text(get_fallback_response(message))
 
-    else:
-        return """I can help you with:
+GENERIC_ANSWER = """I can help you with:
 
 • Recycling guidance (plastic, paper, metal, glass)
 • Biogas and composting information
@@ -98,3 +177,16 @@ Paper can be recycled 5-7 times before fibers break down."""
 • Sustainable living tips
 
 What specific topic would you like to know more about?"""
+
+def get_fallback_response(message):
+    """
+    Answer without the model: the best knowledge base match, or a menu of topics.
+
+    With nothing to escalate to, a match down to half the confidence
+    required before the model is still used; below that the closest guide
+    section is more likely unrelated than useful, so the menu is returned.
+    """
+    match = knowledge_base.search(message)
+    if match is None or match.confidence < knowledge_base.min_confidence / 2:
+        return GENERIC_ANSWER
+    return match.document.answer
@@ -0,0 +1,50 @@
+"""
+Offline stand-in for the Groq client
+
+Mimics client.chat.completions.create, with and without stream=True, and
+sleeps like a real model: a delay before the first token, then a delay per
+token. Tests use it to measure time to first byte; set AI_FAKE_UPSTREAM=1
+to run the API against it locally without a GROQ_API_KEY.
+"""
+import re
+import time
+from types import SimpleNamespace
+
+DEFAULT_ANSWER = (
+    "Rinse the container, check the resin number on the bottom and drop it "
+    "at a center that accepts that plastic type. Caps and labels go separately."
+)
+
+class FakeCompletions:
+    def __init__(self, answer, first_token_delay, token_delay):
+        self.answer = answer
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = 0
+
+    def _tokens(self):
+        # Words with their trailing whitespace, roughly how the model streams
+        return re.findall(r'\S+\s*|\s+', self.answer)
+
+    def _stream(self):
+        time.sleep(self.first_token_delay)
+        for position, token in enumerate(self._tokens()):
+            if position:
+                time.sleep(self.token_delay)
+            delta = SimpleNamespace(content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        time.sleep(self.first_token_delay + self.token_delay * max(len(self._tokens()) - 1, 0))
+        message = SimpleNamespace(content=self.answer)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class FakeGroqClient:
+    """Groq-compatible client that answers every prompt with the same text"""
+
+    def __init__(self, answer=DEFAULT_ANSWER, first_token_delay=0.2, token_delay=0.03):
+        self.completions = FakeCompletions(answer, first_token_delay, token_delay)
+        self.chat = SimpleNamespace(completions=self.completions)
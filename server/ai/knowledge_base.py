@@ -0,0 +1,154 @@
+import math
+import os
+import re
+from collections import Counter, defaultdict, namedtuple
+from ai.response_cache import normalize_prompt
+
+KNOWLEDGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge', 'recycling_guide.md')
+
+STOPWORDS = frozenset('''
+    a about an and any are as at be been best but by can could do does doing for from get got have
+    how i if in into is it its me my of on or our please should so some tell than that the their
+    them then there these they this to up us want was we what when where which who why will with
+    would you your
+'''.split())
+
+Document = namedtuple('Document', 'title answer keywords', defaults=('',))
+Match = namedtuple('Match', 'document score confidence')
+
+def _stem(word):
+    # Just enough suffix stripping that recycle/recycled/recycling and bottle/bottles meet
+    if len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'y'
+    elif len(word) > 4 and word.endswith(('ches', 'shes', 'xes', 'sses')):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if len(word) - len(suffix) >= 4 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    """Search terms of a text: normalized, without stopwords, stemmed"""
+    return [_stem(word) for word in normalize_prompt(text).split() if len(word) > 1 and word not in STOPWORDS]
+
+def load_documents(path=KNOWLEDGE_PATH):
+    """
+    Read the guide: every '## ' section is a document
+
+    Returns:
+        list: (Document, searchable text) pairs; the heading and the optional
+            'Keywords:' line count three times in the searchable text
+    """
+    with open(path, encoding='utf-8') as handle:
+        sections = re.split(r'^## ', handle.read(), flags=re.MULTILINE)[1:]
+    documents = []
+    for section in sections:
+        title, _, body = section.partition('\n')
+        keywords = ''
+        match = re.match(r'Keywords:(.*)\n', body)
+        if match:
+            keywords = match.group(1)
+            body = body[match.end():]
+        documents.append((Document(title.strip(), body.strip(), keywords.strip()), f'{title} {keywords} ' * 3 + body))
+    return documents
+
+class KnowledgeBase:
+    """
+    BM25 search over the recycling guide, built once at startup
+
+    The inverted index maps each term to the documents holding it with
+    their BM25 weight already computed, so a query is a handful of dict
+    lookups. Confidence is the share of the query's IDF weight that the
+    best document covers; terms the guide has never seen count as the
+    rarest, so off-topic questions score low and go to the LLM.
+
+    Stopwords carry no weight, so a question like "what time is it" comes
+    down to one term. A match on fewer than MIN_MATCHED_TERMS terms gets
+    no confidence, unless the whole question is a single word naming the
+    section's topic (its heading or keywords), e.g. "batteries".
+    """
+
+    K1 = 1.5
+    B = 0.75
+    MIN_MATCHED_TERMS = 2
+
+    def __init__(self, documents, min_confidence=0.5):
+        """
+        Args:
+            documents: (Document, searchable text) pairs, see load_documents
+            min_confidence: Answers below this confidence are not used on their own
+        """
+        self.documents = [document for document, _ in documents]
+        self.min_confidence = min_confidence
+        counts = [Counter(tokenize(text)) for _, text in documents]
+        lengths = [sum(count.values()) for count in counts]
+        self.terms = [frozenset(count) for count in counts]
+        self.topics = [frozenset(tokenize(f'{document.title} {document.keywords}')) for document in self.documents]
+        average_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+        frequency = Counter(term for count in counts for term in count)
+        total = len(counts)
+        self.idf = {term: math.log(1 + (total - n + 0.5) / (n + 0.5)) for term, n in frequency.items()}
+        self.max_idf = math.log(1 + (total + 0.5) / 0.5)
+
+        # {term: [(document position, BM25 weight)]}
+        self.postings = defaultdict(list)
+        for position, (count, length) in enumerate(zip(counts, lengths)):
+            norm = self.K1 * (1 - self.B + self.B * length / average_length)
+            for term, tf in count.items():
+                weight = self.idf[term] * tf * (self.K1 + 1) / (tf + norm)
+                self.postings[term].append((position, weight))
+        self.postings = dict(self.postings)
+
+    @classmethod
+    def from_file(cls, path=KNOWLEDGE_PATH, min_confidence=0.5):
+        return cls(load_documents(path), min_confidence)
+
+    def search(self, query):
+        """
+        Best matching document for a question
+
+        Returns:
+            Match or None: The document with its BM25 score and confidence
+                (0-1), or None if no term of the query is in the guide
+        """
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        for term in terms:
+            for position, weight in self.postings.get(term, ()):
+                scores[position] += weight
+        if not scores:
+            return None
+
+        best = max(scores, key=scores.get)
+        matched_terms = terms & self.terms[best]
+        if len(matched_terms) < self.MIN_MATCHED_TERMS and not self._names_topic(query, terms, best):
+            # One shared word (e.g. "time" or "water") says little about what was asked
+            return Match(self.documents[best], scores[best], 0.0)
+        matched = sum(self.idf[term] for term in matched_terms)
+        possible = sum(self.idf.get(term, self.max_idf) for term in terms)
+        return Match(self.documents[best], scores[best], matched / possible)
+
+    def _names_topic(self, query, terms, position):
+        """Whether the query is a single word that is one of the document's topic terms"""
+        words = [word for word in normalize_prompt(query).split() if len(word) > 1]
+        return len(words) == 1 and terms <= self.topics[position]
+
+    def answer(self, query):
+        """The best document's answer if the match is confident enough, else None"""
+        match = self.search(query)
+        if match is None or match.confidence < self.min_confidence:
+            return None
+        return match.document.answer
+
+# Built at import, i.e. once per worker at startup
+knowledge_base = KnowledgeBase.from_file()
+
+def init_knowledge_base(app):
+    """Apply AI_KB_MIN_CONFIDENCE from the app config"""
+    knowledge_base.min_confidence = app.config.get('AI_KB_MIN_CONFIDENCE', 0.5)
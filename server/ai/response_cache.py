@@ -0,0 +1,154 @@
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+def normalize_prompt(message):
+    """
+    Cache key for a prompt: case, whitespace and punctuation don't matter
+
+    "How do I recycle plastic?" and "how do i   recycle plastic" share a key.
+    """
+    text = unicodedata.normalize('NFKC', message or '').casefold()
+    return _NON_WORD.sub(' ', text).strip()
+
+class ResponseCache:
+    """
+    AI answers by normalized prompt: an in-memory LRU in front of a SQLite table
+
+    The SQLite file is shared by every worker on the host and survives
+    restarts; the LRU answers repeat questions without touching it. Entries
+    expire after the TTL in both layers. A failing SQLite file only disables
+    the persistent layer.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {key: (response, expires_at)}
+        self._connection = None
+        self.configure(path, ttl, max_entries)
+        self.reset_stats()
+
+    def configure(self, path=None, ttl=7 * 24 * 3600, max_entries=1024):
+        """
+        Args:
+            path: SQLite file for the persistent layer (None: memory only)
+            ttl: Seconds an answer is reused
+            max_entries: Size of the in-memory LRU
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            self._entries.clear()
+            self.path = path
+            self.ttl = ttl
+            self.max_entries = max_entries
+
+    def reset_stats(self):
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+
+    def stats(self):
+        """Hit/miss counters of this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _db(self):
+        # Opened on first use, so importing the app never creates the file
+        if self._connection is None and self.path:
+            try:
+                connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS ai_responses ('
+                    'prompt_key TEXT PRIMARY KEY, response TEXT NOT NULL, '
+                    'created_at REAL NOT NULL, expires_at REAL NOT NULL)'
+                )
+                connection.execute('DELETE FROM ai_responses WHERE expires_at <= ?', (time.time(),))
+                self._connection = connection
+            except sqlite3.Error as e:
+                print(f"AI cache disabled, cannot open {self.path}: {e}")
+                self.path = None
+        return self._connection
+
+    def _remember(self, key, response, expires_at):
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Cached answer for a normalized prompt, or None"""
+        if not key or self.ttl <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return entry[0]
+                del self._entries[key]
+
+            connection = self._db()
+            row = None
+            if connection is not None:
+                try:
+                    row = connection.execute(
+                        'SELECT response, expires_at FROM ai_responses WHERE prompt_key = ? AND expires_at > ?',
+                        (key, now)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"AI cache read error: {e}")
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self._stats['disk_hits'] += 1
+            return row[0]
+
+    def set(self, key, response):
+        """Store the answer to a normalized prompt"""
+        if not key or self.ttl <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now + self.ttl)
+            self._stats['stores'] += 1
+            connection = self._db()
+            if connection is not None:
+                try:
+                    connection.execute(
+                        'INSERT OR REPLACE INTO ai_responses (prompt_key, response, created_at, expires_at) VALUES (?, ?, ?, ?)',
+                        (key, response, now, now + self.ttl)
+                    )
+                except sqlite3.Error as e:
+                    print(f"AI cache write error: {e}")
+
+    def clear(self):
+        """Drop every cached answer, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            connection = self._db()
+            if connection is not None:
+                connection.execute('DELETE FROM ai_responses')
+
+# Configured from the app config by init_response_cache
+response_cache = ResponseCache()
+
+def init_response_cache(app):
+    """Point the AI response cache at AI_CACHE_PATH with the app's TTL and size"""
+    response_cache.configure(
+        path=app.config.get('AI_CACHE_PATH') or None,
+        ttl=app.config.get('AI_CACHE_TTL', 7 * 24 * 3600),
+        max_entries=app.config.get('AI_CACHE_SIZE', 1024)
+    )
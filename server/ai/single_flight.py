@@ -0,0 +1,87 @@
+import threading
+
+class Flight:
+    """
+    One upstream call that several requests wait on
+
+    The leader publishes the answer piece by piece (one piece for a plain
+    completion, one per token for a stream) and then finishes it; followers
+    read the pieces as they arrive or wait for the whole answer.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.parts = []
+        self.done = False
+        self.failed = False
+
+    def publish(self, part):
+        with self._condition:
+            self.parts.append(part)
+            self._condition.notify_all()
+
+    def finish(self, failed=False):
+        with self._condition:
+            if not self.done:
+                self.done = True
+                self.failed = failed
+                self._condition.notify_all()
+
+    def stream(self, timeout):
+        """Yield the published pieces, waiting up to timeout seconds for each"""
+        position = 0
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(lambda: len(self.parts) > position or self.done, timeout):
+                    raise TimeoutError('AI upstream call did not finish in time')
+                parts = self.parts[position:]
+                done = self.done
+            position += len(parts)
+            yield from parts
+            if done and position == len(self.parts):
+                return
+
+    def result(self, timeout):
+        """The whole answer, or None if the leader failed"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.done, timeout):
+                raise TimeoutError('AI upstream call did not finish in time')
+            return None if self.failed else ''.join(self.parts)
+
+class SingleFlight:
+    """
+    At most one upstream call per key at a time
+
+    The first caller for a key becomes the leader and makes the call;
+    callers arriving while it runs join its Flight instead of starting
+    their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.coalesced = 0
+
+    def join(self, key):
+        """
+        Returns:
+            tuple: (flight, is_leader); the leader must call release when done
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def release(self, key, flight):
+        """Retire a leader's flight; followers see it as failed unless it finished"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(failed=True)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._flights)
@@ -6,6 +6,11 @@ from flask_bcrypt import Bcrypt
 from flasgger import Swagger
 from config import config
 from database import init_db
+from commands import register_commands
+from ai.knowledge_base import init_knowledge_base
+from ai.response_cache import init_response_cache
+from utils.compression import init_compression
+from utils.json_provider import FastJSONProvider
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -19,10 +24,12 @@ from routes.waste_routes import waste_bp
 from routes.center_routes import center_bp
 from routes.ai_routes import ai_bp
 from routes.file_routes import file_bp
+from routes.co2_routes import co2_bp
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(config['default'])
+    app.json = FastJSONProvider(app)
     
     # Initialize extensions
     init_db(app)
@@ -89,7 +96,7 @@ def create_app():
     })
     
     # Import models after db initialization
-    from models import User, WasteLog, Reward, Community, Message, RecyclingCenter
+    from models import User, WasteLog, Reward, Community, Message, RecyclingCenter, CenterAcceptedType, RefreshToken, EmissionFactor, UserStats, WasteDailyRollup
     
     # Register blueprints
     app.register_blueprint(auth_bp)
@@ -99,6 +106,12 @@ def create_app():
     app.register_blueprint(center_bp)
     app.register_blueprint(ai_bp)
     app.register_blueprint(file_bp)
+    app.register_blueprint(co2_bp)
+    
+    register_commands(app)
+    init_compression(app)
+    init_response_cache(app)
+    init_knowledge_base(app)
     
     @app.route('/')
     def index():
@@ -110,10 +123,12 @@ def create_app():
                 'health': '/api/health',
                 'auth': '/api/auth/*',
                 'dashboard': '/api/dashboard',
+                'platform_stats': '/api/dashboard/platform',
                 'community': '/api/community/*',
                 'waste_logs': '/api/waste-logs/*',
                 'recycling_centers': '/api/recycling-centers/*',
-                'ai_guide': '/api/ai-guide'
+                'ai_guide': '/api/ai-guide',
+                'co2_factors': '/api/co2-factors/*'
             }
         })
     
@@ -8,3 +8,6 @@ pip install -r requirements.txt
 
 # Initialize database tables
 python init_db.py
+
+# Apply schema changes to existing tables (every revision skips what create_all already built)
+flask db upgrade
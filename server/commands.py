@@ -0,0 +1,36 @@
+# server/commands.py
+"""Maintenance commands available through the `flask` CLI"""
+import click
+from database import db
+
+def register_commands(app):
+    """Attach the maintenance commands to the Flask app"""
+
+    @app.cli.command('recompute-co2')
+    def recompute_co2():
+        """Recompute co2_saved for every waste log with the active factors."""
+        from services.co2_service import get_active_factor_set, recompute_co2_saved
+
+        factor_set = get_active_factor_set()
+        updated = recompute_co2_saved(factor_set)
+        db.session.commit()
+        click.echo(f"Recomputed {updated} waste logs with CO2 factor version {factor_set.version}")
+
+    @app.cli.command('rebuild-user-stats')
+    def rebuild_user_stats_command():
+        """Rebuild the user_stats and daily rollups from waste logs and rewards."""
+        from services.stats_service import rebuild_user_stats, rebuild_daily_rollups
+
+        rebuilt = rebuild_user_stats()
+        buckets = rebuild_daily_rollups()
+        db.session.commit()
+        click.echo(f"Rebuilt stats for {rebuilt} users and {buckets} daily rollup rows")
+
+    @app.cli.command('prune-refresh-tokens')
+    def prune_refresh_tokens_command():
+        """Delete expired refresh tokens."""
+        from services.token_service import prune_refresh_tokens
+
+        removed = prune_refresh_tokens()
+        db.session.commit()
+        click.echo(f"Deleted {removed} expired refresh tokens")
@@ -6,6 +6,44 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+    # Maximum number of entries accepted by POST /api/waste-logs/batch
+    WASTE_LOG_BATCH_LIMIT = int(os.environ.get('WASTE_LOG_BATCH_LIMIT', 1000))
+    # Seconds a cursor-pagination total_items count is reused (0 disables caching)
+    PAGINATION_COUNT_CACHE_TTL = int(os.environ.get('PAGINATION_COUNT_CACHE_TTL', 30))
+    # Seconds the in-memory leaderboard snapshot stays fresh (0 disables the cache)
+    LEADERBOARD_CACHE_TTL = int(os.environ.get('LEADERBOARD_CACHE_TTL', 60))
+    # Responses at least this large (bytes) are gzip/brotli compressed when the client accepts it
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    # Cache-Control max-age (seconds) for public GET responses (centers, leaderboard, platform stats)
+    PUBLIC_CACHE_MAX_AGE = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', 60))
+    # Max age (seconds) of the in-process center catalog; writes in this process rebuild it sooner
+    CENTER_CATALOG_TTL = int(os.environ.get('CENTER_CATALOG_TTL', 300))
+    # Default vehicle capacity (kg) used by the pickup route planner
+    ROUTE_VEHICLE_CAPACITY = float(os.environ.get('ROUTE_VEHICLE_CAPACITY', 1000))
+    # Lifetime (seconds) of access tokens; clients renew them with a refresh token
+    ACCESS_TOKEN_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', 900))
+    # Lifetime (seconds) of refresh tokens; each one can be exchanged once
+    REFRESH_TOKEN_TTL = int(os.environ.get('REFRESH_TOKEN_TTL', 30 * 24 * 3600))
+    # Verified access tokens remembered until they expire (0 disables the cache)
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+    # bcrypt cost factor for new hashes; logins rehash passwords stored with a different cost
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Threads that run bcrypt, and how many more hashes may wait before logins get a 503
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    # AI guide answers are reused for AI_CACHE_TTL seconds (0 disables the cache); AI_CACHE_SIZE are kept in memory
+    AI_CACHE_PATH = os.environ.get('AI_CACHE_PATH', os.path.join(BASE_DIR, 'ai_cache.db'))
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL', 7 * 24 * 3600))
+    AI_CACHE_SIZE = int(os.environ.get('AI_CACHE_SIZE', 1024))
+    # Minimum confidence (0-1) for the AI guide to answer from its local knowledge base instead of the model
+    AI_KB_MIN_CONFIDENCE = float(os.environ.get('AI_KB_MIN_CONFIDENCE', 0.5))
+    # Comma-separated emails of administrators, who may publish CO2 factors and export every user's logs
+    ADMIN_EMAILS = frozenset(
+        email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip()
+    )
+    # Platform stats are fresh for the TTL, then served stale up to MAX_STALE more seconds while refreshing
+    PLATFORM_STATS_CACHE_TTL = int(os.environ.get('PLATFORM_STATS_CACHE_TTL', 60))
+    PLATFORM_STATS_MAX_STALE = int(os.environ.get('PLATFORM_STATS_MAX_STALE', 600))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -1,20 +1,92 @@
 import jwt
 import datetime
-from flask import current_app
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, request
+from database import db
+from models import User
+
+# Recently verified tokens: {digest: (user_id, exp)}, least recently used first
+_verified_tokens = OrderedDict()
+_verified_tokens_lock = threading.Lock()
 
 def generate_token(user_id):
+    """Short-lived access token (ACCESS_TOKEN_TTL seconds), renewed through /api/auth/refresh"""
+    now = datetime.datetime.utcnow()
     payload = {
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1),
-        'iat': datetime.datetime.utcnow(),
+        'exp': now + datetime.timedelta(seconds=current_app.config.get('ACCESS_TOKEN_TTL', 900)),
+        'iat': now,
         'sub': user_id
     }
     return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
 
+def _token_digest(token):
+    # The secret is part of the key, so rotating it invalidates every cached entry
+    secret = current_app.config['SECRET_KEY']
+    return hashlib.sha256(f'{secret}\0{token}'.encode('utf-8')).digest()
+
 def decode_token(token):
+    """
+    Verify a token and return its user id (None if invalid or expired)
+
+    Verified tokens are remembered until they expire in a bounded LRU
+    (TOKEN_CACHE_SIZE entries), so repeat calls with the same token skip
+    the signature check.
+    """
+    if not token:
+        return None
+    digest = _token_digest(token)
+    now = time.time()
+
+    with _verified_tokens_lock:
+        cached = _verified_tokens.get(digest)
+        if cached is not None:
+            if cached[1] > now:
+                _verified_tokens.move_to_end(digest)
+                return cached[0]
+            del _verified_tokens[digest]
+            return None
+
     try:
         payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        return payload['sub']
+        user_id = payload['sub']
     except jwt.ExpiredSignatureError:
         return None
-    except jwt.InvalidTokenError:
-        return None
\ No newline at end of file
+    except (jwt.InvalidTokenError, KeyError):
+        return None
+
+    max_entries = current_app.config.get('TOKEN_CACHE_SIZE', 4096)
+    if max_entries > 0 and 'exp' in payload:
+        with _verified_tokens_lock:
+            _verified_tokens[digest] = (user_id, payload['exp'])
+            _verified_tokens.move_to_end(digest)
+            while len(_verified_tokens) > max_entries:
+                _verified_tokens.popitem(last=False)
+    return user_id
+
+def get_bearer_token():
+    """Token from the request's Authorization header ('' if there is none)"""
+    return request.headers.get('Authorization', '').replace('Bearer ', '')
+
+def get_current_user_id():
+    """
+    User id of the current request's bearer token (None if missing or invalid)
+
+    Decoded once per request and kept on flask.g, together with the token
+    it came from (g may outlive the request, e.g. in tests).
+    """
+    token = get_bearer_token()
+    cached = g.get('auth')
+    if cached is None or cached[0] != token:
+        cached = g.auth = (token, decode_token(token))
+    return cached[1]
+
+def is_admin(user_id):
+    """Whether a user is an administrator, i.e. their email is listed in ADMIN_EMAILS"""
+    admins = current_app.config.get('ADMIN_EMAILS')
+    if not user_id or not admins:
+        return False
+    email = db.session.query(User.email).filter_by(id=user_id).scalar()
+    return bool(email) and email.lower() in admins
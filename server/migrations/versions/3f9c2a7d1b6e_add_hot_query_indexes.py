@@ -0,0 +1,44 @@
+"""add indexes for hot list and filter queries
+
+Revision ID: 3f9c2a7d1b6e
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b6e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# Tables are created by init_db.py (db.create_all), which already builds these
+# indexes on a fresh database, so only create the ones that are missing.
+INDEXES = [
+    ('ix_waste_logs_user_id_date', 'waste_logs', ['user_id', 'date']),
+    ('ix_waste_logs_date_id', 'waste_logs', ['date', 'id']),
+    ('ix_waste_logs_collection_status_date', 'waste_logs', ['collection_status', 'date']),
+    ('ix_recycling_centers_active_type_name', 'recycling_centers', ['is_active', 'facility_type', 'name']),
+    ('ix_recycling_centers_name_id', 'recycling_centers', ['name', 'id']),
+]
+
+
+def _existing_indexes(table_name):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade():
+    for name, table_name, columns in INDEXES:
+        if name not in _existing_indexes(table_name):
+            op.create_index(name, table_name, columns)
+
+
+def downgrade():
+    for name, table_name, _ in reversed(INDEXES):
+        if name in _existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
@@ -0,0 +1,63 @@
+"""normalize recycling center accepted types into center_accepted_types
+
+Revision ID: 8b2e4c6a9d1f
+Revises: 3f9c2a7d1b6e
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4c6a9d1f'
+down_revision = '3f9c2a7d1b6e'
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = 'ix_center_accepted_types_waste_type_center_id'
+
+
+def _accepted_type_keys(accepted_types):
+    # Same normalization as services.center_service.accepted_type_keys
+    keys = (str(value or '').strip().lower()[:50] for value in (accepted_types or '').split(','))
+    return sorted({key for key in keys if key})
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # init_db.py (db.create_all) may already have created the table
+    if not inspector.has_table('center_accepted_types'):
+        op.create_table(
+            'center_accepted_types',
+            sa.Column('center_id', sa.String(length=36), nullable=False),
+            sa.Column('waste_type', sa.String(length=50), nullable=False),
+            sa.ForeignKeyConstraint(['center_id'], ['recycling_centers.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('center_id', 'waste_type')
+        )
+    if INDEX_NAME not in {index['name'] for index in sa.inspect(bind).get_indexes('center_accepted_types')}:
+        op.create_index(INDEX_NAME, 'center_accepted_types', ['waste_type', 'center_id'])
+
+    # Backfill centers that have no normalized rows yet
+    centers = bind.execute(sa.text(
+        'SELECT id, accepted_types FROM recycling_centers '
+        'WHERE id NOT IN (SELECT center_id FROM center_accepted_types)'
+    )).all()
+    rows = [
+        {'center_id': center_id, 'waste_type': waste_type}
+        for center_id, accepted_types in centers
+        for waste_type in _accepted_type_keys(accepted_types)
+    ]
+    if rows:
+        bind.execute(
+            sa.text('INSERT INTO center_accepted_types (center_id, waste_type) VALUES (:center_id, :waste_type)'),
+            rows
+        )
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('center_accepted_types'):
+        op.drop_table('center_accepted_types')
@@ -0,0 +1,56 @@
+"""add waste_logs.region for regional CO2 factors
+
+Revision ID: a7b8c9d0e1f2
+Revises: f1a2b3c4d5e6
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b8c9d0e1f2'
+down_revision = 'f1a2b3c4d5e6'
+branch_labels = None
+depends_on = None
+
+
+def _region_of(collection_location):
+    # Same rule as services.co2_service.region_of: the last comma-separated part
+    return collection_location.rsplit(',', 1)[-1].strip().lower() or None
+
+
+def _has_column():
+    columns = sa.inspect(op.get_bind()).get_columns('waste_logs')
+    return any(column['name'] == 'region' for column in columns)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # init_db.py (db.create_all) already adds the column on a fresh database
+    if not _has_column():
+        op.add_column('waste_logs', sa.Column('region', sa.String(length=100), nullable=True))
+
+    # Backfill once per distinct location rather than per row
+    locations = bind.execute(sa.text(
+        'SELECT DISTINCT collection_location FROM waste_logs '
+        'WHERE region IS NULL AND collection_location IS NOT NULL'
+    )).scalars().all()
+    rows = [
+        {'location': location, 'region': _region_of(location)}
+        for location in locations
+        if _region_of(location)
+    ]
+    if rows:
+        bind.execute(
+            sa.text('UPDATE waste_logs SET region = :region WHERE collection_location = :location AND region IS NULL'),
+            rows
+        )
+
+
+def downgrade():
+    if _has_column():
+        with op.batch_alter_table('waste_logs') as batch_op:
+            batch_op.drop_column('region')
@@ -0,0 +1,53 @@
+"""replace the recycling center filter indexes with the route planner's index
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c9d0e1f2a3'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+# get_centers filters the in-memory center catalog, so nothing queries these anymore
+DROPPED_INDEXES = [
+    ('ix_recycling_centers_active_type_name', 'recycling_centers', ['is_active', 'facility_type', 'name']),
+    ('ix_recycling_centers_name_id', 'recycling_centers', ['name', 'id']),
+    ('ix_center_accepted_types_waste_type_center_id', 'center_accepted_types', ['waste_type', 'center_id']),
+]
+
+# Active centers in name order, for plan_collection_routes
+INDEXES = [
+    ('ix_recycling_centers_active_name_id', 'recycling_centers', ['is_active', 'name', 'id']),
+]
+
+
+def _existing_indexes(table_name):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade():
+    for name, table_name, _ in DROPPED_INDEXES:
+        if name in _existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
+    # init_db.py (db.create_all) may already have created it
+    for name, table_name, columns in INDEXES:
+        if name not in _existing_indexes(table_name):
+            op.create_index(name, table_name, columns)
+
+
+def downgrade():
+    for name, table_name, _ in INDEXES:
+        if name in _existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
+    for name, table_name, columns in DROPPED_INDEXES:
+        if name not in _existing_indexes(table_name):
+            op.create_index(name, table_name, columns)
@@ -0,0 +1,33 @@
+"""add users.data_version for waste log list ETags
+
+Revision ID: c4d7e1f2a3b5
+Revises: 8b2e4c6a9d1f
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7e1f2a3b5'
+down_revision = '8b2e4c6a9d1f'
+branch_labels = None
+depends_on = None
+
+
+def _has_column():
+    columns = sa.inspect(op.get_bind()).get_columns('users')
+    return any(column['name'] == 'data_version' for column in columns)
+
+
+def upgrade():
+    # init_db.py (db.create_all) already adds the column on a fresh database
+    if not _has_column():
+        op.add_column('users', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    if _has_column():
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.drop_column('data_version')
@@ -0,0 +1,52 @@
+"""add refresh_tokens for rotating refresh tokens
+
+Revision ID: d5e8f9a0b1c2
+Revises: c4d7e1f2a3b5
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8f9a0b1c2'
+down_revision = 'c4d7e1f2a3b5'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_refresh_tokens_user_id': ['user_id'],
+    'ix_refresh_tokens_family_id': ['family_id'],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # init_db.py (db.create_all) may already have created the table
+    if not sa.inspect(bind).has_table('refresh_tokens'):
+        op.create_table(
+            'refresh_tokens',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('user_id', sa.String(length=36), nullable=False),
+            sa.Column('family_id', sa.String(length=36), nullable=False),
+            sa.Column('token_hash', sa.String(length=64), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('used_at', sa.DateTime(), nullable=True),
+            sa.Column('revoked_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('token_hash')
+        )
+    existing = {index['name'] for index in sa.inspect(bind).get_indexes('refresh_tokens')}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'refresh_tokens', columns)
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('refresh_tokens'):
+        op.drop_table('refresh_tokens')
@@ -0,0 +1,94 @@
+"""add user_stats and waste_daily_rollups and backfill them
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e8f9a0b1c2
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f7a8b9c0d1'
+down_revision = 'd5e8f9a0b1c2'
+branch_labels = None
+depends_on = None
+
+
+# Same aggregates as services.stats_service._aggregate_select, for users without a row yet
+BACKFILL_USER_STATS = '''
+INSERT INTO user_stats (user_id, total_weight, total_co2, entry_count, reward_points, updated_at)
+SELECT users.id,
+       COALESCE(logs.total_weight, 0.0),
+       COALESCE(logs.total_co2, 0.0),
+       COALESCE(logs.entry_count, 0),
+       COALESCE(rewards.reward_points, 0),
+       CURRENT_TIMESTAMP
+FROM users
+LEFT OUTER JOIN (
+    SELECT user_id, SUM(weight) AS total_weight, SUM(co2_saved) AS total_co2, COUNT(id) AS entry_count
+    FROM waste_logs GROUP BY user_id
+) AS logs ON logs.user_id = users.id
+LEFT OUTER JOIN (
+    SELECT user_id, SUM(points) AS reward_points FROM rewards GROUP BY user_id
+) AS rewards ON rewards.user_id = users.id
+WHERE users.id NOT IN (SELECT user_id FROM user_stats)
+'''
+
+# Same buckets as services.stats_service._daily_select, for users without any rollup rows yet
+BACKFILL_DAILY_ROLLUPS = '''
+INSERT INTO waste_daily_rollups (user_id, day, waste_type, total_weight, total_co2, entry_count)
+SELECT user_id,
+       DATE(date),
+       LOWER(TRIM(COALESCE(waste_type, ''))),
+       SUM(weight),
+       COALESCE(SUM(co2_saved), 0.0),
+       COUNT(id)
+FROM waste_logs
+WHERE date IS NOT NULL
+  AND user_id NOT IN (SELECT user_id FROM waste_daily_rollups)
+GROUP BY user_id, DATE(date), LOWER(TRIM(COALESCE(waste_type, '')))
+'''
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # init_db.py (db.create_all) may already have created the tables
+    if not inspector.has_table('user_stats'):
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', sa.String(length=36), nullable=False),
+            sa.Column('total_weight', sa.Float(), nullable=False),
+            sa.Column('total_co2', sa.Float(), nullable=False),
+            sa.Column('entry_count', sa.Integer(), nullable=False),
+            sa.Column('reward_points', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+    if not inspector.has_table('waste_daily_rollups'):
+        op.create_table(
+            'waste_daily_rollups',
+            sa.Column('user_id', sa.String(length=36), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('waste_type', sa.String(length=50), nullable=False),
+            sa.Column('total_weight', sa.Float(), nullable=False),
+            sa.Column('total_co2', sa.Float(), nullable=False),
+            sa.Column('entry_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id', 'day', 'waste_type')
+        )
+
+    # Rows the application already maintains are kept; only missing users are filled in
+    bind.execute(sa.text(BACKFILL_USER_STATS))
+    bind.execute(sa.text(BACKFILL_DAILY_ROLLUPS))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in ('waste_daily_rollups', 'user_stats'):
+        if inspector.has_table(table):
+            op.drop_table(table)
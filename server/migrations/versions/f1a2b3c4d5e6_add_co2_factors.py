@@ -0,0 +1,43 @@
+"""add co2_factors for versioned CO2 factor sets
+
+Revision ID: f1a2b3c4d5e6
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a2b3c4d5e6'
+down_revision = 'e6f7a8b9c0d1'
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = 'ix_co2_factors_version'
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # init_db.py (db.create_all) may already have created the table
+    if not sa.inspect(bind).has_table('co2_factors'):
+        op.create_table(
+            'co2_factors',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('waste_type', sa.String(length=50), nullable=False),
+            sa.Column('region', sa.String(length=100), nullable=True),
+            sa.Column('factor', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if INDEX_NAME not in {index['name'] for index in sa.inspect(bind).get_indexes('co2_factors')}:
+        op.create_index(INDEX_NAME, 'co2_factors', ['version'])
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('co2_factors'):
+        op.drop_table('co2_factors')
@@ -1,9 +1,8 @@
 from database import db
-from flask_bcrypt import Bcrypt
 from datetime import datetime
+from utils import passwords
 import uuid
 
-bcrypt = Bcrypt()
 # ========================
 # USER MODEL
 # ========================
@@ -17,17 +16,23 @@ class User(db.Model):
     location = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped whenever any of the user's waste logs change; drives the ETag of their log list
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     waste_logs = db.relationship('WasteLog', backref='user', lazy=True)
     rewards = db.relationship('Reward', backref='user', lazy=True)
     
-    # Authentication methods
+    # Authentication methods (bcrypt runs on the pool in utils/passwords.py)
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = passwords.hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return passwords.check_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        # Hashed with another cost than BCRYPT_LOG_ROUNDS
+        return passwords.needs_rehash(self.password_hash)
     
     # Convert user to dictionary (basic profile)
     def to_dict(self):
@@ -43,21 +48,14 @@ class User(db.Model):
     def get_dashboard_stats(self):
         """
         Returns dashboard statistics: total waste recycled, CO2 saved, points, and number of entries.
+        Read from the user_stats rollup row, which is kept in sync on every write.
         """
-        total_waste_recycled = sum(log.weight for log in self.waste_logs)
-        total_co2_saved = sum(log.co2_saved or 0 for log in self.waste_logs)
-        # Calculate points from waste logs AND existing rewards
-        calculated_points = int(total_co2_saved * 10 + total_waste_recycled * 5)
-        reward_points = sum(reward.points for reward in self.rewards)
-        total_points = calculated_points + reward_points
-        total_entries = len(self.waste_logs)
-
-        return {
-            'total_waste_recycled': round(total_waste_recycled, 2),
-            'total_co2_saved': round(total_co2_saved, 2),
-            'points': total_points,
-            'total_entries': total_entries
-        }
+        stats = db.session.get(UserStats, self.id)
+        if stats is None:
+            # Not backfilled yet (see `flask rebuild-user-stats`): aggregate in SQL instead
+            from services.stats_service import aggregate_user_stats
+            stats = aggregate_user_stats(self.id)
+        return stats.to_dict()
 
     # Extended dictionary including stats
     def to_dashboard_dict(self):
@@ -81,6 +79,47 @@ class User(db.Model):
             'total_waste_recycled': stats['total_waste_recycled']
         }
 
+# ========================
+# USER STATS ROLLUP MODEL
+# ========================
+class UserStats(db.Model):
+    """Per-user running totals, maintained by services/stats_service.py"""
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    total_weight = db.Column(db.Float, nullable=False, default=0.0)  # in kg
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)  # in kg
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    reward_points = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def points(self):
+        # Points from waste logs AND existing rewards
+        return int(self.total_co2 * 10 + self.total_weight * 5) + self.reward_points
+    
+    def to_dict(self):
+        return {
+            'total_waste_recycled': round(self.total_weight, 2),
+            'total_co2_saved': round(self.total_co2, 2),
+            'points': self.points,
+            'total_entries': self.entry_count
+        }
+
+# ========================
+# DAILY WASTE ROLLUP MODEL
+# ========================
+class WasteDailyRollup(db.Model):
+    """Per-user, per-day, per-waste-type totals behind the trend charts"""
+    __tablename__ = 'waste_daily_rollups'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # UTC day of WasteLog.date
+    waste_type = db.Column(db.String(50), primary_key=True)  # lowercase
+    total_weight = db.Column(db.Float, nullable=False, default=0.0)  # in kg
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)  # in kg
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
 # ========================
 # WASTE LOG MODEL
 # ========================
@@ -96,8 +135,29 @@ class WasteLog(db.Model):
     co2_saved = db.Column(db.Float)  # in kg
     disposal_method = db.Column(db.String(100))
     collection_location = db.Column(db.String(100))
+    region = db.Column(db.String(100))  # normalized region of collection_location (services/co2_service.py region_of)
     collection_status = db.Column(db.String(20), default='pending')  # pending, scheduled, collected
     collection_date = db.Column(db.DateTime)
+    
+    # Indexes behind the hot list/filter queries (see tests/test_query_plans.py)
+    __table_args__ = (
+        db.Index('ix_waste_logs_user_id_date', 'user_id', 'date'),
+        db.Index('ix_waste_logs_date_id', 'date', 'id'),
+        db.Index('ix_waste_logs_collection_status_date', 'collection_status', 'date'),
+    )
+
+# ========================
+# CO2 EMISSION FACTOR MODEL
+# ========================
+class EmissionFactor(db.Model):
+    __tablename__ = 'co2_factors'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    version = db.Column(db.Integer, nullable=False, index=True)  # every published factor set gets a new version
+    waste_type = db.Column(db.String(50), nullable=False)  # lowercase, e.g. plastic, e-waste
+    region = db.Column(db.String(100))  # NULL for the default factor of a waste type
+    factor = db.Column(db.Float, nullable=False)  # kg CO2 saved per kg of waste
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # ========================
 # RECYCLING CENTER MODEL
@@ -115,6 +175,40 @@ class RecyclingCenter(db.Model):
     contact = db.Column(db.String(100))
     operating_hours = db.Column(db.String(100))
     is_active = db.Column(db.Boolean, default=True)
+    # Normalized copy of accepted_types, kept in sync on flush (see services/center_service.py)
+    accepted_type_rows = db.relationship('CenterAcceptedType', lazy=True, cascade='all, delete-orphan')
+    
+    # Route planner's active centers in name order (see tests/test_query_plans.py); list
+    # reads are served from the in-memory catalog, which loads every center
+    __table_args__ = (
+        db.Index('ix_recycling_centers_active_name_id', 'is_active', 'name', 'id'),
+    )
+
+# ========================
+# CENTER ACCEPTED TYPE MODEL
+# ========================
+class CenterAcceptedType(db.Model):
+    """One row per waste type a recycling center accepts, so centers can be filtered by type with an index"""
+    __tablename__ = 'center_accepted_types'
+    
+    center_id = db.Column(db.String(36), db.ForeignKey('recycling_centers.id', ondelete='CASCADE'), primary_key=True)
+    waste_type = db.Column(db.String(50), primary_key=True)  # lowercase, e.g. plastic, e-waste
+
+# ========================
+# REFRESH TOKEN MODEL
+# ========================
+class RefreshToken(db.Model):
+    """One refresh token; every rotation of a login shares its family_id (see services/token_service.py)"""
+    __tablename__ = 'refresh_tokens'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    family_id = db.Column(db.String(36), nullable=False, index=True)
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)  # sha256 hex, the token itself is never stored
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used_at = db.Column(db.DateTime)  # set when exchanged for a new token
+    revoked_at = db.Column(db.DateTime)  # set on logout or when reuse is detected
 
 # ========================
 # REWARD MODEL
@@ -1,11 +1,42 @@
-from flask import Blueprint, request, jsonify
-from ai.chatbot_assistant import get_ai_response
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from ai.chatbot_assistant import get_ai_response, in_flight, stream_ai_response
+from ai.response_cache import response_cache
+from jwt_handler import get_current_user_id
 # from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models import Message, User
 
 ai_bp = Blueprint("ai", __name__)
 
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def _event_stream(message):
+    """
+    Relay the answer as Server-Sent Events
+
+    One `data: {"token": ...}` event per piece of text as it arrives, then
+    `event: done` with the full response.
+    """
+    def events():
+        parts = []
+        try:
+            for token in stream_ai_response(message):
+                parts.append(token)
+                yield _sse({"token": token})
+        except Exception as e:
+            print(f"AI stream error: {e}")
+            yield _sse({"error": "The assistant stopped responding"}, event="error")
+            return
+        yield _sse({"response": "".join(parts).strip()}, event="done")
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let nginx hold tokens back
+    return response
+
 @ai_bp.route("/api/ai-guide", methods=["POST"])
 # @jwt_required()  # ensures only logged-in users can send messages
 def ai_guide():
@@ -14,6 +45,10 @@ def ai_guide():
     if not message:
         return jsonify({"error": "Message is required"}), 400
     
+    # Streaming mode: {"stream": true} or Accept: text/event-stream (JSON wins a tie)
+    if data.get("stream") or request.accept_mimetypes.best_match(["application/json", "text/event-stream"]) == "text/event-stream":
+        return _event_stream(message)
+    
     # user_id = get_jwt_identity()  # get logged-in user's ID
 
     # # Save user message
@@ -30,3 +65,22 @@ def ai_guide():
     # db.session.commit()
 
     return jsonify({"response": response})
+
+@ai_bp.route("/api/ai-guide/cache-stats", methods=["GET"])
+def ai_cache_stats():
+    """
+    AI guide response cache counters (this worker)
+    ---
+    tags:
+      - AI Guide
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Memory/disk hits, misses, stores, entries, hit rate and requests coalesced into another's upstream call
+      401:
+        description: Unauthorized
+    """
+    if not get_current_user_id():
+        return jsonify({"message": "Invalid token"}), 401
+    return jsonify(dict(response_cache.stats(), coalesced=in_flight.coalesced))
@@ -1,10 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app
 from flasgger import swag_from
 from models import User, db
-from jwt_handler import generate_token, decode_token
+from jwt_handler import get_bearer_token, get_current_user_id
+from services.token_service import issue_session, revoke_session, revoke_user_sessions, rotate_refresh_token
+from utils.passwords import PasswordHasherBusy
 import uuid
 # define a blueprint for authentication routes it groups routes under the '/api/auth' URL prefix
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+
+def _hasher_busy():
+    # Too many logins queued for bcrypt: shed load rather than tie up every worker
+    response = jsonify({'message': 'Too many sign-in attempts, try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 # routes for user registration accessible via POST request to /api/auth/register
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -45,10 +53,16 @@ def register():
               type: string
             access_token:
               type: string
+            refresh_token:
+              type: string
+            expires_in:
+              type: integer
             user:
               type: object
       400:
         description: Bad request - missing fields or user exists
+      503:
+        description: Too many password hashes queued, retry shortly
       500:
         description: Server error
     """
@@ -70,16 +84,18 @@ def register():
         user.set_password(data['password'])
         
         db.session.add(user)
+        tokens = issue_session(user.id) # access token (JWT) plus refresh token so the new user is signed in immediately
         db.session.commit()
         
-        token = generate_token(user.id) # generate a JSON Web Token (JWT) for the newly registered user for immediate authentication
-        
         return jsonify({
-            'message': 'User created successfully', #return a success response with a welcome message the access token and user details
-            'access_token': token,
+            'message': 'User created successfully', #return a success response with a welcome message the tokens and user details
+            **tokens,
             'user': user.to_dict()
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _hasher_busy()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Registration failed'}), 500
@@ -117,12 +133,18 @@ def login():
               type: string
             access_token:
               type: string
+            refresh_token:
+              type: string
+            expires_in:
+              type: integer
             user:
               type: object
       400:
         description: Missing email or password
       401:
         description: Invalid credentials
+      503:
+        description: Too many password hashes queued, retry shortly
       500:
         description: Server error
     """
@@ -137,17 +159,115 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
         
-        token = generate_token(user.id)
+        # Move the stored hash to the configured cost while we have the plain password
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data['password'])
+            except PasswordHasherBusy:
+                pass  # retried on a later login
+        
+        tokens = issue_session(user.id)
+        db.session.commit()
         
         return jsonify({
             'message': 'Login successful',
-            'access_token': token,
+            **tokens,
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _hasher_busy()
     except Exception as e:
+        db.session.rollback()
         return jsonify({'message': 'Login failed'}), 500
 
+def _refresh_token_from_request():
+    # JSON body first; the web client sends it as the bearer token
+    data = request.get_json(silent=True) or {}
+    return data.get('refresh_token') or get_bearer_token()
+
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh():
+    """
+    Exchange a refresh token for new tokens
+    ---
+    tags:
+      - Authentication
+    parameters:
+      - name: body
+        in: body
+        required: false
+        schema:
+          type: object
+          properties:
+            refresh_token:
+              type: string
+              description: Refresh token (or send it as the Bearer token)
+    responses:
+      200:
+        description: New access and refresh tokens; the old refresh token no longer works
+        schema:
+          type: object
+          properties:
+            access_token:
+              type: string
+            refresh_token:
+              type: string
+            expires_in:
+              type: integer
+      401:
+        description: Refresh token missing, expired, revoked or already used
+      500:
+        description: Server error
+    """
+    try:
+        token = _refresh_token_from_request()
+        if not token:
+            return jsonify({'message': 'Refresh token required'}), 401
+        
+        tokens = rotate_refresh_token(token)
+        if not tokens:
+            return jsonify({'message': 'Invalid refresh token'}), 401
+        
+        return jsonify(tokens), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Token refresh error: {e}")
+        return jsonify({'message': 'Token refresh failed'}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """
+    Log out: revoke the refresh tokens of this session
+    ---
+    tags:
+      - Authentication
+    parameters:
+      - name: body
+        in: body
+        required: false
+        schema:
+          type: object
+          properties:
+            refresh_token:
+              type: string
+    responses:
+      200:
+        description: Logged out (also when the token was already invalid)
+      500:
+        description: Server error
+    """
+    try:
+        revoke_session(_refresh_token_from_request())
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Logout error: {e}")
+        return jsonify({'message': 'Logout failed'}), 500
+
 @auth_bp.route('/reset-password', methods=['POST'])
 def reset_password():
     try:
@@ -163,12 +283,16 @@ def reset_password():
         
         # Update the password
         user.set_password(data['new_password'])
+        revoke_user_sessions(user.id)  # sessions started with the old password end at their next refresh
         db.session.commit()
         
         return jsonify({
             'message': 'Password reset successfully'
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _hasher_busy()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Password reset failed'}), 500
@@ -176,8 +300,7 @@ def reset_password():
 @auth_bp.route('/profile', methods=['PUT']) # route for updating the users profile info requires authentication and accessible via PUT request to api/auth/profile
 def update_profile():
     try:
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        user_id = decode_token(token)
+        user_id = get_current_user_id()
         
         if not user_id:
             return jsonify({'message': 'Invalid token'}), 401
@@ -215,12 +338,10 @@ def update_profile():
 @auth_bp.route('/me', methods=['GET']) # route for retrieving the current user's profile info requires authentication
 def get_current_user():
     try:
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        
-        if not token:
+        if not get_bearer_token():
             return jsonify({'message': 'Token required'}), 401
         
-        user_id = decode_token(token)
+        user_id = get_current_user_id()
         if not user_id:
             return jsonify({'message': 'Invalid token'}), 401
         
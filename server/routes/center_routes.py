@@ -1,6 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from models import RecyclingCenter, db
-from utils.pagination import paginate_query
+from utils.pagination import paginate_sequence, InvalidCursorError
+from services.center_service import find_nearby_centers, get_center_catalog
+from utils.http_cache import conditional, make_etag, not_modified
+from utils.json_provider import JSON_MIMETYPE, negotiated_mimetype
+from utils.serializers import center_serializer
+import json
 import uuid
 
 center_bp = Blueprint('center', __name__, url_prefix='/api/recycling-centers')
@@ -27,11 +32,24 @@ def get_centers():
         in: query
         type: string
         description: Filter by facility type
+      - name: waste_type
+        in: query
+        type: string
+        description: Only centers accepting this waste type (case-insensitive)
       - name: active_only
         in: query
         type: boolean
         default: true
         description: Show only active centers
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque cursor for keyset pagination (send an empty value for the first page, then next_cursor)
+      - name: include_total
+        in: query
+        type: boolean
+        default: false
+        description: In cursor mode, also return a (briefly cached) total_items count
     responses:
       200:
         description: Centers fetched successfully
@@ -46,6 +64,8 @@ def get_centers():
                 type: object
             pagination:
               type: object
+      400:
+        description: Invalid cursor
       500:
         description: Server error
     """
@@ -54,39 +74,120 @@ def get_centers():
         waste_type = request.args.get('waste_type')
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
-        query = RecyclingCenter.query
+        # Served from the in-memory catalog: filtering is set lookups and the
+        # response is assembled from pre-serialized center JSON
+        catalog = get_center_catalog()
+        etag = make_etag('centers', catalog.digest, request.query_string)
+        cached = not_modified(etag, public=True)
+        if cached:
+            return cached
         
-        if facility_type:
-            query = query.filter_by(facility_type=facility_type)
+        positions = catalog.select(facility_type=facility_type, waste_type=waste_type, active_only=active_only)
         
-        if active_only:
-            query = query.filter_by(is_active=True)
+        # Ordered by name with the id as tie-breaker for cursors
+        paginated_result = paginate_sequence(
+            positions,
+            [catalog.sort_keys[position] for position in positions],
+            default_per_page=10
+        )
         
-        # Apply pagination
-        query = query.order_by(RecyclingCenter.name)
-        paginated_result = paginate_query(query, default_per_page=10)
+        if negotiated_mimetype() != JSON_MIMETYPE:
+            # Other formats go through the JSON provider's content negotiation
+            return conditional(jsonify({
+                'message': 'Centers fetched successfully',
+                'data': [catalog.records[position] for position in paginated_result['items']],
+                'pagination': paginated_result['pagination']
+            }), etag, public=True)
         
-        return jsonify({
-            'message': 'Centers fetched successfully',
-            'data': [{
-                'id': center.id,
-                'name': center.name,
-                'location': center.location,
-                'latitude': center.latitude,
-                'longitude': center.longitude,
-                'facility_type': center.facility_type or 'recycling',
-                'contact': center.contact,
-                'operating_hours': center.operating_hours or 'Mon-Fri: 8AM-5PM',
-                'accepted_types': center.accepted_types.split(',') if center.accepted_types else [],
-                'is_active': center.is_active if hasattr(center, 'is_active') else True
-            } for center in paginated_result['items']],
-            'pagination': paginated_result['pagination']
-        }), 200
+        body = b''.join([
+            b'{"data":[',
+            b','.join(catalog.payloads[position] for position in paginated_result['items']),
+            b'],"message":"Centers fetched successfully","pagination":',
+            json.dumps(paginated_result['pagination'], sort_keys=True, separators=(',', ':')).encode('utf-8'),
+            b'}\n'
+        ])
+        return conditional(Response(body, status=200, mimetype=JSON_MIMETYPE), etag, public=True)
         
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except Exception as e:
         print(f"Get centers error: {e}")
         return jsonify({'message': 'Failed to fetch centers'}), 500
 
+MAX_NEARBY_RESULTS = 100
+
+@center_bp.route('/nearby', methods=['GET'])
+def get_nearby_centers():
+    """
+    Find the Nearest Active Recycling Centers
+    ---
+    tags:
+      - Recycling Centers
+    parameters:
+      - name: lat
+        in: query
+        type: number
+        required: true
+        description: Latitude in degrees
+      - name: lng
+        in: query
+        type: number
+        required: true
+        description: Longitude in degrees
+      - name: radius
+        in: query
+        type: number
+        description: Only centers within this many kilometres
+      - name: k
+        in: query
+        type: integer
+        default: 10
+        description: Maximum number of centers (at most 100)
+    responses:
+      200:
+        description: Centers ordered by distance, each with distance_km
+      400:
+        description: Missing or invalid coordinates, radius or k
+      500:
+        description: Server error
+    """
+    try:
+        try:
+            latitude = float(request.args['lat'])
+            longitude = float(request.args['lng'])
+        except (KeyError, ValueError):
+            return jsonify({'message': 'lat and lng are required numbers'}), 400
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({'message': 'lat must be within [-90, 90] and lng within [-180, 180]'}), 400
+        
+        radius = None
+        if request.args.get('radius'):
+            try:
+                radius = float(request.args['radius'])
+            except ValueError:
+                return jsonify({'message': 'Radius must be a number'}), 400
+            if not radius > 0:
+                return jsonify({'message': 'Radius must be greater than 0'}), 400
+        
+        try:
+            k = int(request.args.get('k', 10))
+        except ValueError:
+            return jsonify({'message': 'k must be an integer'}), 400
+        if not 1 <= k <= MAX_NEARBY_RESULTS:
+            return jsonify({'message': f'k must be between 1 and {MAX_NEARBY_RESULTS}'}), 400
+        
+        centers = find_nearby_centers(latitude, longitude, k=k, radius_km=radius)
+        
+        return jsonify({
+            'message': 'Nearby centers fetched successfully',
+            'data': centers,
+            'count': len(centers)
+        }), 200
+        
+    except Exception as e:
+        print(f"Nearby centers error: {e}")
+        return jsonify({'message': 'Failed to fetch nearby centers'}), 500
+
 @center_bp.route('/', methods=['POST'])
 def create_center():
     try:
@@ -113,18 +214,7 @@ def create_center():
         
         return jsonify({
             'message': 'Center created successfully',
-            'data': {
-                'id': center.id,
-                'name': center.name,
-                'location': center.location,
-                'latitude': center.latitude,
-                'longitude': center.longitude,
-                'facility_type': center.facility_type,
-                'contact': center.contact,
-                'operating_hours': center.operating_hours,
-                'accepted_types': center.accepted_types.split(',') if center.accepted_types else [],
-                'is_active': center.is_active
-            }
+            'data': center_serializer.to_dict(center)
         }), 201
         
     except Exception as e:
@@ -164,18 +254,7 @@ def update_center(center_id):
         
         return jsonify({
             'message': 'Center updated successfully',
-            'data': {
-                'id': center.id,
-                'name': center.name,
-                'location': center.location,
-                'latitude': center.latitude,
-                'longitude': center.longitude,
-                'facility_type': center.facility_type,
-                'contact': center.contact,
-                'operating_hours': center.operating_hours,
-                'accepted_types': center.accepted_types.split(',') if center.accepted_types else [],
-                'is_active': center.is_active
-            }
+            'data': center_serializer.to_dict(center)
         }), 200
         
     except Exception as e:
@@ -0,0 +1,162 @@
+from flask import Blueprint, request, jsonify
+from models import db
+from jwt_handler import get_current_user_id, is_admin
+from services.co2_service import get_active_factor_set, publish_factor_set, recompute_co2_saved
+
+co2_bp = Blueprint('co2', __name__, url_prefix='/api/co2-factors')
+
+@co2_bp.route('/', methods=['GET'])
+def get_factors():
+    """
+    Get Active CO2 Factors
+    ---
+    tags:
+      - CO2 Factors
+    responses:
+      200:
+        description: Active factor set fetched successfully
+      500:
+        description: Server error
+    """
+    try:
+        factor_set = get_active_factor_set()
+        return jsonify({
+            'message': 'CO2 factors fetched successfully',
+            'version': factor_set.version,
+            'data': factor_set.to_list()
+        }), 200
+        
+    except Exception as e:
+        print(f"Get CO2 factors error: {e}")
+        return jsonify({'message': 'Failed to fetch CO2 factors'}), 500
+
+@co2_bp.route('/', methods=['POST'])
+def publish_factors():
+    """
+    Publish a New CO2 Factor Set
+    ---
+    tags:
+      - CO2 Factors
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - factors
+          properties:
+            factors:
+              type: array
+              items:
+                type: object
+                properties:
+                  waste_type:
+                    type: string
+                    example: plastic
+                  region:
+                    type: string
+                    example: Nairobi
+                  factor:
+                    type: number
+                    example: 2.5
+            recompute:
+              type: boolean
+              default: true
+              description: Recompute co2_saved for all existing waste logs
+    responses:
+      201:
+        description: Factor set published
+      400:
+        description: Invalid factors
+      401:
+        description: Unauthorized
+      403:
+        description: Not an administrator (see ADMIN_EMAILS)
+      500:
+        description: Server error
+    """
+    try:
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'message': 'Invalid token'}), 401
+        # Factors apply to every user's history, so only administrators may change them
+        if not is_admin(user_id):
+            return jsonify({'message': 'Administrator access required'}), 403
+        
+        data = request.get_json() or {}
+        
+        try:
+            factor_set = publish_factor_set(data.get('factors') or [])
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        updated = recompute_co2_saved(factor_set) if data.get('recompute', True) else 0
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'CO2 factors published successfully',
+            'version': factor_set.version,
+            'recomputed_logs': updated,
+            'data': factor_set.to_list()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Publish CO2 factors error: {e}")
+        return jsonify({'message': 'Failed to publish CO2 factors'}), 500
+
+@co2_bp.route('/recompute', methods=['POST'])
+def recompute():
+    """
+    Recompute CO2 Savings for All Waste Logs
+    ---
+    tags:
+      - CO2 Factors
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+    responses:
+      200:
+        description: Waste logs recomputed with the active factor set
+      401:
+        description: Unauthorized
+      403:
+        description: Not an administrator (see ADMIN_EMAILS)
+      500:
+        description: Server error
+    """
+    try:
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'message': 'Invalid token'}), 401
+        # Factors apply to every user's history, so only administrators may change them
+        if not is_admin(user_id):
+            return jsonify({'message': 'Administrator access required'}), 403
+        
+        factor_set = get_active_factor_set()
+        updated = recompute_co2_saved(factor_set)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'CO2 savings recomputed successfully',
+            'version': factor_set.version,
+            'recomputed_logs': updated
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Recompute CO2 error: {e}")
+        return jsonify({'message': 'Failed to recompute CO2 savings'}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
-from models import User
+from services.leaderboard_service import fetch_leaderboard
+from utils.http_cache import conditional
 
 community_bp = Blueprint('community', __name__, url_prefix='/api/community')
 
@@ -77,35 +78,11 @@ def get_leaderboard():
         if per_page < 1 or per_page > 100:
             per_page = 10
         
-        # Get all users with their leaderboard stats
-        users = User.query.all()
-        leaderboard_data = []
-        
-        for user in users:
-            stats = user.get_leaderboard_stats()
-            # Only include users with actual contributions
-            if stats['points'] > 0 or stats['total_co2_saved'] > 0:
-                leaderboard_data.append(stats)
-        
-        # Sort by points (descending)
-        leaderboard_data.sort(key=lambda x: x['points'], reverse=True)
-        
-        # Calculate pagination
-        total_items = len(leaderboard_data)
+        # Slice of the cached ranking (or one ranked query when caching is off)
+        ranked_data, total_items = fetch_leaderboard(page, per_page)
         total_pages = (total_items + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Get paginated slice
-        paginated_data = leaderboard_data[start_idx:end_idx]
-        
-        # Add ranks (based on overall position, not paginated position)
-        ranked_data = []
-        for index, entry in enumerate(paginated_data, start=start_idx):
-            entry['rank'] = index + 1
-            ranked_data.append(entry)
         
-        return jsonify({
+        return conditional(jsonify({
             'message': 'Leaderboard data fetched successfully',
             'leaderboard': ranked_data,
             'pagination': {
@@ -118,7 +95,7 @@ def get_leaderboard():
                 'next_page': page + 1 if page < total_pages else None,
                 'prev_page': page - 1 if page > 1 else None
             }
-        }), 200
+        }), public=True)
         
     except Exception as e:
         print(f"Leaderboard Error: {e}")
@@ -1,6 +1,12 @@
+from datetime import date, datetime, timedelta
 from flask import Blueprint, jsonify, request
 from models import User
-from jwt_handler import decode_token
+from jwt_handler import get_current_user_id
+from services.dashboard_service import get_dashboard_stats, get_user_timeseries, TIMESERIES_GRANULARITIES
+from utils.http_cache import conditional
+
+# Longest range a single time series request may cover
+MAX_TIMESERIES_DAYS = 366 * 5
 
 # Create the Blueprint for the dashboard
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
@@ -12,8 +18,7 @@ def get_dashboard_data():
     Returns user-specific statistics for the dashboard.
     """
     try:
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        user_id = decode_token(token)
+        user_id = get_current_user_id()
         
         if not user_id:
             return jsonify({'message': 'Invalid token'}), 401
@@ -23,11 +28,127 @@ def get_dashboard_data():
             return jsonify({'message': 'User not found'}), 404
         
         stats = user.get_dashboard_stats()
-        return jsonify({
+        return conditional(jsonify({
             'message': 'Dashboard data fetched successfully',
             'data': stats
-        }), 200
+        }))
         
     except Exception as e:
         print(f"Dashboard Error: {e}")
-        return jsonify({'message': 'Failed to fetch dashboard data'}), 500
\ No newline at end of file
+        return jsonify({'message': 'Failed to fetch dashboard data'}), 500
+
+@dashboard_bp.route('/platform', methods=['GET'])
+def get_platform_stats():
+    """
+    Get Platform-wide Statistics
+    ---
+    tags:
+      - Dashboard
+    responses:
+      200:
+        description: Platform statistics fetched successfully
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                total_waste_recycled:
+                  type: number
+                total_co2_saved:
+                  type: number
+                total_users:
+                  type: integer
+                total_entries:
+                  type: integer
+                recycling_centers:
+                  type: integer
+                total_points:
+                  type: integer
+                generated_at:
+                  type: string
+      500:
+        description: Server error
+    """
+    try:
+        return conditional(jsonify({
+            'message': 'Platform statistics fetched successfully',
+            'data': get_dashboard_stats()
+        }), public=True)
+        
+    except Exception as e:
+        print(f"Platform stats error: {e}")
+        return jsonify({'message': 'Failed to fetch platform statistics'}), 500
+
+@dashboard_bp.route('/timeseries', methods=['GET'])
+def get_dashboard_timeseries():
+    """
+    Get Waste Trend Time Series
+    ---
+    tags:
+      - Dashboard
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+      - name: granularity
+        in: query
+        type: string
+        enum: [day, week, month]
+        default: day
+        description: Bucket size
+      - name: start
+        in: query
+        type: string
+        description: First date (YYYY-MM-DD), defaults to 30 days / 12 weeks / 12 months before end
+      - name: end
+        in: query
+        type: string
+        description: Last date (YYYY-MM-DD), defaults to today (UTC)
+    responses:
+      200:
+        description: Time series fetched successfully
+      400:
+        description: Invalid granularity or date range
+      401:
+        description: Unauthorized
+      500:
+        description: Server error
+    """
+    try:
+        user_id = get_current_user_id()
+        
+        if not user_id:
+            return jsonify({'message': 'Invalid token'}), 401
+        
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in TIMESERIES_GRANULARITIES:
+            return jsonify({'message': 'Granularity must be day, week or month'}), 400
+        
+        try:
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        except ValueError:
+            return jsonify({'message': 'Invalid date format'}), 400
+        
+        if start:
+            span = (end or datetime.utcnow().date()) - start
+            if span < timedelta(0) or span > timedelta(days=MAX_TIMESERIES_DAYS):
+                return jsonify({'message': 'Invalid date range'}), 400
+        
+        series = get_user_timeseries(user_id, granularity, start, end)
+        return jsonify({
+            'message': 'Time series fetched successfully',
+            'granularity': granularity,
+            'data': series
+        }), 200
+        
+    except Exception as e:
+        print(f"Dashboard timeseries error: {e}")
+        return jsonify({'message': 'Failed to fetch time series'}), 500
@@ -1,7 +1,7 @@
 import os
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
-from jwt_handler import decode_token
+from jwt_handler import get_current_user_id
 from utils.file_upload import save_uploaded_file
 
 file_bp = Blueprint('file', __name__, url_prefix='/api')
@@ -10,8 +10,7 @@ file_bp = Blueprint('file', __name__, url_prefix='/api')
 def upload_file():
     try:
         # Verify authentication
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        user_id = decode_token(token)
+        user_id = get_current_user_id()
         
         if not user_id:
             return jsonify({'message': 'Invalid or missing token'}), 401
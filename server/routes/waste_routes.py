@@ -1,12 +1,102 @@
-from flask import Blueprint, request, jsonify
-from models import WasteLog, db
-from jwt_handler import decode_token
-from utils.pagination import paginate_query
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from sqlalchemy import insert, func
+from models import User, WasteLog, db
+from jwt_handler import get_current_user_id, is_admin
+from utils.pagination import paginate_query, InvalidCursorError
+from utils.http_cache import conditional, make_etag, not_modified
+from utils.serializers import waste_log_serializer, waste_log_export_serializer
+from services.co2_service import get_active_factor_set, region_column_value
+from services.stats_service import StatsDeltas
+from services.collection_service import STATUS_TRANSITIONS, build_status_filter, bulk_transition_status
+from services.route_planner import plan_collection_routes
+import csv
+import io
+import json
+import math
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 waste_bp = Blueprint('waste', __name__, url_prefix='/api/waste-logs') # define a blueprint for wastelog routes it groups routes under the api/waste-logs URL prefix
 
+def build_waste_log_row(data, user_id, factor_set):
+    """
+    Validate a waste log payload and turn it into column values
+    
+    CO2 savings are always computed server-side from the factor set; any
+    co2_saved value sent by the client is ignored.
+    
+    Args:
+        data: Decoded JSON object sent by the client
+        user_id: ID of the authenticated user owning the log
+        factor_set: services.co2_service.FactorSet used to compute co2_saved
+    
+    Returns:
+        tuple: (row_dict, None) or (None, error_message)
+    """
+    if not isinstance(data, dict) or not data.get('waste_type') or not data.get('weight'):
+        return None, 'Waste type and weight are required'
+    
+    try:
+        weight = float(data['weight'])
+    except (TypeError, ValueError):
+        return None, 'Weight must be a number'
+    # NaN, infinities and non-positive weights would poison co2_saved and the rollups
+    if not math.isfinite(weight) or weight <= 0:
+        return None, 'Weight must be a positive number'
+    
+    # Convert collection_date string to datetime object if provided
+    collection_date = None
+    if data.get('collection_date'):
+        try:
+            collection_date = datetime.fromisoformat(str(data['collection_date']).replace('Z', '+00:00'))
+        except ValueError:
+            return None, 'Invalid collection date format'
+    
+    return {
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'date': datetime.utcnow(),
+        'waste_type': data['waste_type'],
+        'weight': weight,
+        'co2_saved': factor_set.co2_saved(data['waste_type'], weight, data.get('collection_location')),
+        'disposal_method': data.get('disposal_method'),
+        'collection_location': data.get('collection_location'),
+        # Bulk inserts skip the flush events that fill region for ORM writes
+        'region': region_column_value(data.get('collection_location')),
+        'collection_status': data.get('collection_status', 'pending'),
+        'collection_date': collection_date,
+        'image_url': data.get('image_url')
+    }, None
+
+def _read_batch_payload():
+    """
+    Read a batch upload body as a list of items
+    
+    Accepts a JSON array, a JSON object with a 'logs' array, or an NDJSON
+    body (one JSON object per line). Lines that fail to parse are kept as
+    errors so they can be reported against their position in the upload.
+    
+    Returns:
+        tuple: (items, None) or (None, error_message)
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(ValueError('Invalid JSON line'))
+        return items, None
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('logs')
+    if not isinstance(data, list):
+        return None, 'Expected a JSON array of waste logs'
+    return data, None
+
 @waste_bp.route('/', methods=['POST']) # routes to create a new waste log entry 
 def create_waste_log():
     """
@@ -37,9 +127,6 @@ def create_waste_log():
             weight:
               type: number
               example: 5.5
-            co2_saved:
-              type: number
-              example: 2.75
             disposal_method:
               type: string
               example: recycling
@@ -63,37 +150,18 @@ def create_waste_log():
         description: Server error
     """
     try:
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        user_id = decode_token(token)
+        user_id = get_current_user_id()
         
         if not user_id:
             return jsonify({'message': 'Invalid token'}), 401
         
         data = request.get_json()
         
-        if not data or not data.get('waste_type') or not data.get('weight'):
-            return jsonify({'message': 'Waste type and weight are required'}), 400
+        row, error = build_waste_log_row(data, user_id, get_active_factor_set())
+        if error:
+            return jsonify({'message': error}), 400
         
-        # Convert collection_date string to datetime object if provided
-        collection_date = None
-        if data.get('collection_date'):
-            try:
-                collection_date = datetime.fromisoformat(data['collection_date'].replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({'message': 'Invalid collection date format'}), 400
-        
-        waste_log = WasteLog(      # create a new waste log object, assigning a unique ID and the authenticated user,s ID 
-            id=str(uuid.uuid4()),
-            user_id=user_id,
-            waste_type=data['waste_type'],
-            weight=float(data['weight']),
-            co2_saved=data.get('co2_saved'),
-            disposal_method=data.get('disposal_method'),
-            collection_location=data.get('collection_location'),
-            collection_status=data.get('collection_status', 'pending'),
-            collection_date=collection_date,
-            image_url=data.get('image_url')
-        )
+        waste_log = WasteLog(**row)  # create a new waste log object, assigning a unique ID and the authenticated user,s ID 
         
         db.session.add(waste_log)
         db.session.commit()
@@ -119,31 +187,134 @@ def create_waste_log():
         print(f"Create waste log error: {e}")
         return jsonify({'message': 'Failed to create waste log'}), 500 # print the error for debugging 
 
+@waste_bp.route('/batch', methods=['POST'])
+def create_waste_logs_batch():
+    """
+    Create Waste Logs in Bulk
+    ---
+    tags:
+      - Waste Management
+    security:
+      - Bearer: []
+    consumes:
+      - application/json
+      - application/x-ndjson
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+      - name: body
+        in: body
+        required: true
+        description: JSON array of waste logs (or an object with a "logs" array, or one JSON object per line as NDJSON)
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              waste_type:
+                type: string
+                example: plastic
+              weight:
+                type: number
+                example: 5.5
+    responses:
+      201:
+        description: Valid logs were created; invalid items are reported in errors
+      400:
+        description: Malformed body, batch too large, or no valid logs
+      401:
+        description: Unauthorized
+      500:
+        description: Server error
+    """
+    try:
+        user_id = get_current_user_id()
+        
+        if not user_id:
+            return jsonify({'message': 'Invalid token'}), 401
+        
+        items, error = _read_batch_payload()
+        if error:
+            return jsonify({'message': error}), 400
+        
+        if not items:
+            return jsonify({'message': 'No waste logs provided'}), 400
+        
+        batch_limit = current_app.config.get('WASTE_LOG_BATCH_LIMIT', 1000)
+        if len(items) > batch_limit:
+            return jsonify({'message': f'A batch may contain at most {batch_limit} waste logs'}), 400
+        
+        # Validate everything up front so a bad item never costs a round-trip to the database
+        factor_set = get_active_factor_set()
+        rows = []
+        created = []
+        errors = []
+        for index, item in enumerate(items):
+            if isinstance(item, Exception):
+                errors.append({'index': index, 'message': str(item)})
+                continue
+            row, error = build_waste_log_row(item, user_id, factor_set)
+            if error:
+                errors.append({'index': index, 'message': error})
+                continue
+            rows.append(row)
+            created.append({'index': index, 'id': row['id']})
+        
+        if not rows:
+            return jsonify({
+                'message': 'No valid waste logs to create',
+                'created': 0,
+                'failed': len(errors),
+                'errors': errors
+            }), 400
+        
+        # One multi-row INSERT and one commit for the whole batch
+        db.session.execute(insert(WasteLog), rows)
+        # Bulk inserts bypass the flush events, so roll the totals up here
+        deltas = StatsDeltas()
+        for row in rows:
+            deltas.add_log(user_id, row['weight'], row['co2_saved'], row['date'], row['waste_type'])
+        deltas.apply(db.session.connection())
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Waste logs created successfully',
+            'created': len(rows),
+            'failed': len(errors),
+            'data': created,
+            'errors': errors
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Batch create waste logs error: {e}")
+        return jsonify({'message': 'Failed to create waste logs'}), 500
+
 @waste_bp.route('/', methods=['GET'])  # routes to get all waste logs for the authenticated user.requires authentiaction accessible vai GET request to /api/waste-logs/
 def get_waste_logs():
     try:
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        user_id = decode_token(token)
+        user_id = get_current_user_id()
         
         if not user_id:
             return jsonify({'message': 'Invalid token'}), 401  # check for valid token/user ID
         
-        waste_logs = WasteLog.query.filter_by(user_id=user_id).all()
-        return jsonify({
+        # The user's data version changes with every write to their logs, so a
+        # matching ETag answers 304 without loading or serializing any log
+        data_version = db.session.query(User.data_version).filter_by(id=user_id).scalar()
+        etag = make_etag('waste-logs', user_id, data_version, request.query_string)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        # Plain column rows, serialized in one pass
+        rows = waste_log_serializer.query().filter(WasteLog.user_id == user_id).all()
+        return conditional(jsonify({
             'message': 'Waste logs fetched successfully',
-            'data': [{
-                'id': log.id,
-                'waste_type': log.waste_type,
-                'weight': log.weight,
-                'co2_saved': log.co2_saved,
-                'date': log.date.isoformat() if log.date else None,
-                'collection_location': log.collection_location,
-                'collection_status': log.collection_status,
-                'collection_date': log.collection_date.isoformat() if log.collection_date else None,
-                'disposal_method': log.disposal_method,
-                'image_url': log.image_url
-            } for log in waste_logs]
-        }), 200
+            'data': waste_log_serializer.serialize(rows)
+        }), etag)
         
     except Exception as e:
         print(f"Get waste logs error: {e}")
@@ -167,6 +338,15 @@ def get_all_waste_logs():
         type: integer
         default: 10
         description: Items per page
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque cursor for keyset pagination (send an empty value for the first page, then next_cursor)
+      - name: include_total
+        in: query
+        type: boolean
+        default: false
+        description: In cursor mode, also return a (briefly cached) total_items count
     responses:
       200:
         description: Waste logs fetched successfully
@@ -194,35 +374,382 @@ def get_all_waste_logs():
                   type: boolean
                 has_prev:
                   type: boolean
+                next_cursor:
+                  type: string
+      400:
+        description: Invalid cursor
       500:
         description: Server error
     """
     try:
-        # Apply pagination to query
-        query = WasteLog.query.order_by(WasteLog.date.desc())
-        paginated_result = paginate_query(query, default_per_page=10)
+        # Apply pagination to query, newest first with the id as tie-breaker for cursors
+        query = waste_log_serializer.query()
+        paginated_result = paginate_query(
+            query,
+            default_per_page=10,
+            keyset=[(WasteLog.date, 'desc'), (WasteLog.id, 'desc')]
+        )
         
         return jsonify({
             'message': 'All waste logs fetched successfully',
-            'data': [{
-                'id': log.id,
-                'waste_type': log.waste_type,
-                'weight': log.weight,
-                'co2_saved': log.co2_saved,
-                'date': log.date.isoformat() if log.date else None,
-                'collection_location': log.collection_location,
-                'collection_status': log.collection_status,
-                'collection_date': log.collection_date.isoformat() if log.collection_date else None,
-                'disposal_method': log.disposal_method,
-                'image_url': log.image_url
-            } for log in paginated_result['items']],
+            'data': waste_log_serializer.serialize(paginated_result['items']),
             'pagination': paginated_result['pagination']
         }), 200
         
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except Exception as e:
         print(f"Get all waste logs error: {e}")
         return jsonify({'message': 'Failed to fetch waste logs'}), 500
 
+EXPORT_BATCH_SIZE = 1000
+
+def _parse_iso_datetime(value):
+    """
+    Parse an ISO date/datetime string into a naive UTC datetime
+    
+    Raises:
+        ValueError: If the value is not ISO formatted
+    """
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _date_range_criteria(start, end):
+    """
+    WHERE criteria limiting WasteLog.date to an ISO start/end range
+    
+    A bare date as upper bound covers that whole day.
+    
+    Raises:
+        ValueError: If either bound is not ISO formatted
+    """
+    criteria = []
+    if start:
+        criteria.append(WasteLog.date >= _parse_iso_datetime(start))
+    if end:
+        parsed = _parse_iso_datetime(end)
+        if len(str(end)) == 10:
+            criteria.append(WasteLog.date < parsed + timedelta(days=1))
+        else:
+            criteria.append(WasteLog.date <= parsed)
+    return criteria
+
+def _export_rows(statement):
+    """Yield waste log rows in fixed-size batches through a server-side cursor"""
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for partition in result.partitions():
+        yield partition
+
+def _generate_ndjson(statement):
+    for partition in _export_rows(statement):
+        yield ''.join(json.dumps(item) + '\n' for item in waste_log_export_serializer.serialize(partition))
+
+def _generate_csv(statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(waste_log_export_serializer.keys)
+    for partition in _export_rows(statement):
+        writer.writerows(map(waste_log_export_serializer.values, partition))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@waste_bp.route('/export', methods=['GET'])
+def export_waste_logs():
+    """
+    Export Waste Logs (Streaming)
+    
+    Administrators (ADMIN_EMAILS) export every user's logs, or one user's
+    with user_id; everyone else exports only their own logs.
+    ---
+    tags:
+      - Waste Management
+    security:
+      - Bearer: []
+    produces:
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        default: ndjson
+        description: Output format
+      - name: start
+        in: query
+        type: string
+        description: Only logs on or after this ISO date/datetime
+      - name: end
+        in: query
+        type: string
+        description: Only logs on or before this ISO date/datetime (a bare date includes the whole day)
+      - name: waste_type
+        in: query
+        type: string
+        description: Filter by waste type (case-insensitive)
+      - name: status
+        in: query
+        type: string
+        description: Filter by collection status
+      - name: user_id
+        in: query
+        type: string
+        description: Only this user's logs (administrators; other users may only pass their own id)
+    responses:
+      200:
+        description: Waste logs streamed in the requested format
+      400:
+        description: Invalid format or date
+      401:
+        description: Invalid token
+      403:
+        description: Exporting another user's logs requires administrator access
+    """
+    user_id = get_current_user_id()
+    if not user_id:
+        return jsonify({'message': 'Invalid token'}), 401
+    
+    # Full-table exports are for analysts; regular users only get their own logs
+    owner_id = request.args.get('user_id')
+    if not is_admin(user_id):
+        if owner_id and owner_id != user_id:
+            return jsonify({'message': 'Administrator access required'}), 403
+        owner_id = user_id
+    
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'message': 'Format must be ndjson or csv'}), 400
+    
+    try:
+        date_criteria = _date_range_criteria(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return jsonify({'message': 'Invalid date format'}), 400
+    
+    statement = waste_log_export_serializer.select().where(*date_criteria)
+    if owner_id:
+        statement = statement.where(WasteLog.user_id == owner_id)
+    if request.args.get('waste_type'):
+        statement = statement.where(func.lower(WasteLog.waste_type) == request.args['waste_type'].lower())
+    if request.args.get('status'):
+        statement = statement.where(WasteLog.collection_status == request.args['status'])
+    statement = statement.order_by(WasteLog.date, WasteLog.id)
+    
+    # Rows are produced lazily, so memory stays flat regardless of table size
+    if export_format == 'csv':
+        generator, mimetype = _generate_csv(statement), 'text/csv'
+    else:
+        generator, mimetype = _generate_ndjson(statement), 'application/x-ndjson'
+    
+    return Response(
+        stream_with_context(generator),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=waste_logs.{export_format}'}
+    )
+
+@waste_bp.route('/status', methods=['PUT'])
+def bulk_update_waste_log_status():
+    """
+    Change the Collection Status of Many Waste Logs
+    ---
+    tags:
+      - Waste Management
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+      - name: body
+        in: body
+        required: true
+        description: Target status plus either a list of IDs or a filter
+        schema:
+          type: object
+          required:
+            - collection_status
+          properties:
+            collection_status:
+              type: string
+              enum: [scheduled, collected]
+            ids:
+              type: array
+              items:
+                type: string
+            filter:
+              type: object
+              properties:
+                location:
+                  type: string
+                  description: Case-insensitive part of the collection location
+                start:
+                  type: string
+                  description: Only logs on or after this ISO date/datetime
+                end:
+                  type: string
+                  description: Only logs on or before this ISO date/datetime
+                waste_type:
+                  type: string
+    responses:
+      200:
+        description: Status changed; logs that could not move forward are skipped
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+            collection_status:
+              type: string
+            changed:
+              type: integer
+            skipped:
+              type: integer
+      400:
+        description: Invalid status, IDs or filter
+      401:
+        description: Unauthorized
+      500:
+        description: Server error
+    """
+    try:
+        user_id = get_current_user_id()
+        
+        if not user_id:
+            return jsonify({'message': 'Invalid token'}), 401
+        
+        data = request.get_json(silent=True) or {}
+        target_status = data.get('collection_status')
+        if target_status not in STATUS_TRANSITIONS:
+            return jsonify({'message': f'collection_status must be one of: {", ".join(STATUS_TRANSITIONS)}'}), 400
+        
+        ids = data.get('ids')
+        filters = data.get('filter')
+        if (ids is None) == (filters is None):
+            return jsonify({'message': 'Provide either ids or filter'}), 400
+        
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(log_id, str) for log_id in ids):
+                return jsonify({'message': 'ids must be a list of waste log IDs'}), 400
+            ids = list(dict.fromkeys(ids))
+            batch_limit = current_app.config.get('WASTE_LOG_BATCH_LIMIT', 1000)
+            if len(ids) > batch_limit:
+                return jsonify({'message': f'At most {batch_limit} IDs can be updated at once'}), 400
+            criteria = build_status_filter(ids=ids)
+            requested = len(ids)
+        else:
+            if not isinstance(filters, dict) or not any(filters.get(key) for key in ('location', 'start', 'end', 'waste_type')):
+                return jsonify({'message': 'filter needs at least one of location, start, end or waste_type'}), 400
+            try:
+                criteria = build_status_filter(location=filters.get('location'), waste_type=filters.get('waste_type'))
+                criteria.extend(_date_range_criteria(filters.get('start'), filters.get('end')))
+            except ValueError:
+                return jsonify({'message': 'Invalid date format'}), 400
+            requested = None
+        
+        # One set-based UPDATE, whatever the number of logs
+        changed, skipped = bulk_transition_status(target_status, criteria, requested)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Waste log statuses updated successfully',
+            'collection_status': target_status,
+            'changed': changed,
+            'skipped': skipped
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk update status error: {e}")
+        return jsonify({'message': 'Failed to update waste log statuses'}), 500
+
+@waste_bp.route('/route-plan', methods=['GET'])
+def get_route_plan():
+    """
+    Plan Pickup Routes for Pending Waste Logs
+    ---
+    tags:
+      - Waste Management
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: Bearer token
+      - name: capacity
+        in: query
+        type: number
+        description: Vehicle capacity in kg (defaults to ROUTE_VEHICLE_CAPACITY)
+      - name: location
+        in: query
+        type: string
+        description: Only logs whose collection location contains this text (case-insensitive)
+      - name: waste_type
+        in: query
+        type: string
+        description: Only logs of this waste type (case-insensitive)
+      - name: start
+        in: query
+        type: string
+        description: Only logs on or after this ISO date/datetime
+      - name: end
+        in: query
+        type: string
+        description: Only logs on or before this ISO date/datetime
+    responses:
+      200:
+        description: Routes per recycling center, plus the logs that could not be planned
+      400:
+        description: Invalid capacity or date
+      401:
+        description: Unauthorized
+      500:
+        description: Server error
+    """
+    try:
+        user_id = get_current_user_id()
+        
+        if not user_id:
+            return jsonify({'message': 'Invalid token'}), 401
+        
+        try:
+            capacity = float(request.args.get('capacity', current_app.config.get('ROUTE_VEHICLE_CAPACITY', 1000)))
+        except ValueError:
+            return jsonify({'message': 'Capacity must be a number'}), 400
+        if not capacity > 0:
+            return jsonify({'message': 'Capacity must be greater than 0'}), 400
+        
+        try:
+            criteria = build_status_filter(
+                location=request.args.get('location'),
+                waste_type=request.args.get('waste_type')
+            )
+            criteria.extend(_date_range_criteria(request.args.get('start'), request.args.get('end')))
+        except ValueError:
+            return jsonify({'message': 'Invalid date format'}), 400
+        
+        return jsonify({
+            'message': 'Route plan generated successfully',
+            'data': plan_collection_routes(capacity, criteria)
+        }), 200
+        
+    except Exception as e:
+        print(f"Route plan error: {e}")
+        return jsonify({'message': 'Failed to generate route plan'}), 500
+
 @waste_bp.route('/<log_id>/status', methods=['PUT'])
 def update_waste_log_status(log_id):
     try:
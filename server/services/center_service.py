@@ -0,0 +1,198 @@
+# services/center_service.py
+
+import hashlib
+import json
+from collections import defaultdict
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from database import db
+from models import CenterAcceptedType, RecyclingCenter
+from services.co2_service import normalize_key
+from utils.cache import SnapshotCache
+from utils.serializers import center_serializer
+from utils.spatial import KDTree, chord_to_km, km_to_chord, to_unit_vectors
+
+# Callbacks run after a commit that created, changed or deleted a center
+_change_listeners = []
+
+def on_centers_changed(callback):
+    """Register a callback to run after any commit that wrote recycling centers"""
+    _change_listeners.append(callback)
+    return callback
+
+def accepted_type_keys(accepted_types):
+    """
+    Normalized waste types in a comma-joined accepted_types value
+
+    These are the only types a center accepts: one that lists none accepts
+    no waste type, both in the waste_type filter of the center catalog and
+    in the route planner.
+    """
+    keys = (normalize_key(value)[:50] for value in (accepted_types or '').split(','))
+    return sorted({key for key in keys if key})
+
+def _sync_accepted_types(center):
+    """Make center.accepted_type_rows match its accepted_types string"""
+    keys = accepted_type_keys(center.accepted_types)
+    current = {row.waste_type: row for row in center.accepted_type_rows}
+    if sorted(current) == keys:
+        return
+    center.accepted_type_rows = [current.get(key) or CenterAcceptedType(waste_type=key) for key in keys]
+
+@event.listens_for(Session, 'before_flush')
+def _flag_center_changes(session, flush_context, instances):
+    changed = False
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, RecyclingCenter):
+            continue
+        changed = True
+        if obj in session.new or (obj not in session.deleted and get_history(obj, 'accepted_types').has_changes()):
+            _sync_accepted_types(obj)
+    if changed:
+        session.info['centers_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _notify_centers_changed(session):
+    if session.info.pop('centers_changed', False):
+        for callback in _change_listeners:
+            callback()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_center_changes(session):
+    session.info.pop('centers_changed', None)
+
+def _to_json_bytes(value):
+    # Same output as jsonify outside debug mode: sorted keys, compact separators
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+class CenterSpatialIndex:
+    """k-d tree over the active centers that have coordinates"""
+
+    def __init__(self, records):
+        """
+        Args:
+            records: Serialized centers (see utils.serializers), all with coordinates
+        """
+        self.centers = records
+        self.tree = KDTree(to_unit_vectors([(c['latitude'], c['longitude']) for c in records]))
+
+    def nearby(self, latitude, longitude, k=None, radius_km=None):
+        """
+        Centers closest to a point, nearest first
+
+        Args:
+            latitude, longitude: Query point in degrees
+            k: Maximum number of centers (None: all within the radius)
+            radius_km: Only centers within this distance (None: no limit)
+
+        Returns:
+            list: Center dicts with an added distance_km
+        """
+        point = to_unit_vectors([(latitude, longitude)])[0]
+        max_distance = km_to_chord(radius_km) if radius_km is not None else float('inf')
+        return [
+            dict(self.centers[index], distance_km=round(chord_to_km(chord), 3))
+            for chord, index in self.tree.query(point, k=k, max_distance=max_distance)
+        ]
+
+class CenterCatalog:
+    """
+    Immutable snapshot of every recycling center, ready to serve
+
+    Holds each center serialized and pre-encoded as JSON, in list order
+    (name, then id), with buckets of positions per filter value so a
+    filtered page is a few set lookups and a join of cached bytes. The
+    spatial index of the same snapshot lives alongside it.
+    """
+
+    def __init__(self, centers, accepted_types, version):
+        """
+        Args:
+            centers: Rows selected with center_serializer
+            accepted_types: (center_id, waste_type) rows of center_accepted_types
+            version: Version number of this snapshot
+        """
+        centers = sorted(centers, key=lambda center: (center.name, center.id))
+        records = center_serializer.serialize(centers)
+        self.version = version
+        self.sort_keys = [(center.name, center.id) for center in centers]
+        self.records = records
+        self.payloads = [_to_json_bytes(record) for record in records]
+        self.digest = hashlib.sha256(b'\n'.join(self.payloads)).hexdigest()
+
+        # Buckets use the raw column values, like the SQL filters they replace;
+        # waste types come from the normalized center_accepted_types rows
+        self.active = frozenset(i for i, center in enumerate(centers) if center.is_active is True)
+        self.by_facility_type = defaultdict(set)
+        for position, center in enumerate(centers):
+            self.by_facility_type[center.facility_type].add(position)
+        positions = {center.id: position for position, center in enumerate(centers)}
+        self.by_waste_type = defaultdict(set)
+        for center_id, waste_type in accepted_types:
+            if center_id in positions:
+                self.by_waste_type[waste_type].add(positions[center_id])
+
+        self.spatial = CenterSpatialIndex([
+            record for position, record in enumerate(records)
+            if position in self.active and record['latitude'] is not None and record['longitude'] is not None
+        ])
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def select(self, facility_type=None, waste_type=None, active_only=True):
+        """
+        Positions of the centers matching the filters, in list order
+
+        Args:
+            facility_type: Exact facility type
+            waste_type: Accepted waste type (case-insensitive)
+            active_only: Only active centers
+        """
+        buckets = []
+        if facility_type:
+            buckets.append(self.by_facility_type.get(facility_type, frozenset()))
+        if waste_type:
+            buckets.append(self.by_waste_type.get(normalize_key(waste_type), frozenset()))
+        if active_only:
+            buckets.append(self.active)
+        if not buckets:
+            return list(range(len(self.payloads)))
+        buckets.sort(key=len)
+        matches = set(buckets[0]).intersection(*buckets[1:])
+        return sorted(matches)
+
+def _load_centers():
+    """Center rows and their (center_id, waste_type) accepted type rows"""
+    centers = db.session.execute(center_serializer.select()).all()
+    accepted_types = db.session.execute(select(CenterAcceptedType.center_id, CenterAcceptedType.waste_type)).all()
+    return centers, accepted_types
+
+def _load_catalog():
+    centers, accepted_types = _load_centers()
+    previous = center_catalog_cache.peek()
+    catalog = CenterCatalog(centers, accepted_types, version=previous.version if previous else 1)
+    # Only a change in content moves the version (e.g. not a TTL refresh)
+    if previous and catalog.digest != previous.digest:
+        catalog.version = previous.version + 1
+    return catalog
+
+# Rebuilt on the first read after any center write in this process, and
+# after CENTER_CATALOG_TTL seconds to pick up writes made by other workers
+center_catalog_cache = SnapshotCache(_load_catalog, name='center-catalog')
+on_centers_changed(center_catalog_cache.mark_dirty)
+
+def get_center_catalog():
+    """Return the current center catalog"""
+    ttl = current_app.config.get('CENTER_CATALOG_TTL', 300)
+    if ttl <= 0:
+        return CenterCatalog(*_load_centers(), version=0)
+    # Rebuild inline: center writes are rare and must show up on the next read
+    return center_catalog_cache.get(ttl, background=False)
+
+def find_nearby_centers(latitude, longitude, k=10, radius_km=None):
+    """Nearest active centers to a point, see CenterSpatialIndex.nearby"""
+    return get_center_catalog().spatial.nearby(latitude, longitude, k=k, radius_km=radius_km)
@@ -0,0 +1,186 @@
+# services/co2_service.py
+
+from itertools import chain
+from sqlalchemy import and_, case, event, func, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from database import db
+from models import EmissionFactor, WasteLog
+from services.stats_service import bump_data_versions, rebuild_user_stats, rebuild_daily_rollups
+
+# Built-in factors (kg CO2 saved per kg of waste), used until a factor set is published
+DEFAULT_FACTORS = {
+    'plastic': 2.5,
+    'paper': 1.8,
+    'organic': 0.5,
+    'glass': 0.8,
+    'metal': 3.0,
+    'e-waste': 4.0,
+    'agricultural': 0.4,
+    'textile': 2.0,
+    'other': 1.0
+}
+
+def normalize_key(value):
+    """Normalize a waste type or region name for factor lookups"""
+    return str(value or '').strip().lower()
+
+def region_of(collection_location):
+    """
+    Extract the region from a collection location
+
+    The client sends locations as "<place>, <region>", so the region is the
+    last comma-separated part.
+    """
+    if not collection_location:
+        return ''
+    return normalize_key(collection_location.rsplit(',', 1)[-1])
+
+def region_column_value(collection_location):
+    """Value stored in waste_logs.region for a collection location (None without a region)"""
+    return region_of(collection_location) or None
+
+@event.listens_for(Session, 'before_flush')
+def _set_waste_log_regions(session, flush_context, instances):
+    # Keep waste_logs.region in step with collection_location for ORM writes;
+    # bulk inserts set it themselves (see routes/waste_routes.py)
+    for obj in chain(session.new, session.dirty):
+        if not isinstance(obj, WasteLog):
+            continue
+        if obj in session.new or get_history(obj, 'collection_location').has_changes():
+            obj.region = region_column_value(obj.collection_location)
+
+class FactorSet:
+    """A versioned set of CO2 factors, per waste type and optionally per region"""
+
+    def __init__(self, version, factors):
+        """
+        Args:
+            version: Version number of the set (0 for the built-in defaults)
+            factors: dict mapping (waste_type, region or None) to a factor
+        """
+        self.version = version
+        self.defaults = {}
+        self.regional = {}
+        for (waste_type, region), factor in factors.items():
+            if region:
+                self.regional[(normalize_key(waste_type), normalize_key(region))] = factor
+            else:
+                self.defaults[normalize_key(waste_type)] = factor
+        self.fallback = self.defaults.get('other', 1.0)
+
+    def factor_for(self, waste_type, collection_location=None):
+        """Return the factor for a waste type, preferring a regional override"""
+        waste_type = normalize_key(waste_type)
+        region = region_of(collection_location)
+        if region and (waste_type, region) in self.regional:
+            return self.regional[(waste_type, region)]
+        return self.defaults.get(waste_type, self.fallback)
+
+    def co2_saved(self, waste_type, weight, collection_location=None):
+        """Compute the CO2 saved (kg) for a quantity of waste"""
+        return weight * self.factor_for(waste_type, collection_location)
+
+    def factor_expression(self):
+        """
+        SQL expression evaluating to the factor of each waste_logs row
+
+        Mirrors factor_for so a recompute in the database gives the same
+        result as computing on insert: regional factors match the stored
+        waste_logs.region, which is region_of(collection_location).
+        """
+        waste_type = func.lower(func.trim(WasteLog.waste_type))
+        whens = [
+            (and_(waste_type == key, WasteLog.region == region), factor)
+            for (key, region), factor in self.regional.items()
+        ]
+        whens.extend((waste_type == key, factor) for key, factor in self.defaults.items())
+        if not whens:
+            return self.fallback
+        return case(*whens, else_=self.fallback)
+
+    def to_list(self):
+        """Serialize the set for API responses"""
+        rows = [{'waste_type': key, 'region': None, 'factor': factor} for key, factor in self.defaults.items()]
+        rows.extend(
+            {'waste_type': key, 'region': region, 'factor': factor}
+            for (key, region), factor in self.regional.items()
+        )
+        return rows
+
+def get_active_factor_set():
+    """
+    Return the latest published factor set
+
+    Loaded with a single query on the (small) co2_factors table; the
+    built-in defaults apply until a set has been published.
+    """
+    latest = db.session.query(func.max(EmissionFactor.version)).scalar_subquery()
+    rows = EmissionFactor.query.filter(EmissionFactor.version == latest).all()
+    if not rows:
+        return FactorSet(0, {(key, None): factor for key, factor in DEFAULT_FACTORS.items()})
+    return FactorSet(rows[0].version, {(row.waste_type, row.region): row.factor for row in rows})
+
+def publish_factor_set(factors):
+    """
+    Publish a complete new factor set as the next version
+
+    Args:
+        factors: list of dicts with waste_type, factor and optional region
+
+    Returns:
+        FactorSet: The newly published set (not yet committed)
+
+    Raises:
+        ValueError: If an entry is missing a waste type or has an invalid factor
+    """
+    parsed = {}
+    for entry in factors:
+        if not isinstance(entry, dict):
+            raise ValueError('Every factor must be an object')
+        waste_type = normalize_key(entry.get('waste_type'))
+        if not waste_type:
+            raise ValueError('Every factor needs a waste_type')
+        try:
+            factor = float(entry.get('factor'))
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid factor for {waste_type}')
+        if factor < 0:
+            raise ValueError(f'Invalid factor for {waste_type}')
+        parsed[(waste_type, normalize_key(entry.get('region')) or None)] = factor
+
+    if not parsed:
+        raise ValueError('At least one factor is required')
+
+    current = db.session.query(func.max(EmissionFactor.version)).scalar() or 0
+    version = current + 1
+    db.session.add_all([
+        EmissionFactor(version=version, waste_type=waste_type, region=region, factor=factor)
+        for (waste_type, region), factor in parsed.items()
+    ])
+    db.session.flush()
+    return FactorSet(version, parsed)
+
+def recompute_co2_saved(factor_set=None):
+    """
+    Recompute co2_saved for every waste log with one set-based UPDATE
+
+    The user_stats and daily rollups are rebuilt afterwards, and every
+    user's data version bumped, since every CO2 value may have changed.
+
+    Args:
+        factor_set: Factors to apply, defaults to the active set
+
+    Returns:
+        int: Number of rows updated (not yet committed)
+    """
+    factor_set = factor_set or get_active_factor_set()
+    result = db.session.execute(
+        update(WasteLog)
+        .values(co2_saved=WasteLog.weight * factor_set.factor_expression())
+        .execution_options(synchronize_session=False)
+    )
+    rebuild_user_stats()
+    rebuild_daily_rollups()
+    bump_data_versions()
+    return result.rowcount
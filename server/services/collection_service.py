@@ -0,0 +1,88 @@
+# services/collection_service.py
+
+from sqlalchemy import func, or_, select, update
+from database import db
+from models import User, WasteLog
+from services.stats_service import bump_data_versions
+
+# Collection status moves forward only: pending -> scheduled -> collected.
+# Maps each target status to the statuses it may be reached from.
+STATUS_TRANSITIONS = {
+    'scheduled': ('pending',),
+    'collected': ('scheduled',)
+}
+
+def _allowed_from(target_status):
+    """Predicate matching logs that may move to the target status"""
+    allowed = STATUS_TRANSITIONS[target_status]
+    condition = WasteLog.collection_status.in_(allowed)
+    if 'pending' in allowed:
+        # Logs created before the column default existed have no status
+        condition = or_(condition, WasteLog.collection_status.is_(None))
+    return condition
+
+def build_status_filter(ids=None, location=None, waste_type=None):
+    """
+    Build the WHERE criteria selecting waste logs for a bulk status change
+
+    Args:
+        ids: Explicit waste log IDs
+        location: Case-insensitive substring of the collection location
+        waste_type: Case-insensitive waste type
+
+    Returns:
+        list: SQLAlchemy criteria (empty when nothing was given)
+    """
+    criteria = []
+    if ids is not None:
+        criteria.append(WasteLog.id.in_(ids))
+    if location:
+        criteria.append(func.lower(WasteLog.collection_location).contains(str(location).strip().lower(), autoescape=True))
+    if waste_type:
+        criteria.append(func.lower(WasteLog.waste_type) == str(waste_type).strip().lower())
+    return criteria
+
+def bulk_transition_status(target_status, criteria, requested=None):
+    """
+    Move every matching waste log to a new collection status with one UPDATE
+
+    Logs whose current status cannot move to the target (including ones
+    already there) are left untouched and counted as skipped. Matching logs
+    are counted in the same transaction as the UPDATE, with their rows
+    locked, so changed + skipped is the number of logs that matched.
+
+    Args:
+        target_status: Key of STATUS_TRANSITIONS
+        criteria: WHERE criteria from build_status_filter
+        requested: Number of IDs asked for, when selecting by ID; IDs that
+            do not exist are then counted as skipped too
+
+    Returns:
+        tuple: (changed, skipped), not yet committed
+
+    Raises:
+        ValueError: If the target status is not a valid transition target
+    """
+    if target_status not in STATUS_TRANSITIONS:
+        raise ValueError(f'collection_status must be one of: {", ".join(STATUS_TRANSITIONS)}')
+
+    # Before the UPDATE, while the affected logs still match the transition.
+    # This also takes SQLite's write lock, so the count below cannot change
+    # before the UPDATE runs
+    bump_data_versions(User.id.in_(
+        select(WasteLog.user_id).where(*criteria, _allowed_from(target_status))
+    ))
+    if requested is None:
+        # Count the matching logs with their rows locked (FOR UPDATE on
+        # PostgreSQL), so a concurrent status change cannot move a log
+        # between this count and the UPDATE
+        matching = select(WasteLog.id).where(*criteria).with_for_update().subquery()
+        requested = db.session.execute(select(func.count()).select_from(matching)).scalar()
+
+    result = db.session.execute(
+        update(WasteLog)
+        .where(*criteria, _allowed_from(target_status))
+        .values(collection_status=target_status)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount, requested - result.rowcount
@@ -1,118 +1,129 @@
-# from models import User, WasteLog, Reward, RecyclingCenter
-# from database import db
-
-# def get_user_dashboard_data(user_id):
-#     """
-#     Returns all the dashboard statistics for a specific user.
-#     This includes total waste recycled, CO2 saved, reward points,
-#     total entries, and other personalized stats.
-#     """
-#     user = User.query.get(user_id)
-#     if not user:
-#         return None
-
-#     # Use helper from the model
-#     return user.to_dashboard_dict()
-
-
-# def get_global_dashboard_data():
-#     """
-#     Returns global dashboard statistics across all users.
-#     Useful for displaying community or platform-wide impact.
-#     """
-#     total_waste = db.session.query(db.func.sum(WasteLog.weight)).scalar() or 0
-#     total_co2 = db.session.query(db.func.sum(WasteLog.co2_saved)).scalar() or 0
-#     total_users = User.query.count()
-#     total_entries = WasteLog.query.count()
-#     total_points = db.session.query(db.func.sum(Reward.points)).scalar() or 0
-#     total_centers = RecyclingCenter.query.count()
-
-#     return {
-#         "total_waste_recycled": round(total_waste, 2),
-#         "total_co2_saved": round(total_co2, 2),
-#         "total_users": total_users,
-#         "total_entries": total_entries,
-#         "total_points_awarded": total_points,
-#         "recycling_centers": total_centers
-#     }
-
-
-# def get_top_recyclers(limit=5):
-#     """
-#     Returns a list of top recyclers based on total waste weight.
-#     """
-#     results = (
-#         db.session.query(User, db.func.sum(WasteLog.weight).label('total_weight'))
-#         .join(WasteLog)
-#         .group_by(User.id)
-#         .order_by(db.desc('total_weight'))
-#         .limit(limit)
-#         .all()
-#     )
-
-#     top_users = []
-#     for user, total_weight in results:
-#         top_users.append({
-#             "id": user.id,
-#             "name": user.name,
-#             "email": user.email,
-#             "total_weight": round(total_weight or 0, 2)
-#         })
-#     return top_users
-
-
-# def get_recent_waste_logs(limit=5):
-#     """
-#     Returns the most recent waste logs for the dashboard.
-#     """
-#     logs = (
-#         WasteLog.query
-#         .order_by(WasteLog.date.desc())
-#         .limit(limit)
-#         .all()
-#     )
-
-#     return [{
-#         "id": log.id,
-#         "waste_type": log.waste_type,
-#         "weight": log.weight,
-#         "user_id": log.user_id,
-#         "image_url": log.image_url,
-#         "date": log.date.isoformat() if log.date else None,
-#         "status": log.collection_status
-#     } for log in logs]
-
-
 # services/dashboard_service.py
 
-from models import User  # example if you're fetching real data from DB
-# You can import other models like WasteEntry if you have them
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select
+from database import db
+from models import User, UserStats, RecyclingCenter, WasteDailyRollup
+from services.stats_service import points_expression
+from utils.cache import SnapshotCache
+
+def _load_platform_stats():
+    """
+    Aggregate platform-wide totals in a single query.
+    Waste, CO2, entries and points come from the user_stats rollup (one row
+    per user) rather than scanning every waste log.
+    """
+    totals = db.session.query(
+        select(func.coalesce(func.sum(UserStats.total_weight), 0.0)).scalar_subquery(),
+        select(func.coalesce(func.sum(UserStats.total_co2), 0.0)).scalar_subquery(),
+        select(func.coalesce(func.sum(UserStats.entry_count), 0)).scalar_subquery(),
+        # Sum of every user's points, each truncated like UserStats.points
+        select(func.coalesce(func.sum(points_expression()), 0)).scalar_subquery(),
+        select(func.count(User.id)).scalar_subquery(),
+        select(func.count(RecyclingCenter.id)).where(RecyclingCenter.is_active.is_(True)).scalar_subquery()
+    ).one()
+    total_weight, total_co2, total_entries, total_points, total_users, total_centers = totals
+
+    return {
+        'total_waste_recycled': round(total_weight, 2),
+        'total_co2_saved': round(total_co2, 2),
+        'total_users': total_users,
+        'total_entries': total_entries,
+        'recycling_centers': total_centers,
+        'total_points': total_points,
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+platform_stats_cache = SnapshotCache(_load_platform_stats, name='platform-stats')
 
 def get_dashboard_stats():
     """
-    Returns basic statistics to display on the dashboard.
-    This can later be expanded to pull real data from the database.
+    Returns platform-wide statistics for the public landing page.
+    Served from a cached snapshot: fresh for PLATFORM_STATS_CACHE_TTL seconds,
+    then served stale for up to PLATFORM_STATS_MAX_STALE more seconds while it
+    is recomputed in the background (stale-while-revalidate).
+    """
+    ttl = current_app.config.get('PLATFORM_STATS_CACHE_TTL', 60)
+    if ttl <= 0:
+        return _load_platform_stats()
+    return platform_stats_cache.get(ttl, max_stale=current_app.config.get('PLATFORM_STATS_MAX_STALE', 600))
+
+
+# ========================
+# PER-USER TIME SERIES
+# ========================
+TIMESERIES_GRANULARITIES = ('day', 'week', 'month')
+
+# Window returned when the client does not send a start date
+DEFAULT_TIMESERIES_WINDOW = {
+    'day': timedelta(days=29),
+    'week': timedelta(weeks=11),
+    'month': timedelta(days=334)
+}
+
+def _bucket_start(day, granularity):
+    """First day of the day/week (Monday)/month bucket containing a date"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def _next_bucket(bucket, granularity):
+    if granularity == 'week':
+        return bucket + timedelta(weeks=1)
+    if granularity == 'month':
+        return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+def get_user_timeseries(user_id, granularity='day', start=None, end=None):
+    """
+    Returns a user's waste totals per day, week or month.
+    Read from the daily rollups, so a year of data is at most a few hundred
+    rows per waste type regardless of how many logs were recorded.
+
+    Args:
+        user_id: User to report on
+        granularity: 'day', 'week' or 'month'
+        start: First date to include (defaults to a window ending at `end`)
+        end: Last date to include (defaults to today, UTC)
+
+    Returns:
+        list: One entry per bucket, oldest first, with empty buckets filled in
     """
-    try:
-        # Example: count users from the database
-        total_users = User.query.count()
-
-        # For now, let’s hardcode some extra stats — later you can fetch from DB
-        total_waste_collected = 560
-        recycled_items = 230
-        co2_saved = 45.6
-
-        return {
-            'total_users': total_users,
-            'total_waste_collected': total_waste_collected,
-            'recycled_items': recycled_items,
-            'co2_saved': co2_saved
-        }
-    except Exception as e:
-        print(f"Dashboard service error: {e}")
-        return {
-            'total_users': 0,
-            'total_waste_collected': 0,
-            'recycled_items': 0,
-            'co2_saved': 0
-        }
+    end = end or datetime.utcnow().date()
+    start = start or end - DEFAULT_TIMESERIES_WINDOW[granularity]
+
+    rows = db.session.query(
+        WasteDailyRollup.day,
+        WasteDailyRollup.waste_type,
+        WasteDailyRollup.total_weight,
+        WasteDailyRollup.total_co2,
+        WasteDailyRollup.entry_count
+    ).filter(
+        WasteDailyRollup.user_id == user_id,
+        WasteDailyRollup.day >= start,
+        WasteDailyRollup.day <= end
+    ).all()
+
+    buckets = {}
+    bucket = _bucket_start(start, granularity)
+    while bucket <= end:
+        buckets[bucket] = {'weight': 0.0, 'co2': 0.0, 'entries': 0, 'by_type': {}}
+        bucket = _next_bucket(bucket, granularity)
+
+    for day, waste_type, weight, co2, entries in rows:
+        totals = buckets[_bucket_start(day, granularity)]
+        totals['weight'] += weight
+        totals['co2'] += co2
+        totals['entries'] += entries
+        totals['by_type'][waste_type] = totals['by_type'].get(waste_type, 0.0) + weight
+
+    return [{
+        'period': bucket.isoformat(),
+        'total_waste_recycled': round(totals['weight'], 2),
+        'total_co2_saved': round(totals['co2'], 2),
+        'total_entries': totals['entries'],
+        'by_type': {waste_type: round(weight, 2) for waste_type, weight in totals['by_type'].items()}
+    } for bucket, totals in buckets.items()]
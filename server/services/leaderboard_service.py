@@ -0,0 +1,97 @@
+# services/leaderboard_service.py
+
+from flask import current_app
+from sqlalchemy import func, or_, select
+from database import db
+from models import User, UserStats
+from services.stats_service import on_stats_changed
+from utils.cache import SnapshotCache
+
+def _ranking_query():
+    """
+    Leaderboard rows ranked entirely in the database
+
+    Reads the user_stats rollup (one row per user), keeps users with
+    actual contributions and ranks them with window functions, so the
+    caller only adds LIMIT/OFFSET.
+
+    Points are int(co2 * 10 + weight * 5) + reward_points. Ordering by the
+    un-truncated sum gives the same order, and keeps the expression portable
+    (CAST to integer truncates on SQLite but rounds on PostgreSQL).
+    """
+    score = UserStats.total_co2 * 10 + UserStats.total_weight * 5
+    ordering = (score + UserStats.reward_points).desc(), User.id
+
+    return select(
+        User.id,
+        User.name,
+        User.location,
+        UserStats.total_co2,
+        UserStats.total_weight,
+        UserStats.reward_points,
+        score.label('score'),
+        func.row_number().over(order_by=ordering).label('rank'),
+        func.count().over().label('total_items')
+    ).select_from(UserStats).join(User, User.id == UserStats.user_id) \
+        .where(or_(score >= 1, UserStats.reward_points > 0, UserStats.total_co2 > 0)) \
+        .order_by(*ordering)
+
+def _to_entry(row):
+    return {
+        'rank': row.rank,
+        'id': row.id,
+        'name': row.name,
+        'location': row.location,
+        'points': int(row.score) + row.reward_points,
+        'total_co2_saved': round(row.total_co2, 2),
+        'total_waste_recycled': round(row.total_weight, 2)
+    }
+
+def get_leaderboard_page(page, per_page):
+    """
+    Fetch one page of the leaderboard with a single query
+
+    Returns:
+        tuple: (entries, total_items)
+    """
+    ranking = _ranking_query()
+    rows = db.session.execute(ranking.limit(per_page).offset((page - 1) * per_page)).all()
+
+    if rows:
+        total_items = rows[0].total_items
+    elif page > 1:
+        # Past the last page the window count is not available
+        total_items = db.session.execute(
+            select(func.count()).select_from(ranking.subquery())
+        ).scalar()
+    else:
+        total_items = 0
+
+    return [_to_entry(row) for row in rows], total_items
+
+def _load_snapshot():
+    """Materialize the full ranked leaderboard"""
+    return tuple(_to_entry(row) for row in db.session.execute(_ranking_query()))
+
+# Ranked entries of every contributing user; a page is a slice of it
+leaderboard_cache = SnapshotCache(_load_snapshot, name='leaderboard')
+on_stats_changed(leaderboard_cache.mark_dirty)
+
+def fetch_leaderboard(page, per_page):
+    """
+    Return one leaderboard page, served from the in-memory snapshot
+
+    The snapshot is rebuilt in the background after LEADERBOARD_CACHE_TTL
+    seconds or once waste logs/rewards change; a TTL of 0 queries the
+    database on every call.
+
+    Returns:
+        tuple: (entries, total_items)
+    """
+    ttl = current_app.config.get('LEADERBOARD_CACHE_TTL', 60)
+    if ttl <= 0:
+        return get_leaderboard_page(page, per_page)
+
+    ranked = leaderboard_cache.get(ttl)
+    start = (page - 1) * per_page
+    return list(ranked[start:start + per_page]), len(ranked)
@@ -0,0 +1,240 @@
+# services/route_planner.py
+
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import or_, select
+from database import db
+from models import RecyclingCenter, WasteLog
+from services.center_service import accepted_type_keys
+from services.co2_service import normalize_key, region_of
+from utils.spatial import haversine_matrix
+
+# Approximate centre of each region offered by the waste form, used to place
+# collection areas when no recycling center shares their name
+REGION_COORDINATES = {
+    'nairobi': (-1.2864, 36.8172),
+    'mombasa': (-4.0435, 39.6682),
+    'kisumu': (-0.0917, 34.7680),
+    'nakuru': (-0.3031, 36.0800),
+    'eldoret': (0.5143, 35.2698),
+    'thika': (-1.0333, 37.0693),
+    'meru': (0.0470, 37.6496),
+    'kisii': (-0.6817, 34.7667),
+    'kiambu': (-1.1714, 36.8356),
+    'ruiru': (-1.1466, 36.9609)
+}
+
+class _Geocoder:
+    """
+    Resolve a collection location ("<place>, <region>") to coordinates
+
+    Tries a center at the same location, then a center in the same place,
+    then the region's centre.
+    """
+
+    def __init__(self, centers):
+        by_location = defaultdict(list)
+        by_place = defaultdict(list)
+        for center in centers:
+            location = normalize_key(center.location)
+            by_location[location].append((center.latitude, center.longitude))
+            by_place[location.split(',')[0].strip()].append((center.latitude, center.longitude))
+        self.by_location = {key: np.mean(points, axis=0) for key, points in by_location.items()}
+        self.by_place = {key: np.mean(points, axis=0) for key, points in by_place.items()}
+
+    def locate(self, area):
+        if area in self.by_location:
+            return self.by_location[area]
+        place = area.split(',')[0].strip()
+        if place in self.by_place:
+            return self.by_place[place]
+        return REGION_COORDINATES.get(region_of(area)) or REGION_COORDINATES.get(place)
+
+def _load_pending_logs(criteria):
+    """Pending waste logs as (id, waste_type, weight, collection_location) rows"""
+    pending = or_(WasteLog.collection_status == 'pending', WasteLog.collection_status.is_(None))
+    return db.session.execute(
+        select(WasteLog.id, WasteLog.waste_type, WasteLog.weight, WasteLog.collection_location)
+        .where(pending, *criteria)
+        .order_by(WasteLog.date, WasteLog.id)
+    ).all()
+
+def _pack(logs, room, route_is_empty):
+    """
+    Take the logs that fit in the remaining capacity (first fit, heaviest first)
+
+    A log heavier than a whole vehicle still goes out, alone, on an empty one.
+
+    Returns:
+        tuple: (taken, left_behind)
+    """
+    taken, left = [], []
+    for log in logs:
+        if log[1] <= room or (route_is_empty and not taken):
+            taken.append(log)
+            room -= log[1]
+        else:
+            left.append(log)
+    return taken, left
+
+def _build_routes(depot, stops, capacity):
+    """
+    Split one center's stops into capacity-bounded routes
+
+    Nearest-neighbour heuristic: each route leaves the center, repeatedly
+    drives to the closest stop with logs left, loads what fits and returns
+    once the vehicle is full or nothing else fits. A stop heavier than one
+    vehicle is served by several routes.
+
+    Args:
+        depot: (latitude, longitude) of the center
+        stops: List of dicts with area, coordinates and logs [(id, weight)]
+        capacity: Vehicle capacity in kg
+    """
+    distances = haversine_matrix([depot] + [stop['coordinates'] for stop in stops],
+                                 [depot] + [stop['coordinates'] for stop in stops])
+    remaining = [sorted(stop['logs'], key=lambda log: -log[1]) for stop in stops]
+    open_stops = np.ones(len(stops) + 1, dtype=bool)
+    open_stops[0] = False
+
+    routes = []
+    while open_stops.any():
+        position, load, distance, visits = 0, 0.0, 0.0, []
+        while True:
+            candidates = np.where(open_stops, distances[position], np.inf)
+            nearest = int(np.argmin(candidates))
+            if not np.isfinite(candidates[nearest]):
+                break
+            taken, left = _pack(remaining[nearest - 1], capacity - load, not visits)
+            if not taken:
+                break
+            remaining[nearest - 1] = left
+            if not left:
+                open_stops[nearest] = False
+
+            weight = sum(log[1] for log in taken)
+            distance += distances[position, nearest]
+            visits.append({
+                'area': stops[nearest - 1]['area'],
+                'distance_km': round(float(distances[position, nearest]), 2),
+                'log_count': len(taken),
+                'weight': round(weight, 2),
+                'log_ids': [log[0] for log in taken]
+            })
+            position = nearest
+            load += weight
+            if load >= capacity:
+                break
+
+        distance += distances[position, 0]
+        routes.append({
+            'load': round(load, 2),
+            'distance_km': round(float(distance), 2),
+            'stops': visits
+        })
+    return routes
+
+def plan_collection_routes(capacity, criteria=()):
+    """
+    Plan pickup routes for pending waste logs
+
+    Logs are grouped by collection area and waste type, each group goes to
+    the nearest active center that accepts its type (one vectorized distance
+    matrix for all areas and centers), and every center's stops are then
+    split into routes within the vehicle capacity.
+
+    Args:
+        capacity: Vehicle capacity in kg
+        criteria: Extra WHERE criteria on WasteLog selecting the logs to plan
+
+    Returns:
+        dict: routes per center, totals, and the groups that could not be planned
+    """
+    rows = _load_pending_logs(criteria)
+    centers = RecyclingCenter.query.filter(
+        RecyclingCenter.is_active.is_(True),
+        RecyclingCenter.latitude.isnot(None),
+        RecyclingCenter.longitude.isnot(None)
+    ).order_by(RecyclingCenter.name, RecyclingCenter.id).all()
+
+    # (area, waste type) -> logs, keeping the first spelling of the area for display
+    groups = defaultdict(list)
+    area_names = {}
+    for log_id, waste_type, weight, location in rows:
+        area = normalize_key(location)
+        area_names.setdefault(area, (location or '').strip())
+        groups[(area, normalize_key(waste_type))].append((log_id, weight or 0.0))
+
+    unassigned = []
+
+    def skip(area, waste_type, logs, reason):
+        unassigned.append({
+            'area': area_names[area] or None,
+            'waste_type': waste_type,
+            'log_count': len(logs),
+            'weight': round(sum(log[1] for log in logs), 2),
+            'reason': reason
+        })
+
+    geocoder = _Geocoder(centers)
+    area_index, area_coordinates = {}, []
+    placed = []
+    for (area, waste_type), logs in groups.items():
+        if not centers:
+            skip(area, waste_type, logs, 'No active center with coordinates')
+            continue
+        if area not in area_index:
+            coordinates = geocoder.locate(area) if area else None
+            area_index[area] = len(area_coordinates) if coordinates is not None else None
+            if coordinates is not None:
+                area_coordinates.append(coordinates)
+        if area_index[area] is None:
+            skip(area, waste_type, logs, 'Unknown collection location')
+            continue
+        placed.append((area, waste_type, logs))
+
+    stops_by_center = defaultdict(dict)
+    if placed:
+        types = sorted({waste_type for _, waste_type, _ in placed})
+        accepted = [set(accepted_type_keys(center.accepted_types)) for center in centers]
+        compatible = np.array([[waste_type in kinds for kinds in accepted] for waste_type in types])
+        distances = haversine_matrix(area_coordinates, [(c.latitude, c.longitude) for c in centers])
+
+        group_areas = np.array([area_index[area] for area, _, _ in placed])
+        group_types = np.array([types.index(waste_type) for _, waste_type, _ in placed])
+        cost = np.where(compatible[group_types], distances[group_areas], np.inf)
+        nearest = cost.argmin(axis=1)
+        reachable = np.isfinite(cost[np.arange(len(placed)), nearest])
+
+        for (area, waste_type, logs), center, ok in zip(placed, nearest.tolist(), reachable.tolist()):
+            if not ok:
+                skip(area, waste_type, logs, 'No active center accepts this waste type')
+                continue
+            stop = stops_by_center[center].setdefault(area, {
+                'area': area_names[area],
+                'coordinates': area_coordinates[area_index[area]],
+                'logs': []
+            })
+            stop['logs'].extend(logs)
+
+    plans = []
+    for center_position, stops in sorted(stops_by_center.items()):
+        center = centers[center_position]
+        routes = _build_routes((center.latitude, center.longitude), list(stops.values()), capacity)
+        plans.append({
+            'center_id': center.id,
+            'center_name': center.name,
+            'location': center.location,
+            'routes': routes
+        })
+
+    all_routes = [route for plan in plans for route in plan['routes']]
+    return {
+        'capacity': capacity,
+        'pending_logs': len(rows),
+        'planned_logs': sum(stop['log_count'] for route in all_routes for stop in route['stops']),
+        'route_count': len(all_routes),
+        'total_distance_km': round(sum(route['distance_km'] for route in all_routes), 2),
+        'centers': plans,
+        'unassigned': unassigned
+    }
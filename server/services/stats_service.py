@@ -0,0 +1,371 @@
+# services/stats_service.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import Integer, and_, delete, event, func, insert, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from database import db
+from models import User, UserStats, WasteDailyRollup, WasteLog, Reward
+
+# Callbacks run after a commit that changed user stats (e.g. to invalidate caches)
+_change_listeners = []
+
+def on_stats_changed(callback):
+    """Register a callback to run after any commit that changed user stats"""
+    _change_listeners.append(callback)
+    return callback
+
+def _flag_stats_changed():
+    db.session.info['user_stats_changed'] = True
+
+def rollup_waste_type(waste_type):
+    """Waste type key used by the daily rollups"""
+    return (waste_type or '').strip().lower()
+
+def _previous_value(obj, attribute):
+    """Value of an attribute before the pending change, or its current value"""
+    history = get_history(obj, attribute)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attribute)
+
+class StatsDeltas:
+    """
+    Pending changes to the user_stats and waste_daily_rollups tables
+
+    Collected from waste log and reward writes, then applied in the same
+    transaction with apply().
+    """
+
+    def __init__(self):
+        # user_id -> [total_weight, total_co2, entry_count, reward_points]
+        self.users = defaultdict(lambda: [0.0, 0.0, 0, 0])
+        # (user_id, day, waste_type) -> [total_weight, total_co2, entry_count]
+        self.daily = defaultdict(lambda: [0.0, 0.0, 0])
+        # Users whose waste logs changed in any way (see bump_data_versions)
+        self.touched = set()
+
+    def add_log(self, user_id, weight, co2, date, waste_type, sign=1):
+        """Count a waste log in (sign=1) or out (sign=-1) of the rollups"""
+        if not user_id:
+            return
+        self.touched.add(user_id)
+        buckets = [self.users[user_id]]
+        if date is not None:
+            buckets.append(self.daily[(user_id, date.date(), rollup_waste_type(waste_type))])
+        for delta in buckets:
+            delta[0] += sign * (weight or 0)
+            delta[1] += sign * (co2 or 0)
+            delta[2] += sign
+
+    def add_reward(self, user_id, points, sign=1):
+        if user_id:
+            self.users[user_id][3] += sign * (points or 0)
+
+    def touch(self, user_id):
+        """Record a waste log change that does not affect the totals (e.g. its status)"""
+        if user_id:
+            self.touched.add(user_id)
+
+    def __bool__(self):
+        return bool(self.touched) or any(any(delta) for delta in self.users.values()) or \
+            any(any(delta) for delta in self.daily.values())
+
+    def apply(self, connection):
+        """
+        Write the deltas as 'col = col + delta' updates
+
+        Runs in the caller's transaction, so the rollups commit (or roll back)
+        together with the change that produced them. Rows that do not exist
+        yet are inserted from the raw tables, which already include the change.
+        """
+        now = datetime.utcnow()
+
+        for user_id, (weight, co2, entries, points) in self.users.items():
+            if not any((weight, co2, entries, points)):
+                continue
+            values = {
+                'total_weight': UserStats.total_weight + weight,
+                'total_co2': UserStats.total_co2 + co2,
+                'entry_count': UserStats.entry_count + entries,
+                'reward_points': UserStats.reward_points + points,
+                'updated_at': now
+            }
+            result = connection.execute(update(UserStats).where(UserStats.user_id == user_id).values(values))
+            if result.rowcount == 0:
+                _insert_or_add(connection, UserStats, _USER_STATS_COLUMNS,
+                               _aggregate_select([user_id]), values)
+
+        for (user_id, day, waste_type), (weight, co2, entries) in self.daily.items():
+            if not any((weight, co2, entries)):
+                continue
+            key = and_(
+                WasteDailyRollup.user_id == user_id,
+                WasteDailyRollup.day == day,
+                WasteDailyRollup.waste_type == waste_type
+            )
+            values = {
+                'total_weight': WasteDailyRollup.total_weight + weight,
+                'total_co2': WasteDailyRollup.total_co2 + co2,
+                'entry_count': WasteDailyRollup.entry_count + entries
+            }
+            result = connection.execute(update(WasteDailyRollup).where(key).values(values))
+            if result.rowcount == 0:
+                _insert_or_add(connection, WasteDailyRollup, _DAILY_COLUMNS,
+                               _daily_bucket_select(user_id, day, waste_type), values)
+            elif entries < 0:
+                connection.execute(delete(WasteDailyRollup).where(key, WasteDailyRollup.entry_count <= 0))
+
+        if self.touched:
+            bump_data_versions(User.id.in_(self.touched), connection=connection)
+        _flag_stats_changed()
+
+# INSERT ... ON CONFLICT is spelled per dialect
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def _insert_or_add(connection, model, columns, rows, values):
+    """
+    Insert a missing rollup row computed from the raw tables
+
+    Two transactions can both find the row missing; the second one to
+    insert then conflicts and adds its own deltas (values) to the row the
+    first one created instead of failing with an IntegrityError.
+    """
+    dialect_insert = _DIALECT_INSERTS.get(connection.dialect.name)
+    if dialect_insert is None:
+        connection.execute(insert(model).from_select(columns, rows))
+        return
+    # The WHERE keeps SQLite from reading ON CONFLICT as part of a join's ON clause
+    statement = dialect_insert(model).from_select(columns, rows.where(true()))
+    keys = [column.name for column in model.__table__.primary_key]
+    connection.execute(statement.on_conflict_do_update(index_elements=keys, set_=values))
+
+def _collect_deltas(session):
+    """Turn the objects being flushed into rollup deltas"""
+    deltas = StatsDeltas()
+
+    for obj in session.new:
+        if isinstance(obj, WasteLog):
+            if obj.date is None:
+                # Same as the column default, set now so the day is known before the INSERT
+                obj.date = datetime.utcnow()
+            deltas.add_log(obj.user_id, obj.weight, obj.co2_saved, obj.date, obj.waste_type)
+        elif isinstance(obj, Reward):
+            deltas.add_reward(obj.user_id, obj.points)
+
+    tracked = ('user_id', 'weight', 'co2_saved', 'date', 'waste_type')
+    for obj in session.deleted:
+        if isinstance(obj, WasteLog):
+            deltas.add_log(*(_previous_value(obj, attr) for attr in tracked), sign=-1)
+        elif isinstance(obj, Reward):
+            deltas.add_reward(_previous_value(obj, 'user_id'), _previous_value(obj, 'points'), -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, WasteLog) and session.is_modified(obj):
+            if any(get_history(obj, attr).has_changes() for attr in tracked):
+                deltas.add_log(*(_previous_value(obj, attr) for attr in tracked), sign=-1)
+                deltas.add_log(*(getattr(obj, attr) for attr in tracked))
+            else:
+                deltas.touch(obj.user_id)
+        elif isinstance(obj, Reward) and session.is_modified(obj):
+            if any(get_history(obj, attr).has_changes() for attr in ('user_id', 'points')):
+                deltas.add_reward(_previous_value(obj, 'user_id'), _previous_value(obj, 'points'), -1)
+                deltas.add_reward(obj.user_id, obj.points)
+
+    return deltas
+
+# Deltas are collected before the flush, while expired attributes can still be
+# loaded, and applied after it so a rebuilt row already includes the new rows
+@event.listens_for(Session, 'before_flush')
+def _collect_user_stats(session, flush_context, instances):
+    deltas = _collect_deltas(session)
+    if deltas:
+        session.info.setdefault('user_stats_deltas', []).append(deltas)
+
+@event.listens_for(Session, 'after_flush')
+def _sync_user_stats(session, flush_context):
+    for deltas in session.info.pop('user_stats_deltas', []):
+        deltas.apply(session.connection())
+
+@event.listens_for(Session, 'after_commit')
+def _notify_user_stats_changed(session):
+    # Notify only once committed, so listeners never reload uncommitted totals
+    if session.info.pop('user_stats_changed', False):
+        for callback in _change_listeners:
+            callback()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_stats(session):
+    # A failed flush never reaches after_flush; drop what it collected
+    session.info.pop('user_stats_deltas', None)
+    session.info.pop('user_stats_changed', None)
+
+def bump_data_versions(*criteria, connection=None):
+    """
+    Increment users.data_version for the users matching the criteria
+
+    Args:
+        criteria: WHERE criteria on User (none: every user), e.g.
+            User.id.in_(select(WasteLog.user_id).where(...))
+        connection: Connection to run on (default: the session's)
+    """
+    connection = connection or db.session.connection()
+    connection.execute(
+        update(User)
+        .where(*criteria)
+        # Keep updated_at: it tracks the profile, not the user's logs
+        .values(data_version=User.data_version + 1, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+def _aggregate_select(user_ids=None):
+    """SELECT producing one user_stats row per user from the raw tables"""
+    logs = select(
+        WasteLog.user_id,
+        func.sum(WasteLog.weight).label('total_weight'),
+        func.sum(WasteLog.co2_saved).label('total_co2'),
+        func.count(WasteLog.id).label('entry_count')
+    ).group_by(WasteLog.user_id)
+    rewards = select(
+        Reward.user_id,
+        func.sum(Reward.points).label('reward_points')
+    ).group_by(Reward.user_id)
+    users = select(User.id)
+
+    if user_ids is not None:
+        logs = logs.where(WasteLog.user_id.in_(user_ids))
+        rewards = rewards.where(Reward.user_id.in_(user_ids))
+        users = users.where(User.id.in_(user_ids))
+
+    logs = logs.subquery()
+    rewards = rewards.subquery()
+    users = users.subquery()
+
+    return select(
+        users.c.id.label('user_id'),
+        func.coalesce(logs.c.total_weight, 0.0).label('total_weight'),
+        func.coalesce(logs.c.total_co2, 0.0).label('total_co2'),
+        func.coalesce(logs.c.entry_count, 0).label('entry_count'),
+        func.coalesce(rewards.c.reward_points, 0).label('reward_points'),
+        func.current_timestamp().label('updated_at')
+    ).select_from(users) \
+        .outerjoin(logs, logs.c.user_id == users.c.id) \
+        .outerjoin(rewards, rewards.c.user_id == users.c.id)
+
+_USER_STATS_COLUMNS = ['user_id', 'total_weight', 'total_co2', 'entry_count', 'reward_points', 'updated_at']
+
+def rebuild_user_stats(user_ids=None, connection=None):
+    """
+    Recompute user_stats rows from waste_logs and rewards with set-based SQL
+
+    Args:
+        user_ids: Only rebuild these users (default: everyone)
+        connection: Connection to run on (default: the session's)
+
+    Returns:
+        int: Number of rollup rows written (not yet committed)
+    """
+    connection = connection or db.session.connection()
+    clear = delete(UserStats)
+    if user_ids is not None:
+        clear = clear.where(UserStats.user_id.in_(user_ids))
+    connection.execute(clear)
+
+    result = connection.execute(insert(UserStats).from_select(_USER_STATS_COLUMNS, _aggregate_select(user_ids)))
+    _flag_stats_changed()
+    return result.rowcount
+
+_DAILY_COLUMNS = ['user_id', 'day', 'waste_type', 'total_weight', 'total_co2', 'entry_count']
+
+def _daily_select(*criteria):
+    """SELECT producing waste_daily_rollups rows from waste_logs"""
+    day = func.date(WasteLog.date)
+    waste_type = func.lower(func.trim(func.coalesce(WasteLog.waste_type, '')))
+    return select(
+        WasteLog.user_id,
+        day,
+        waste_type,
+        func.sum(WasteLog.weight),
+        func.coalesce(func.sum(WasteLog.co2_saved), 0.0),
+        func.count(WasteLog.id)
+    ).where(WasteLog.date.isnot(None), *criteria).group_by(WasteLog.user_id, day, waste_type)
+
+def _daily_bucket_select(user_id, day, waste_type):
+    """SELECT producing a single (user, day, waste type) rollup row"""
+    start = datetime.combine(day, datetime.min.time())
+    return _daily_select(
+        WasteLog.user_id == user_id,
+        WasteLog.date >= start,
+        WasteLog.date < start + timedelta(days=1),
+        func.lower(func.trim(WasteLog.waste_type)) == waste_type
+    )
+
+def rebuild_daily_rollups(user_ids=None, connection=None):
+    """
+    Recompute waste_daily_rollups from waste_logs with set-based SQL
+
+    Args:
+        user_ids: Only rebuild these users (default: everyone)
+        connection: Connection to run on (default: the session's)
+
+    Returns:
+        int: Number of rollup rows written (not yet committed)
+    """
+    connection = connection or db.session.connection()
+    clear = delete(WasteDailyRollup)
+    criteria = []
+    if user_ids is not None:
+        clear = clear.where(WasteDailyRollup.user_id.in_(user_ids))
+        criteria.append(WasteLog.user_id.in_(user_ids))
+    connection.execute(clear)
+
+    result = connection.execute(insert(WasteDailyRollup).from_select(_DAILY_COLUMNS, _daily_select(*criteria)))
+    _flag_stats_changed()
+    return result.rowcount
+
+# A user_stats or waste_daily_rollups table created next to existing waste
+# logs (db.create_all in init_db.py) starts out filled in, so readers never
+# see a user whose totals were never written (migration e6f7a8b9c0d1 does the
+# same for databases upgraded with Alembic)
+@event.listens_for(db.metadata, 'after_create')
+def _backfill_created_rollups(target, connection, tables=(), **kwargs):
+    if UserStats.__table__ in tables:
+        connection.execute(insert(UserStats).from_select(_USER_STATS_COLUMNS, _aggregate_select()))
+    if WasteDailyRollup.__table__ in tables:
+        connection.execute(insert(WasteDailyRollup).from_select(_DAILY_COLUMNS, _daily_select()))
+
+def aggregate_user_stats(user_id):
+    """Compute a (transient, unsaved) UserStats for one user straight from the raw tables"""
+    row = db.session.execute(_aggregate_select([user_id])).first()
+    if row is None:
+        return UserStats(user_id=user_id, total_weight=0.0, total_co2=0.0, entry_count=0, reward_points=0)
+    return UserStats(
+        user_id=user_id,
+        total_weight=row[1],
+        total_co2=row[2],
+        entry_count=row[3],
+        reward_points=row[4]
+    )
+
+class _truncate(FunctionElement):
+    """Truncate a non-negative number to an integer, like Python's int()"""
+    type = Integer()
+    inherit_cache = True
+
+@compiles(_truncate)
+def _compile_truncate(element, compiler, **kwargs):
+    # CAST truncates on SQLite
+    return f'CAST({compiler.process(element.clauses, **kwargs)} AS INTEGER)'
+
+@compiles(_truncate, 'postgresql')
+def _compile_truncate_postgresql(element, compiler, **kwargs):
+    # CAST rounds on PostgreSQL
+    return f'CAST(TRUNC({compiler.process(element.clauses, **kwargs)}) AS INTEGER)'
+
+def points_expression():
+    """SQL expression of UserStats.points"""
+    return _truncate(UserStats.total_co2 * 10 + UserStats.total_weight * 5) + UserStats.reward_points
@@ -0,0 +1,115 @@
+# services/token_service.py
+
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from database import db
+from jwt_handler import generate_token
+from models import RefreshToken
+
+def _hash_token(token):
+    # Refresh tokens are 256 random bits, so a plain digest is enough (no bcrypt)
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _new_refresh_token(user_id, family_id):
+    token = secrets.token_urlsafe(32)
+    ttl = current_app.config.get('REFRESH_TOKEN_TTL', 30 * 24 * 3600)
+    db.session.add(RefreshToken(
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=_hash_token(token),
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+    ))
+    return token
+
+def _token_pair(user_id, family_id):
+    return {
+        'access_token': generate_token(user_id),
+        'refresh_token': _new_refresh_token(user_id, family_id),
+        'expires_in': current_app.config.get('ACCESS_TOKEN_TTL', 900)
+    }
+
+def _revoke_family(family_id):
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+def issue_session(user_id):
+    """
+    Start a new session (login or registration)
+
+    Adds the refresh token to the session; the caller commits.
+
+    Returns:
+        dict: access_token, refresh_token and expires_in (seconds)
+    """
+    return _token_pair(user_id, str(uuid.uuid4()))
+
+def rotate_refresh_token(token):
+    """
+    Exchange a refresh token for a new access/refresh token pair
+
+    Each refresh token works once. Presenting one that was already used
+    means it leaked (or a client retried with a stale copy), so the whole
+    session is revoked and the user has to log in again. Commits.
+
+    Returns:
+        dict or None: New tokens as in issue_session, or None if the token
+            is unknown, expired, revoked or reused
+    """
+    if not token:
+        return None
+    stored = RefreshToken.query.filter_by(token_hash=_hash_token(token)).first()
+    if stored is None or stored.revoked_at is not None:
+        return None
+
+    now = datetime.utcnow()
+    if stored.used_at is not None:
+        _revoke_family(stored.family_id)
+        db.session.commit()
+        return None
+    if stored.expires_at <= now:
+        return None
+
+    # Claim the token atomically: of two concurrent exchanges only one wins
+    claimed = db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.used_at.is_(None), RefreshToken.revoked_at.is_(None))
+        .values(used_at=now)
+    ).rowcount
+    if not claimed:
+        _revoke_family(stored.family_id)
+        db.session.commit()
+        return None
+
+    tokens = _token_pair(stored.user_id, stored.family_id)
+    db.session.commit()
+    return tokens
+
+def revoke_session(token):
+    """Revoke every refresh token of the session a token belongs to (logout). Commits."""
+    if not token:
+        return False
+    stored = RefreshToken.query.filter_by(token_hash=_hash_token(token)).first()
+    if stored is None:
+        return False
+    _revoke_family(stored.family_id)
+    db.session.commit()
+    return True
+
+def revoke_user_sessions(user_id):
+    """Revoke all of a user's refresh tokens (e.g. after a password change). The caller commits."""
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+def prune_refresh_tokens():
+    """Delete expired refresh tokens; returns how many were removed. The caller commits."""
+    return RefreshToken.query.filter(RefreshToken.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
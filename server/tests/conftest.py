@@ -6,6 +6,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app
+from ai.response_cache import init_response_cache
 from database import db as _db
 from models import User, WasteLog, RecyclingCenter
 
@@ -16,6 +17,15 @@ def app():
     app.config['TESTING'] = True
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['SECRET_KEY'] = 'test-secret-key'
+    # Query the database directly; cache behaviour is tested explicitly
+    app.config['LEADERBOARD_CACHE_TTL'] = 0
+    app.config['PLATFORM_STATS_CACHE_TTL'] = 0
+    app.config['CENTER_CATALOG_TTL'] = 0
+    # Cheapest bcrypt cost, the hashing itself is not under test
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+    # Keep AI answers in memory only
+    app.config['AI_CACHE_PATH'] = None
+    init_response_cache(app)
     
     with app.app_context():
         _db.create_all()
@@ -67,3 +77,9 @@ def auth_token(client, sample_user):
 def auth_headers(auth_token):
     """Get authorization headers"""
     return {'Authorization': f'Bearer {auth_token}'}
+
+@pytest.fixture
+def admin_headers(app, auth_headers, monkeypatch):
+    """Authorization headers of the sample user, listed as an administrator"""
+    monkeypatch.setitem(app.config, 'ADMIN_EMAILS', frozenset({'test@example.com'}))
+    return auth_headers
@@ -0,0 +1,352 @@
+import json
+import threading
+import time
+import pytest
+from ai import chatbot_assistant
+from ai.fake_upstream import FakeGroqClient
+from ai.knowledge_base import KnowledgeBase, knowledge_base, tokenize
+from ai.response_cache import ResponseCache, normalize_prompt, response_cache
+
+@pytest.fixture
+def no_local_answers(monkeypatch):
+    """Send every question to the model, as if the knowledge base had no confident match"""
+    monkeypatch.setattr(knowledge_base, 'min_confidence', 1.01)
+
+@pytest.fixture
+def fake_upstream(monkeypatch, no_local_answers):
+    upstream = FakeGroqClient(answer='Rinse it and check the number.', first_token_delay=0, token_delay=0)
+    monkeypatch.setattr(chatbot_assistant, 'client', upstream, raising=False)
+    monkeypatch.setattr(chatbot_assistant, 'client_available', True)
+    return upstream.completions
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    response_cache.clear()
+    response_cache.reset_stats()
+    yield
+    response_cache.clear()
+
+class TestResponseCache:
+    """Test the AI guide response cache"""
+
+    def test_normalize_prompt(self):
+        """Test case, whitespace and punctuation don't change the key"""
+        assert normalize_prompt('How do I recycle PLASTIC?') == 'how do i recycle plastic'
+        assert normalize_prompt('  how do i   recycle plastic!! ') == 'how do i recycle plastic'
+        assert normalize_prompt('?!') == ''
+
+    def test_repeat_question_skips_upstream(self, client, fake_upstream):
+        """Test a repeated question is answered from the cache"""
+        first = client.post('/api/ai-guide', json={'message': 'How do I recycle plastic?'})
+        second = client.post('/api/ai-guide', json={'message': 'how do i recycle plastic'})
+
+        assert first.get_json()['response'] == second.get_json()['response']
+        assert fake_upstream.calls == 1
+        stats = response_cache.stats()
+        assert stats['misses'] == 1
+        assert stats['memory_hits'] == 1
+
+    def test_fallback_not_cached(self, monkeypatch):
+        """Test fallback answers are not cached"""
+        monkeypatch.setattr(chatbot_assistant, 'client_available', False)
+
+        chatbot_assistant.get_ai_response('how do I compost?')
+
+        assert response_cache.stats()['stores'] == 0
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test answers survive in the SQLite layer"""
+        path = str(tmp_path / 'ai_cache.db')
+        ResponseCache(path=path).set('how do i recycle plastic', 'Rinse it.')
+
+        other = ResponseCache(path=path)
+        assert other.get('how do i recycle plastic') == 'Rinse it.'
+        assert other.stats()['disk_hits'] == 1
+
+    def test_entries_expire(self, tmp_path, monkeypatch):
+        """Test answers are not reused after the TTL"""
+        cache = ResponseCache(path=str(tmp_path / 'ai_cache.db'), ttl=60)
+        cache.set('key', 'answer')
+
+        later = time.time() + 120
+        monkeypatch.setattr('ai.response_cache.time.time', lambda: later)
+        assert cache.get('key') is None
+
+    def test_memory_layer_is_bounded(self):
+        """Test the in-memory LRU keeps at most max_entries"""
+        cache = ResponseCache(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key.upper())
+
+        assert cache.get('a') is None
+        assert cache.get('c') == 'C'
+        assert cache.stats()['entries'] == 2
+
+    def test_cache_stats_endpoint(self, client, auth_headers):
+        """Test the cache counters endpoint requires a token"""
+        assert client.get('/api/ai-guide/cache-stats').status_code == 401
+
+        response = client.get('/api/ai-guide/cache-stats', headers=auth_headers)
+        assert response.status_code == 200
+        assert set(response.get_json()) >= {'memory_hits', 'disk_hits', 'misses', 'hit_rate'}
+
+def _read_events(body):
+    """Parse an SSE body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+class TestStreaming:
+    """Test Server-Sent Events from /api/ai-guide"""
+
+    def test_stream_relays_tokens(self, client, fake_upstream):
+        """Test the answer arrives as token events followed by done"""
+        response = client.post('/api/ai-guide', json={'message': 'How do I recycle plastic?', 'stream': True})
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = _read_events(response.get_data(as_text=True))
+        tokens = [data['token'] for event, data in events if event == 'message']
+        assert len(tokens) > 1
+        assert ''.join(tokens) == 'Rinse it and check the number.'
+        assert events[-1] == ('done', {'response': 'Rinse it and check the number.'})
+
+    def test_accept_header_selects_stream(self, client, fake_upstream):
+        """Test Accept: text/event-stream also streams"""
+        response = client.post('/api/ai-guide', json={'message': 'hi'}, headers={'Accept': 'text/event-stream'})
+        assert response.mimetype == 'text/event-stream'
+        response.get_data()
+
+        response = client.post('/api/ai-guide', json={'message': 'hi'})
+        assert response.mimetype == 'application/json'
+
+    def test_first_token_before_completion(self, client, monkeypatch):
+        """Test the first token is sent while the model is still generating"""
+        upstream = FakeGroqClient(answer=' '.join(['word'] * 12), first_token_delay=0.02, token_delay=0.05)
+        monkeypatch.setattr(chatbot_assistant, 'client', upstream, raising=False)
+        monkeypatch.setattr(chatbot_assistant, 'client_available', True)
+
+        started = time.perf_counter()
+        response = client.post('/api/ai-guide', json={'message': 'stream me', 'stream': True}, buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+        first_byte = time.perf_counter() - started
+        list(chunks)
+        total = time.perf_counter() - started
+
+        assert first_byte < 0.3
+        assert total - first_byte > 0.4
+
+    def test_fallback_is_streamed(self, client, monkeypatch):
+        """Test the canned answer streams the same way without a model"""
+        monkeypatch.setattr(chatbot_assistant, 'client_available', False)
+
+        response = client.post('/api/ai-guide', json={'message': 'how do I compost?', 'stream': True})
+
+        events = _read_events(response.get_data(as_text=True))
+        assert len(events) > 2
+        assert events[-1][1]['response'] == chatbot_assistant.get_fallback_response('how do I compost?').strip()
+
+    def test_streamed_answer_is_cached(self, client, fake_upstream):
+        """Test a completed stream serves later requests from the cache"""
+        client.post('/api/ai-guide', json={'message': 'How do I recycle plastic?', 'stream': True}).get_data()
+
+        response = client.post('/api/ai-guide', json={'message': 'how do I recycle plastic'})
+
+        assert response.get_json()['response'] == 'Rinse it and check the number.'
+        assert fake_upstream.calls == 1
+
+    def test_upstream_error_falls_back(self, client, fake_upstream, monkeypatch):
+        """Test an upstream failure before any token streams the fallback"""
+        def failing_create(**kwargs):
+            raise RuntimeError('upstream down')
+        monkeypatch.setattr(fake_upstream, 'create', failing_create)
+
+        response = client.post('/api/ai-guide', json={'message': 'paper?', 'stream': True})
+
+        events = _read_events(response.get_data(as_text=True))
+        assert events[-1][0] == 'done'
+        assert 'paper' in events[-1][1]['response'].lower()
+        assert response_cache.stats()['stores'] == 0
+
+class TestCoalescing:
+    """Test concurrent identical prompts share one upstream call"""
+
+    @pytest.fixture
+    def slow_upstream(self, monkeypatch, no_local_answers):
+        upstream = FakeGroqClient(answer='Flatten the boxes and keep them dry.', first_token_delay=0.2, token_delay=0.01)
+        monkeypatch.setattr(chatbot_assistant, 'client', upstream, raising=False)
+        monkeypatch.setattr(chatbot_assistant, 'client_available', True)
+        return upstream.completions
+
+    def _run_concurrently(self, calls):
+        results = [None] * len(calls)
+        barrier = threading.Barrier(len(calls))
+        def run(position, call):
+            barrier.wait()
+            results[position] = call()
+        threads = [threading.Thread(target=run, args=item) for item in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return results
+
+    def test_identical_prompts_share_call(self, slow_upstream):
+        """Test one upstream call answers a burst of the same question"""
+        prompts = ['How do I recycle cardboard?', 'how do i recycle cardboard', 'HOW DO I RECYCLE CARDBOARD!'] * 3
+        results = self._run_concurrently([lambda p=p: chatbot_assistant.get_ai_response(p) for p in prompts])
+
+        assert slow_upstream.calls == 1
+        assert set(results) == {'Flatten the boxes and keep them dry.'}
+        assert chatbot_assistant.in_flight.coalesced >= len(prompts) - 1
+        assert len(chatbot_assistant.in_flight) == 0
+
+    def test_different_prompts_not_coalesced(self, slow_upstream):
+        """Test different questions still get their own calls"""
+        self._run_concurrently([
+            lambda: chatbot_assistant.get_ai_response('recycle cardboard'),
+            lambda: chatbot_assistant.get_ai_response('recycle glass'),
+        ])
+
+        assert slow_upstream.calls == 2
+
+    def test_streams_share_call(self, slow_upstream):
+        """Test streaming and plain requests follow the same upstream stream"""
+        results = self._run_concurrently([
+            lambda: ''.join(chatbot_assistant.stream_ai_response('recycle cardboard?')),
+            lambda: ''.join(chatbot_assistant.stream_ai_response('Recycle cardboard')),
+            lambda: chatbot_assistant.get_ai_response('recycle  cardboard'),
+        ])
+
+        assert slow_upstream.calls == 1
+        assert set(results) == {'Flatten the boxes and keep them dry.'}
+
+    def test_followers_fall_back_when_leader_fails(self, slow_upstream, monkeypatch):
+        """Test waiters get the fallback, not a retry storm, when the call fails"""
+        calls = []
+        def failing_create(**kwargs):
+            calls.append(1)
+            time.sleep(0.2)
+            raise RuntimeError('rate limited')
+        monkeypatch.setattr(slow_upstream, 'create', failing_create)
+
+        results = self._run_concurrently([lambda: chatbot_assistant.get_ai_response('paper?')] * 4)
+
+        assert len(calls) == 1
+        assert set(results) == {chatbot_assistant.get_fallback_response('paper?')}
+
+
+class TestKnowledgeBase:
+    """Test the local BM25 knowledge base"""
+
+    def test_tokenize(self):
+        """Test stopwords are dropped and word forms meet"""
+        assert tokenize('How do I recycle plastic bottles?') == ['recycl', 'plastic', 'bottl']
+        assert tokenize('recycling') == tokenize('recycled') == tokenize('recycle')
+
+    @pytest.mark.parametrize('question, title', [
+        ('How do I recycle plastic?', 'Recycling plastic'),
+        ('can I recycle my old phone charger', 'Electronic waste'),
+        ('where is the nearest recycling center', 'Finding recycling centers'),
+        ('how do I make biogas', 'Biogas from organic waste'),
+        ('what do I do with used cooking oil', 'Used cooking oil'),
+        ('how do I dispose of batteries', 'Batteries'),
+    ])
+    def test_common_questions_answered_locally(self, question, title):
+        """Test common questions find the right guide section confidently"""
+        match = knowledge_base.search(question)
+
+        assert match.document.title == title
+        assert match.confidence >= knowledge_base.min_confidence
+
+    def test_off_topic_escalates(self):
+        """Test questions the guide doesn't cover are left to the model"""
+        assert knowledge_base.answer("what's the weather in nairobi") is None
+        assert knowledge_base.answer('what are the health effects of burning plastic') is None
+
+    @pytest.mark.parametrize('question', ['what time is it', 'water', 'best energy'])
+    def test_single_shared_term_escalates(self, question):
+        """Test short off-topic questions that share one word with a section are not answered from it"""
+        assert knowledge_base.search(question).confidence == 0
+        assert knowledge_base.answer(question) is None
+
+    @pytest.mark.parametrize('question, title', [
+        ('batteries', 'Batteries'),
+        ('paper?', 'Recycling paper and cardboard'),
+        ('e-waste', 'Electronic waste'),
+    ])
+    def test_single_topic_word_answered_locally(self, question, title):
+        """Test a one-word question naming a section's topic is still answered from it"""
+        match = knowledge_base.search(question)
+
+        assert match.document.title == title
+        assert match.confidence >= knowledge_base.min_confidence
+
+    def test_local_answer_skips_upstream(self, client, monkeypatch):
+        """Test a confident local answer never reaches the model"""
+        upstream = FakeGroqClient()
+        monkeypatch.setattr(chatbot_assistant, 'client', upstream, raising=False)
+        monkeypatch.setattr(chatbot_assistant, 'client_available', True)
+
+        response = client.post('/api/ai-guide', json={'message': 'How do I recycle glass jars?'})
+
+        assert response.get_json()['response'].startswith('Recycling glass')
+        assert upstream.completions.calls == 0
+
+    def test_low_confidence_goes_to_model(self, client, monkeypatch):
+        """Test an uncovered question is escalated to the model"""
+        upstream = FakeGroqClient(answer='Burning plastic releases dioxins.', first_token_delay=0, token_delay=0)
+        monkeypatch.setattr(chatbot_assistant, 'client', upstream, raising=False)
+        monkeypatch.setattr(chatbot_assistant, 'client_available', True)
+
+        response = client.post('/api/ai-guide', json={'message': 'what are the health effects of burning plastic'})
+
+        assert response.get_json()['response'] == 'Burning plastic releases dioxins.'
+        assert upstream.completions.calls == 1
+
+    def test_useful_without_api_key(self, monkeypatch):
+        """Test the assistant answers from the guide without a model"""
+        monkeypatch.setattr(chatbot_assistant, 'client_available', False)
+
+        assert chatbot_assistant.get_ai_response('how do I compost kitchen scraps').startswith('Composting')
+        assert chatbot_assistant.get_ai_response('tell me a joke') == chatbot_assistant.GENERIC_ANSWER
+
+    @pytest.mark.parametrize('question, title', [
+        ('is it safe to burn plastic', 'Plastic bags and single-use plastics'),
+        ('how much co2 does recycling paper save', 'Carbon footprint and CO2 savings'),
+    ])
+    def test_fallback_uses_best_match_below_threshold(self, monkeypatch, question, title):
+        """Test without a model, low-confidence questions still get the closest guide section rather than the menu"""
+        monkeypatch.setattr(chatbot_assistant, 'client_available', False)
+        answer = next(document.answer for document in knowledge_base.documents if document.title == title)
+
+        assert knowledge_base.answer(question) is None
+        assert chatbot_assistant.get_ai_response(question) == answer
+
+    @pytest.mark.parametrize('question', ['make a joke about plastic', 'how do I start composting at home'])
+    def test_fallback_floor(self, monkeypatch, question):
+        """Test without a model, matches below half the local threshold get the menu instead of a section"""
+        monkeypatch.setattr(chatbot_assistant, 'client_available', False)
+
+        assert knowledge_base.search(question).confidence < knowledge_base.min_confidence / 2
+        assert chatbot_assistant.get_ai_response(question) == chatbot_assistant.GENERIC_ANSWER
+
+    def test_search_is_fast(self):
+        """Test a lookup takes well under a millisecond"""
+        started = time.perf_counter()
+        for _ in range(1000):
+            knowledge_base.search('can I recycle my old phone charger')
+
+        assert (time.perf_counter() - started) / 1000 < 0.001
+
+    def test_builds_from_documents(self, tmp_path):
+        """Test the index is built from '## ' sections with keywords"""
+        guide = tmp_path / 'guide.md'
+        guide.write_text('# Guide\n\n## Tyres\nKeywords: tire tyre rubber\n\nTake tyres to a retreader.\n', encoding='utf-8')
+
+        kb = KnowledgeBase.from_file(str(guide))
+
+        assert kb.answer('tires') == 'Take tyres to a retreader.'
@@ -1,5 +1,12 @@
+import datetime
+import threading
+import time
+import jwt
 import pytest
-from models import User
+import jwt_handler
+from database import db
+from models import RefreshToken, User
+from utils import passwords
 
 class TestAuthRoutes:
     """Test authentication endpoints"""
@@ -102,3 +109,215 @@ class TestAuthRoutes:
         response = client.get('/api/auth/me')
         
         assert response.status_code == 401
+
+class TestTokenCache:
+    """Test the verified-token cache behind request authentication"""
+    
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        jwt_handler._verified_tokens.clear()
+        yield
+        jwt_handler._verified_tokens.clear()
+    
+    @pytest.fixture
+    def count_verifications(self, monkeypatch):
+        calls = []
+        real_decode = jwt_handler.jwt.decode
+        def counting_decode(*args, **kwargs):
+            calls.append(1)
+            return real_decode(*args, **kwargs)
+        monkeypatch.setattr(jwt_handler.jwt, 'decode', counting_decode)
+        return calls
+    
+    def _token(self, app, user_id='test-user-123', expires_in=3600):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        payload = {'sub': user_id, 'iat': now, 'exp': now + datetime.timedelta(seconds=expires_in)}
+        return jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
+    
+    def test_repeat_requests_verify_once(self, client, sample_user, auth_headers, count_verifications):
+        """Test the signature is checked once for repeated requests with a token"""
+        for _ in range(3):
+            assert client.get('/api/auth/me', headers=auth_headers).status_code == 200
+        
+        assert len(count_verifications) == 1
+    
+    def test_expired_entry_is_evicted(self, app, monkeypatch):
+        """Test a cached token stops working once it expires"""
+        with app.app_context():
+            token = self._token(app, expires_in=60)
+            assert jwt_handler.decode_token(token) == 'test-user-123'
+            
+            later = time.time() + 120
+            monkeypatch.setattr(jwt_handler.time, 'time', lambda: later)
+            assert jwt_handler.decode_token(token) is None
+            assert len(jwt_handler._verified_tokens) == 0
+    
+    def test_tampered_token_rejected(self, client, sample_user, auth_headers):
+        """Test a modified token is not accepted from the cache"""
+        assert client.get('/api/auth/me', headers=auth_headers).status_code == 200
+        token = auth_headers['Authorization'].replace('Bearer ', '')
+        tampered = token[:-2] + ('AA' if not token.endswith('AA') else 'BB')
+        
+        response = client.get('/api/auth/me', headers={'Authorization': f'Bearer {tampered}'})
+        assert response.status_code == 401
+    
+    def test_secret_change_invalidates(self, app, monkeypatch):
+        """Test cached tokens are not trusted after the secret changes"""
+        with app.app_context():
+            token = self._token(app)
+            assert jwt_handler.decode_token(token) == 'test-user-123'
+            
+            monkeypatch.setitem(app.config, 'SECRET_KEY', 'rotated-secret')
+            assert jwt_handler.decode_token(token) is None
+    
+    def test_cache_is_bounded(self, app, monkeypatch):
+        """Test the least recently used tokens are dropped past TOKEN_CACHE_SIZE"""
+        monkeypatch.setitem(app.config, 'TOKEN_CACHE_SIZE', 2)
+        with app.app_context():
+            tokens = [self._token(app, user_id=f'user-{i}') for i in range(3)]
+            for token in tokens:
+                jwt_handler.decode_token(token)
+            
+            assert len(jwt_handler._verified_tokens) == 2
+            assert jwt_handler._token_digest(tokens[0]) not in jwt_handler._verified_tokens
+
+class TestPasswordHashing:
+    """Test bcrypt hashing on the password pool"""
+    
+    def test_hash_uses_configured_cost(self, app, sample_user):
+        """Test new hashes use BCRYPT_LOG_ROUNDS"""
+        assert passwords.hash_rounds(sample_user.password_hash) == app.config['BCRYPT_LOG_ROUNDS']
+        assert not sample_user.password_needs_rehash()
+    
+    def test_hashing_runs_off_request_thread(self, app, monkeypatch):
+        """Test bcrypt runs on the pool, not the calling thread"""
+        threads = []
+        real_hash = passwords._bcrypt.generate_password_hash
+        def recording_hash(*args):
+            threads.append(threading.current_thread().name)
+            return real_hash(*args)
+        monkeypatch.setattr(passwords._bcrypt, 'generate_password_hash', recording_hash)
+        
+        with app.app_context():
+            passwords.hash_password('secret')
+        
+        assert threads[0].startswith('password-hash')
+    
+    def test_login_rehashes_on_cost_change(self, client, app, sample_user, monkeypatch):
+        """Test logging in moves an old hash to the configured cost"""
+        monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 5)
+        
+        response = client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        
+        assert response.status_code == 200
+        user = User.query.get('test-user-123')
+        assert passwords.hash_rounds(user.password_hash) == 5
+        assert user.check_password('password123')
+    
+    def test_old_cost_still_verifies(self, app, sample_user, monkeypatch):
+        """Test hashes made with another cost keep working"""
+        monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 6)
+        
+        assert sample_user.password_needs_rehash()
+        assert sample_user.check_password('password123')
+        assert not sample_user.check_password('wrong')
+    
+    def test_login_sheds_load_when_busy(self, client, sample_user, monkeypatch):
+        """Test logins get a 503 when the hash queue is full"""
+        def busy(*args):
+            raise passwords.PasswordHasherBusy()
+        monkeypatch.setattr(passwords, '_run', busy)
+        
+        response = client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+
+class TestRefreshTokens:
+    """Test rotating refresh tokens"""
+    
+    def _login(self, client):
+        response = client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        assert response.status_code == 200
+        return response.get_json()
+    
+    def test_login_returns_token_pair(self, app, client, sample_user):
+        """Test login issues a short-lived access token and a hashed refresh token"""
+        data = self._login(client)
+        
+        assert data['expires_in'] == app.config['ACCESS_TOKEN_TTL']
+        claims = jwt.decode(data['access_token'], app.config['SECRET_KEY'], algorithms=['HS256'])
+        assert claims['exp'] - claims['iat'] == app.config['ACCESS_TOKEN_TTL']
+        stored = RefreshToken.query.filter_by(user_id='test-user-123').one()
+        assert stored.token_hash != data['refresh_token']
+        assert len(stored.token_hash) == 64
+    
+    def test_refresh_rotates_without_bcrypt(self, client, sample_user, monkeypatch):
+        """Test a refresh returns new tokens without hashing a password"""
+        data = self._login(client)
+        def no_bcrypt(*args):
+            raise AssertionError('bcrypt called during refresh')
+        monkeypatch.setattr(passwords, '_run', no_bcrypt)
+        
+        response = client.post('/api/auth/refresh', json={'refresh_token': data['refresh_token']})
+        
+        assert response.status_code == 200
+        renewed = response.get_json()
+        assert renewed['refresh_token'] != data['refresh_token']
+        me = client.get('/api/auth/me', headers={'Authorization': f"Bearer {renewed['access_token']}"})
+        assert me.status_code == 200
+    
+    def test_refresh_accepts_bearer_token(self, client, sample_user):
+        """Test the refresh token can be sent as the bearer token"""
+        data = self._login(client)
+        
+        response = client.post('/api/auth/refresh', json={},
+                               headers={'Authorization': f"Bearer {data['refresh_token']}"})
+        
+        assert response.status_code == 200
+    
+    def test_reuse_revokes_session(self, client, sample_user):
+        """Test replaying a used refresh token ends the whole session"""
+        data = self._login(client)
+        renewed = client.post('/api/auth/refresh', json={'refresh_token': data['refresh_token']}).get_json()
+        
+        replay = client.post('/api/auth/refresh', json={'refresh_token': data['refresh_token']})
+        assert replay.status_code == 401
+        
+        # The legitimate holder of the newer token is logged out too
+        response = client.post('/api/auth/refresh', json={'refresh_token': renewed['refresh_token']})
+        assert response.status_code == 401
+    
+    def test_expired_refresh_token(self, client, sample_user):
+        """Test an expired refresh token is rejected"""
+        data = self._login(client)
+        stored = RefreshToken.query.filter_by(user_id='test-user-123').one()
+        stored.expires_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        db.session.commit()
+        
+        response = client.post('/api/auth/refresh', json={'refresh_token': data['refresh_token']})
+        assert response.status_code == 401
+    
+    def test_logout_revokes_refresh_token(self, client, sample_user):
+        """Test a refresh token stops working after logout"""
+        data = self._login(client)
+        
+        response = client.post('/api/auth/logout', json={'refresh_token': data['refresh_token']})
+        assert response.status_code == 200
+        
+        response = client.post('/api/auth/refresh', json={'refresh_token': data['refresh_token']})
+        assert response.status_code == 401
+    
+    def test_refresh_requires_token(self, client):
+        """Test refresh without a token"""
+        assert client.post('/api/auth/refresh', json={}).status_code == 401
+        assert client.post('/api/auth/refresh', json={'refresh_token': 'unknown'}).status_code == 401
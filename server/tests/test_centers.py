@@ -0,0 +1,196 @@
+import random
+import pytest
+from models import RecyclingCenter, CenterAcceptedType
+from services.center_service import center_catalog_cache, get_center_catalog
+from utils.spatial import KDTree, haversine_matrix, km_to_chord, to_unit_vectors
+
+@pytest.fixture
+def centers(db):
+    """Active centers in Nairobi and Mombasa, plus an inactive one"""
+    db.session.add_all([
+        RecyclingCenter(id='westlands', name='Westlands', location='Westlands, Nairobi',
+                        latitude=-1.2676, longitude=36.8108, accepted_types='plastic,paper'),
+        RecyclingCenter(id='cbd', name='CBD', location='CBD, Nairobi',
+                        latitude=-1.2864, longitude=36.8172),
+        RecyclingCenter(id='nyali', name='Nyali', location='Nyali, Mombasa',
+                        latitude=-4.0240, longitude=39.7190),
+        RecyclingCenter(id='closed', name='Closed', location='Nairobi',
+                        latitude=-1.2865, longitude=36.8173, is_active=False),
+        RecyclingCenter(id='unmapped', name='Unmapped', location='Thika')
+    ])
+    db.session.commit()
+
+class TestKDTree:
+    """Test the k-d tree against brute force"""
+    
+    def test_matches_brute_force(self):
+        """Test k-nearest and radius queries return the exact neighbours"""
+        rng = random.Random(7)
+        coordinates = [(rng.uniform(-5, 5), rng.uniform(33, 42)) for _ in range(500)]
+        tree = KDTree(to_unit_vectors(coordinates))
+        
+        for _ in range(20):
+            query = (rng.uniform(-5, 5), rng.uniform(33, 42))
+            distances = haversine_matrix([query], coordinates)[0]
+            expected = sorted(range(len(coordinates)), key=lambda i: distances[i])
+            
+            nearest = tree.query(to_unit_vectors([query])[0], k=5)
+            assert [index for _, index in nearest] == expected[:5]
+            
+            within = tree.query(to_unit_vectors([query])[0], max_distance=km_to_chord(100))
+            assert sorted(index for _, index in within) == sorted(i for i in expected if distances[i] <= 100)
+    
+    def test_empty_tree(self):
+        """Test querying an empty tree"""
+        assert KDTree(to_unit_vectors([])).query((1.0, 0.0, 0.0), k=3) == []
+
+class TestCenterRoutes:
+    """Test recycling center endpoints"""
+    
+    def test_nearby_centers(self, client, centers):
+        """Test the nearest active centers come back closest first"""
+        response = client.get('/api/recycling-centers/nearby?lat=-1.2864&lng=36.8172&k=2')
+        
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert [center['id'] for center in data] == ['cbd', 'westlands']
+        assert data[0]['distance_km'] == 0
+        assert 2 < data[1]['distance_km'] < 3
+        assert data[1]['accepted_types'] == ['plastic', 'paper']
+    
+    def test_nearby_centers_radius(self, client, centers):
+        """Test the radius limits the results"""
+        response = client.get('/api/recycling-centers/nearby?lat=-1.2864&lng=36.8172&radius=50&k=10')
+        
+        assert [center['id'] for center in response.get_json()['data']] == ['cbd', 'westlands']
+    
+    def test_nearby_centers_invalid(self, client):
+        """Test invalid nearby queries are rejected"""
+        assert client.get('/api/recycling-centers/nearby?lng=36.8').status_code == 400
+        assert client.get('/api/recycling-centers/nearby?lat=95&lng=36.8').status_code == 400
+        assert client.get('/api/recycling-centers/nearby?lat=1&lng=36.8&radius=-1').status_code == 400
+        assert client.get('/api/recycling-centers/nearby?lat=1&lng=36.8&k=0').status_code == 400
+    
+    def test_nearby_index_rebuilt_on_write(self, app, client, centers):
+        """Test the cached index picks up center writes immediately"""
+        app.config['CENTER_CATALOG_TTL'] = 300
+        try:
+            center_catalog_cache.refresh()
+            url = '/api/recycling-centers/nearby?lat=-4.05&lng=39.67&k=1'
+            assert client.get(url).get_json()['data'][0]['id'] == 'nyali'
+            
+            client.post('/api/recycling-centers/', json={
+                'name': 'Mombasa Town', 'location': 'Mombasa', 'latitude': -4.05, 'longitude': 39.67
+            })
+            assert client.get(url).get_json()['data'][0]['name'] == 'Mombasa Town'
+            
+            client.put('/api/recycling-centers/nyali', json={'is_active': False})
+            url = '/api/recycling-centers/nearby?lat=-4.0240&lng=39.7190&k=5&radius=10'
+            assert [center['name'] for center in client.get(url).get_json()['data']] == ['Mombasa Town']
+        finally:
+            app.config['CENTER_CATALOG_TTL'] = 0
+    
+    def test_accepted_types_are_normalized(self, client, db):
+        """Test accepted types are mirrored into the association table on create/update/delete"""
+        response = client.post('/api/recycling-centers/', json={
+            'name': 'Mixed', 'location': 'Nairobi', 'accepted_types': ['Plastic', ' E-Waste ', 'plastic']
+        })
+        center_id = response.get_json()['data']['id']
+        
+        def stored_types():
+            return sorted(row.waste_type for row in CenterAcceptedType.query.filter_by(center_id=center_id))
+        
+        assert stored_types() == ['e-waste', 'plastic']
+        
+        client.put(f'/api/recycling-centers/{center_id}', json={'accepted_types': ['glass', 'plastic']})
+        assert stored_types() == ['glass', 'plastic']
+        
+        client.delete(f'/api/recycling-centers/{center_id}')
+        assert stored_types() == []
+    
+    def test_filter_centers_by_waste_type(self, client, centers, db):
+        """Test the waste_type filter matches whole, case-insensitive types"""
+        db.session.add(RecyclingCenter(id='metals', name='Metals', location='Nairobi', accepted_types='metal,paperboard'))
+        db.session.commit()
+        
+        response = client.get('/api/recycling-centers/?waste_type=Paper')
+        
+        assert response.status_code == 200
+        # A LIKE '%paper%' scan would also have matched "paperboard"
+        assert [center['id'] for center in response.get_json()['data']] == ['westlands']
+        
+        response = client.get('/api/recycling-centers/?waste_type=paper&cursor=&include_total=true')
+        assert response.get_json()['pagination']['total_items'] == 1
+    
+    def test_waste_type_filter_reads_association_rows(self, client, centers, db):
+        """Test the waste_type filter is answered from center_accepted_types"""
+        # Written straight to the table, bypassing the accepted_types string
+        db.session.add(CenterAcceptedType(center_id='westlands', waste_type='textile'))
+        db.session.commit()
+        
+        response = client.get('/api/recycling-centers/?waste_type=textile')
+        
+        assert [center['id'] for center in response.get_json()['data']] == ['westlands']
+    
+    def test_center_without_accepted_types_matches_no_waste_type(self, client, centers, db):
+        """Test a center that lists no accepted types is left out of every waste_type filter"""
+        db.session.add(RecyclingCenter(id='blank', name='Blank', location='Nairobi', accepted_types=' , '))
+        db.session.commit()
+        
+        for waste_type in ('plastic', 'paper', 'glass'):
+            response = client.get(f'/api/recycling-centers/?waste_type={waste_type}')
+            assert 'blank' not in [center['id'] for center in response.get_json()['data']]
+        assert 'blank' in [center['id'] for center in client.get('/api/recycling-centers/').get_json()['data']]
+    
+    def test_get_centers_pages(self, client, centers):
+        """Test page-number and cursor pagination over the catalog"""
+        response = client.get('/api/recycling-centers/?per_page=2')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [center['id'] for center in data['data']] == ['cbd', 'nyali']
+        assert data['pagination']['total_items'] == 4
+        assert data['pagination']['total_pages'] == 2
+        assert data['data'][0]['facility_type'] == 'recycling'
+        assert data['data'][0]['operating_hours'] == 'Mon-Fri: 8AM-5PM'
+        
+        first = client.get('/api/recycling-centers/?per_page=3&cursor=').get_json()
+        assert [center['id'] for center in first['data']] == ['cbd', 'nyali', 'unmapped']
+        second = client.get(f"/api/recycling-centers/?per_page=3&cursor={first['pagination']['next_cursor']}").get_json()
+        assert [center['id'] for center in second['data']] == ['westlands']
+        assert second['pagination']['has_next'] is False
+        
+        assert client.get('/api/recycling-centers/?cursor=not-a-cursor').status_code == 400
+        inactive = client.get('/api/recycling-centers/?active_only=false').get_json()
+        assert inactive['pagination']['total_items'] == 5
+    
+    def test_catalog_version(self, app, client, centers, db):
+        """Test the catalog version moves only when centers change"""
+        app.config['CENTER_CATALOG_TTL'] = 300
+        try:
+            catalog = get_center_catalog()
+            assert get_center_catalog() is catalog
+            
+            # A rebuild with the same content keeps the version
+            assert center_catalog_cache.refresh().version == catalog.version
+            
+            client.put('/api/recycling-centers/cbd', json={'accepted_types': ['glass']})
+            updated = get_center_catalog()
+            assert updated.version == catalog.version + 1
+            assert updated.select(waste_type='Glass') == [0]
+        finally:
+            app.config['CENTER_CATALOG_TTL'] = 0
+    
+    def test_get_centers_conditional(self, client, centers):
+        """Test the center list is publicly cacheable and answers 304 while unchanged"""
+        response = client.get('/api/recycling-centers/?per_page=2')
+        assert 'public' in response.headers['Cache-Control']
+        assert 'max-age=60' in response.headers['Cache-Control']
+        
+        headers = {'If-None-Match': response.headers['ETag']}
+        assert client.get('/api/recycling-centers/?per_page=2', headers=headers).status_code == 304
+        # Another page is another representation
+        assert client.get('/api/recycling-centers/?per_page=3', headers=headers).status_code == 200
+        
+        client.put('/api/recycling-centers/cbd', json={'name': 'City Centre'})
+        assert client.get('/api/recycling-centers/?per_page=2', headers=headers).status_code == 200
@@ -0,0 +1,131 @@
+import pytest
+from models import WasteLog
+
+class TestCO2Factors:
+    """Test the server-side CO2 factor engine"""
+    
+    def test_default_factors(self, client, db):
+        """Test the built-in factors are active before anything is published"""
+        response = client.get('/api/co2-factors/')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['version'] == 0
+        assert {'waste_type': 'plastic', 'region': None, 'factor': 2.5} in data['data']
+    
+    def test_create_computes_co2_for_unknown_type(self, client, sample_user, auth_headers, db):
+        """Test unknown waste types fall back to the 'other' factor"""
+        response = client.post('/api/waste-logs/', headers=auth_headers, json={
+            'waste_type': 'Rubber',
+            'weight': 4
+        })
+        
+        assert response.get_json()['data']['co2_saved'] == 4.0
+    
+    def test_publish_and_recompute(self, client, sample_user, auth_headers, admin_headers, db):
+        """Test publishing a factor set recomputes historical logs, with regional overrides"""
+        db.session.add_all([
+            WasteLog(id='co2-1', user_id=sample_user.id, waste_type='Plastic', weight=2.0,
+                     co2_saved=None, collection_location='Westlands, Nairobi'),
+            WasteLog(id='co2-2', user_id=sample_user.id, waste_type='plastic', weight=2.0,
+                     co2_saved=99.0, collection_location='Nyali, Mombasa'),
+            WasteLog(id='co2-3', user_id=sample_user.id, waste_type='glass', weight=1.0)
+        ])
+        db.session.commit()
+        
+        response = client.post('/api/co2-factors/', headers=admin_headers, json={
+            'factors': [
+                {'waste_type': 'plastic', 'factor': 3.0},
+                {'waste_type': 'plastic', 'region': 'Nairobi', 'factor': 1.5},
+                {'waste_type': 'other', 'factor': 0.5}
+            ]
+        })
+        
+        assert response.status_code == 201
+        data = response.get_json()
+        assert data['version'] == 1
+        assert data['recomputed_logs'] == 3
+        
+        db.session.expire_all()
+        assert db.session.get(WasteLog, 'co2-1').co2_saved == 3.0
+        assert db.session.get(WasteLog, 'co2-2').co2_saved == 6.0
+        assert db.session.get(WasteLog, 'co2-3').co2_saved == 0.5
+        
+        # New logs use the published version on insert too
+        created = client.post('/api/waste-logs/', headers=auth_headers, json={
+            'waste_type': 'plastic',
+            'weight': 2,
+            'collection_location': 'Kilimani, Nairobi'
+        }).get_json()
+        assert created['data']['co2_saved'] == 3.0
+    
+    def test_recompute_matches_insert_for_unusual_locations(self, client, sample_user, auth_headers, admin_headers, db):
+        """Test a recompute resolves regions exactly like insert: no space after the comma, mixed case, LIKE wildcards"""
+        client.post('/api/co2-factors/', headers=admin_headers, json={
+            'factors': [
+                {'waste_type': 'plastic', 'factor': 2.5},
+                {'waste_type': 'plastic', 'region': 'Nairobi', 'factor': 5.0},
+                {'waste_type': 'plastic', 'region': 'a_b', 'factor': 7.0}
+            ]
+        })
+        locations = ['Westlands,Nairobi', 'KILIMANI ,  nairobi ', 'Town, axb', 'Town, Nairobi, Kenya']
+        inserted = {}
+        for location in locations:
+            created = client.post('/api/waste-logs/', headers=auth_headers, json={
+                'waste_type': 'plastic',
+                'weight': 2,
+                'collection_location': location
+            }).get_json()['data']
+            inserted[created['id']] = created['co2_saved']
+        assert list(inserted.values()) == [10.0, 10.0, 5.0, 5.0]
+        
+        client.post('/api/co2-factors/recompute', headers=admin_headers)
+        
+        db.session.expire_all()
+        for log_id, co2_saved in inserted.items():
+            assert db.session.get(WasteLog, log_id).co2_saved == co2_saved
+    
+    def test_region_follows_location_edits(self, client, sample_user, admin_headers, db):
+        """Test waste_logs.region tracks collection_location, so a recompute uses the current location"""
+        log = WasteLog(id='co2-moved', user_id=sample_user.id, waste_type='plastic', weight=1.0,
+                       collection_location='Nyali, Mombasa')
+        db.session.add(log)
+        db.session.commit()
+        assert log.region == 'mombasa'
+        
+        log.collection_location = 'Westlands,NAIROBI'
+        db.session.commit()
+        assert log.region == 'nairobi'
+        
+        client.post('/api/co2-factors/', headers=admin_headers, json={
+            'factors': [
+                {'waste_type': 'plastic', 'factor': 2.5},
+                {'waste_type': 'plastic', 'region': 'Nairobi', 'factor': 5.0}
+            ]
+        })
+        db.session.expire_all()
+        assert db.session.get(WasteLog, 'co2-moved').co2_saved == 5.0
+    
+    def test_publish_invalid_factor(self, client, admin_headers):
+        """Test publishing rejects invalid factors"""
+        response = client.post('/api/co2-factors/', headers=admin_headers, json={
+            'factors': [{'waste_type': 'plastic', 'factor': 'lots'}]
+        })
+        
+        assert response.status_code == 400
+    
+    def test_publish_requires_auth(self, client):
+        """Test publishing factors requires authentication"""
+        response = client.post('/api/co2-factors/', json={'factors': []})
+        
+        assert response.status_code == 401
+    
+    def test_publish_and_recompute_require_admin(self, client, auth_headers):
+        """Test users that are not administrators cannot change factors or recompute"""
+        response = client.post('/api/co2-factors/', headers=auth_headers, json={
+            'factors': [{'waste_type': 'plastic', 'factor': 9.0}]
+        })
+        assert response.status_code == 403
+        
+        assert client.post('/api/co2-factors/recompute', headers=auth_headers).status_code == 403
+        assert client.get('/api/co2-factors/').get_json()['version'] == 0
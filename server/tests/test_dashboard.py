@@ -0,0 +1,247 @@
+import time
+import pytest
+from datetime import date, datetime
+from sqlalchemy import event
+from models import User, WasteLog, Reward, UserStats, WasteDailyRollup, RecyclingCenter
+from services.dashboard_service import platform_stats_cache
+from services.stats_service import rebuild_user_stats
+
+class TestUserStatsRollup:
+    """Test the user_stats rollup behind the dashboard"""
+    
+    def _dashboard(self, client, auth_headers):
+        response = client.get('/api/dashboard/', headers=auth_headers)
+        assert response.status_code == 200
+        return response.get_json()['data']
+    
+    def test_rollup_follows_writes(self, client, sample_user, auth_headers, db):
+        """Test creating, batch creating, editing and deleting logs keep the totals in sync"""
+        created = client.post('/api/waste-logs/', headers=auth_headers, json={
+            'waste_type': 'plastic', 'weight': 2
+        }).get_json()['data']
+        client.post('/api/waste-logs/batch', headers=auth_headers, json=[
+            {'waste_type': 'paper', 'weight': 1},
+            {'waste_type': 'glass', 'weight': 5}
+        ])
+        
+        stats = self._dashboard(client, auth_headers)
+        assert stats == {
+            'total_waste_recycled': 8.0,
+            'total_co2_saved': 10.8,  # 2 x 2.5 + 1 x 1.8 + 5 x 0.8
+            'points': 148,
+            'total_entries': 3
+        }
+        
+        log = db.session.get(WasteLog, created['id'])
+        log.weight = 4.0
+        db.session.commit()
+        assert self._dashboard(client, auth_headers)['total_waste_recycled'] == 10.0
+        
+        client.delete(f"/api/waste-logs/{created['id']}")
+        stats = self._dashboard(client, auth_headers)
+        assert stats['total_entries'] == 2
+        assert stats['total_waste_recycled'] == 6.0
+    
+    def test_rewards_add_points(self, client, sample_user, auth_headers, db):
+        """Test inserting a reward updates the rollup points"""
+        db.session.add(Reward(user_id=sample_user.id, badge_name='Starter', points=25))
+        db.session.commit()
+        
+        assert self._dashboard(client, auth_headers)['points'] == 25
+        assert db.session.get(UserStats, sample_user.id).reward_points == 25
+    
+    def test_missing_rollup_falls_back_and_rebuilds(self, client, sample_user, auth_headers, db):
+        """Test users without a rollup row are aggregated on the fly and backfilled by a rebuild"""
+        db.session.add(WasteLog(user_id=sample_user.id, waste_type='metal', weight=1.0, co2_saved=3.0))
+        db.session.commit()
+        db.session.query(UserStats).delete()
+        db.session.commit()
+        
+        assert self._dashboard(client, auth_headers)['total_co2_saved'] == 3.0
+        assert db.session.get(UserStats, sample_user.id) is None
+        
+        assert rebuild_user_stats() == 1
+        db.session.commit()
+        assert db.session.get(UserStats, sample_user.id).entry_count == 1
+    
+    def test_concurrent_first_insert_adds_deltas(self, client, sample_user, db):
+        """Test a rollup row created concurrently gets this transaction's deltas instead of an IntegrityError"""
+        created = []
+        
+        def create_row_first(conn, cursor, statement, parameters, context, executemany):
+            # Another transaction creates the row after this one's UPDATE found none
+            if statement.startswith('INSERT INTO user_stats') and not created:
+                created.append(cursor.connection.execute(
+                    'INSERT INTO user_stats (user_id, total_weight, total_co2, entry_count, reward_points) '
+                    'VALUES (?, 2.0, 0.0, 1, 0)', (sample_user.id,)
+                ))
+        
+        event.listen(db.engine, 'before_cursor_execute', create_row_first)
+        try:
+            db.session.add(WasteLog(user_id=sample_user.id, waste_type='metal', weight=1.0, co2_saved=3.0))
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', create_row_first)
+        
+        assert created
+        stats = db.session.get(UserStats, sample_user.id)
+        db.session.refresh(stats)
+        assert (stats.total_weight, stats.total_co2, stats.entry_count) == (3.0, 3.0, 2)
+
+class TestTimeseries:
+    """Test the per-user trend time series"""
+    
+    def test_daily_rollups_follow_writes(self, client, sample_user, auth_headers, db):
+        """Test logs land in daily buckets per waste type and leave them on delete"""
+        db.session.add_all([
+            WasteLog(id='ts-1', user_id=sample_user.id, waste_type='Plastic', weight=2.0,
+                     co2_saved=5.0, date=datetime(2024, 5, 6, 8)),
+            WasteLog(id='ts-2', user_id=sample_user.id, waste_type='plastic', weight=1.0,
+                     co2_saved=2.5, date=datetime(2024, 5, 6, 20)),
+            WasteLog(id='ts-3', user_id=sample_user.id, waste_type='paper', weight=3.0,
+                     co2_saved=5.4, date=datetime(2024, 5, 8))
+        ])
+        db.session.commit()
+        
+        rows = {(row.day, row.waste_type): row.entry_count for row in WasteDailyRollup.query.all()}
+        assert rows == {(date(2024, 5, 6), 'plastic'): 2, (date(2024, 5, 8), 'paper'): 1}
+        
+        response = client.get('/api/dashboard/timeseries?granularity=day&start=2024-05-06&end=2024-05-08',
+                              headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert [bucket['period'] for bucket in data] == ['2024-05-06', '2024-05-07', '2024-05-08']
+        assert data[0]['total_waste_recycled'] == 3.0
+        assert data[0]['by_type'] == {'plastic': 3.0}
+        assert data[1]['total_entries'] == 0
+        
+        client.delete('/api/waste-logs/ts-3')
+        assert WasteDailyRollup.query.filter_by(waste_type='paper').count() == 0
+    
+    def test_weekly_and_monthly_buckets(self, client, sample_user, auth_headers, db):
+        """Test days are grouped into ISO weeks and calendar months"""
+        db.session.add_all([
+            WasteLog(user_id=sample_user.id, waste_type='glass', weight=1.0, date=datetime(2024, 1, 31)),
+            WasteLog(user_id=sample_user.id, waste_type='glass', weight=2.0, date=datetime(2024, 2, 2)),
+            WasteLog(user_id=sample_user.id, waste_type='metal', weight=4.0, date=datetime(2024, 2, 20))
+        ])
+        db.session.commit()
+        
+        weekly = client.get('/api/dashboard/timeseries?granularity=week&start=2024-01-29&end=2024-02-11',
+                            headers=auth_headers).get_json()['data']
+        monthly = client.get('/api/dashboard/timeseries?granularity=month&start=2024-01-01&end=2024-02-29',
+                             headers=auth_headers).get_json()['data']
+        
+        assert [(bucket['period'], bucket['total_waste_recycled']) for bucket in weekly] == [
+            ('2024-01-29', 3.0), ('2024-02-05', 0.0)
+        ]
+        assert [(bucket['period'], bucket['total_waste_recycled']) for bucket in monthly] == [
+            ('2024-01-01', 1.0), ('2024-02-01', 6.0)
+        ]
+    
+    def test_invalid_granularity(self, client, auth_headers):
+        """Test unknown granularities are rejected"""
+        response = client.get('/api/dashboard/timeseries?granularity=hour', headers=auth_headers)
+        
+        assert response.status_code == 400
+
+
+class TestPlatformStats:
+    """Test the public platform-wide statistics"""
+    
+    def test_platform_stats(self, client, sample_user, db):
+        """Test totals aggregate every user, log, reward and active center"""
+        db.session.add_all([
+            WasteLog(user_id=sample_user.id, waste_type='paper', weight=2.0, co2_saved=1.0),
+            WasteLog(user_id=sample_user.id, waste_type='glass', weight=1.0, co2_saved=0.5),
+            Reward(user_id=sample_user.id, badge_name='Starter', points=10),
+            RecyclingCenter(name='Open', location='Nairobi', is_active=True),
+            RecyclingCenter(name='Closed', location='Nairobi', is_active=False)
+        ])
+        db.session.commit()
+        
+        response = client.get('/api/dashboard/platform')
+        
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['total_waste_recycled'] == 3.0
+        assert data['total_co2_saved'] == 1.5
+        assert data['total_users'] == 1
+        assert data['total_entries'] == 2
+        assert data['recycling_centers'] == 1
+        assert data['total_points'] == 40
+    
+    def test_platform_points_sum_each_users_points(self, client, sample_user, db):
+        """Test total_points adds up each user's truncated points, not the points of the summed totals"""
+        other = User(id='platform-other', name='Other', email='other@example.com', password_hash='x')
+        db.session.add(other)
+        db.session.add_all([
+            WasteLog(user_id=sample_user.id, waste_type='paper', weight=0.1, co2_saved=0.1),  # 1.5 -> 1 point
+            WasteLog(user_id=other.id, waste_type='paper', weight=0.1, co2_saved=0.1)         # 1.5 -> 1 point
+        ])
+        db.session.commit()
+        
+        assert client.get('/api/dashboard/platform').get_json()['data']['total_points'] == 2
+    
+    def test_platform_stats_after_rollups_created(self, client, sample_user, db):
+        """Test a user's existing totals are still reported after another user writes to new rollup tables"""
+        user_id = sample_user.id
+        db.session.add_all([
+            WasteLog(user_id=user_id, waste_type='paper', weight=2.0, co2_saved=1.0),
+            Reward(user_id=user_id, badge_name='Starter', points=10)
+        ])
+        db.session.commit()
+        db.session.remove()
+        UserStats.__table__.drop(db.engine)
+        WasteDailyRollup.__table__.drop(db.engine)
+        # init_db.py on a database that predates the rollups
+        db.create_all()
+        other = User(id='platform-other', name='Other', email='other@example.com', password_hash='x')
+        db.session.add(other)
+        db.session.add(WasteLog(user_id=other.id, waste_type='glass', weight=1.0, co2_saved=0.5))
+        db.session.commit()
+        
+        data = client.get('/api/dashboard/platform').get_json()['data']
+        
+        assert (data['total_waste_recycled'], data['total_entries'], data['total_points']) == (3.0, 2, 40)
+        assert db.session.get(WasteDailyRollup, (user_id, datetime.utcnow().date(), 'paper')).entry_count == 1
+    
+    def test_platform_stats_served_stale_while_revalidating(self, app, client, sample_user, db):
+        """Test an expired snapshot is served once while a fresh one is built in the background"""
+        app.config['PLATFORM_STATS_CACHE_TTL'] = 300
+        try:
+            platform_stats_cache.refresh()
+            generation = platform_stats_cache.generation
+            db.session.add(WasteLog(user_id=sample_user.id, waste_type='paper', weight=4.0, co2_saved=1.0))
+            db.session.commit()
+            
+            # Fresh: served from the snapshot without recomputing
+            assert client.get('/api/dashboard/platform').get_json()['data']['total_entries'] == 0
+            
+            app.config['PLATFORM_STATS_CACHE_TTL'] = 0.01
+            time.sleep(0.02)
+            # Stale: still the old snapshot, with a rebuild started
+            assert client.get('/api/dashboard/platform').get_json()['data']['total_entries'] == 0
+            deadline = time.monotonic() + 5
+            while platform_stats_cache.generation == generation and time.monotonic() < deadline:
+                time.sleep(0.01)
+            app.config['PLATFORM_STATS_CACHE_TTL'] = 300
+            assert client.get('/api/dashboard/platform').get_json()['data']['total_entries'] == 1
+        finally:
+            app.config['PLATFORM_STATS_CACHE_TTL'] = 0
+
+
+class TestDashboardConditional:
+    """Test validators on the dashboard endpoints"""
+    
+    def test_dashboard_conditional(self, client, sample_user, auth_headers, db):
+        """Test the per-user dashboard is private and answers 304 while unchanged"""
+        response = client.get('/api/dashboard/', headers=auth_headers)
+        assert 'private' in response.headers['Cache-Control']
+        
+        headers = dict(auth_headers, **{'If-None-Match': response.headers['ETag']})
+        assert client.get('/api/dashboard/', headers=headers).status_code == 304
+        
+        db.session.add(WasteLog(user_id=sample_user.id, waste_type='paper', weight=1.0, co2_saved=1.0))
+        db.session.commit()
+        assert client.get('/api/dashboard/', headers=headers).status_code == 200
@@ -0,0 +1,73 @@
+import pytest
+from datetime import datetime, timedelta
+from models import WasteLog, RecyclingCenter
+
+class TestCursorPagination:
+    """Test keyset (cursor) pagination on list endpoints"""
+    
+    def _create_logs(self, db, user_id, count):
+        base = datetime(2024, 1, 1)
+        # Pairs of logs share a timestamp so the id tie-breaker is exercised
+        logs = [
+            WasteLog(
+                id=f'log-{index:02d}',
+                user_id=user_id,
+                waste_type='plastic',
+                weight=1.0,
+                date=base + timedelta(days=index // 2)
+            )
+            for index in range(count)
+        ]
+        db.session.add_all(logs)
+        db.session.commit()
+    
+    def test_walk_waste_logs_with_cursor(self, client, sample_user, db):
+        """Test following next_cursor visits every log once, newest first"""
+        self._create_logs(db, sample_user.id, 7)
+        
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = client.get('/api/waste-logs/all', query_string={'cursor': cursor, 'per_page': 3})
+            assert response.status_code == 200
+            data = response.get_json()
+            seen.extend(log['id'] for log in data['data'])
+            assert 'total_items' not in data['pagination']
+            cursor = data['pagination']['next_cursor']
+        
+        assert seen == [f'log-{index:02d}' for index in reversed(range(7))]
+    
+    def test_cursor_with_total(self, client, sample_user, db):
+        """Test include_total returns the row count in cursor mode"""
+        self._create_logs(db, sample_user.id, 4)
+        
+        response = client.get('/api/waste-logs/all?cursor=&per_page=2&include_total=true')
+        
+        data = response.get_json()
+        assert data['pagination']['total_items'] == 4
+        assert data['pagination']['has_next'] is True
+    
+    def test_walk_centers_with_cursor(self, client, db):
+        """Test cursor pagination on recycling centers ordered by name"""
+        db.session.add_all([
+            RecyclingCenter(id=f'center-{name}', name=name, location='Nairobi', is_active=True)
+            for name in ['Delta', 'Alpha', 'Charlie', 'Bravo']
+        ])
+        db.session.commit()
+        
+        first = client.get('/api/recycling-centers/?cursor=&per_page=3').get_json()
+        second = client.get('/api/recycling-centers/', query_string={
+            'cursor': first['pagination']['next_cursor'],
+            'per_page': 3
+        }).get_json()
+        
+        assert [center['name'] for center in first['data']] == ['Alpha', 'Bravo', 'Charlie']
+        assert [center['name'] for center in second['data']] == ['Delta']
+        assert second['pagination']['next_cursor'] is None
+    
+    def test_invalid_cursor(self, client):
+        """Test a malformed cursor is rejected"""
+        response = client.get('/api/waste-logs/all?cursor=not-a-cursor')
+        
+        assert response.status_code == 400
+        assert response.get_json()['message'] == 'Invalid cursor'
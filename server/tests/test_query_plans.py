@@ -0,0 +1,59 @@
+import re
+import pytest
+from sqlalchemy import text, or_, and_
+from sqlalchemy.dialects import sqlite
+from models import WasteLog, RecyclingCenter
+
+# "SCAN <table>" without "USING [COVERING] INDEX" means SQLite reads every row
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+def explain(db, query):
+    """Return the detail column of EXPLAIN QUERY PLAN for a query"""
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=sqlite.dialect(paramstyle='named'))
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}'), compiled.params).all()
+    return [row[-1] for row in rows]
+
+# Queries issued by the list endpoints; built lazily since Model.query needs an app context
+HOT_QUERIES = {
+    # get_waste_logs
+    'waste logs of a user': lambda: WasteLog.query.filter_by(user_id='user-1'),
+    # get_all_waste_logs, page-number and cursor mode
+    'all waste logs page': lambda: WasteLog.query
+        .order_by(WasteLog.date.desc(), WasteLog.id.desc()).limit(10).offset(50),
+    'all waste logs after cursor': lambda: WasteLog.query.filter(or_(
+        WasteLog.date < '2024-01-01 00:00:00.000000',
+        and_(WasteLog.date == '2024-01-01 00:00:00.000000', WasteLog.id < 'log-1')
+    )).order_by(WasteLog.date.desc(), WasteLog.id.desc()).limit(11),
+    # export_waste_logs filtered by status, for an administrator and for a user
+    'waste logs by status': lambda: WasteLog.query.filter_by(collection_status='pending')
+        .order_by(WasteLog.date, WasteLog.id),
+    'waste logs of a user by status': lambda: WasteLog.query.filter_by(user_id='user-1', collection_status='pending')
+        .order_by(WasteLog.date, WasteLog.id),
+    # plan_collection_routes (get_centers filters the in-memory center catalog, which loads every center)
+    'active centers with coordinates': lambda: RecyclingCenter.query.filter(
+        RecyclingCenter.is_active.is_(True),
+        RecyclingCenter.latitude.isnot(None),
+        RecyclingCenter.longitude.isnot(None)
+    ).order_by(RecyclingCenter.name, RecyclingCenter.id),
+}
+
+# Hot queries whose ORDER BY must be read straight from an index, not sorted in a temp B-tree
+INDEX_ORDERED = ['all waste logs page', 'all waste logs after cursor', 'active centers with coordinates']
+
+class TestQueryPlans:
+    """Guard the hot queries against regressions to full table scans"""
+    
+    @pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+    def test_no_full_table_scan(self, db, name):
+        plan = explain(db, HOT_QUERIES[name]())
+        
+        full_scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+        assert not full_scans, f'{name} falls back to a full table scan: {plan}'
+    
+    @pytest.mark.parametrize('name', INDEX_ORDERED)
+    def test_order_from_index(self, db, name):
+        plan = explain(db, HOT_QUERIES[name]())
+        
+        sorts = [detail for detail in plan if detail.startswith('USE TEMP B-TREE')]
+        assert not sorts, f'{name} sorts its rows instead of reading them in index order: {plan}'
@@ -0,0 +1,105 @@
+import gzip
+import json
+from datetime import datetime
+import brotli
+import msgpack
+import pytest
+from flask import jsonify
+from models import WasteLog
+import utils.json_provider
+
+@pytest.fixture
+def many_logs(sample_user, db):
+    """Enough waste logs for the list response to pass the compression threshold"""
+    db.session.add_all([
+        WasteLog(user_id=sample_user.id, waste_type='plastic', weight=1.0 + i, collection_location='Nairobi')
+        for i in range(40)
+    ])
+    db.session.commit()
+
+class TestJSONProvider:
+    """Test the app's JSON provider"""
+    
+    def test_matches_default_output(self, app, monkeypatch):
+        """Test keys stay sorted and datetimes become ISO 8601 strings"""
+        # Outside debug mode, where output is compact
+        monkeypatch.setitem(app.config, 'DEBUG', False)
+        with app.test_request_context():
+            body = jsonify({'b': 1, 'a': datetime(2025, 1, 2, 3, 4, 5)}).get_data()
+        
+        assert body == b'{"a":"2025-01-02T03:04:05","b":1}\n'
+    
+    def test_stdlib_fallback(self, app, monkeypatch):
+        """Test the provider works without orjson"""
+        monkeypatch.setattr(utils.json_provider, 'orjson', None)
+        with app.test_request_context():
+            body = jsonify({'b': 1, 'a': datetime(2025, 1, 2, 3, 4, 5)}).get_data()
+        
+        assert json.loads(body) == {'a': '2025-01-02T03:04:05', 'b': 1}
+    
+    def test_msgpack_negotiation(self, client, auth_headers, many_logs):
+        """Test clients preferring MessagePack get it, and everyone else JSON"""
+        response = client.get('/api/waste-logs/', headers=dict(auth_headers, Accept='application/msgpack'))
+        
+        assert response.mimetype == 'application/msgpack'
+        assert 'Accept' in response.headers['Vary']
+        assert len(msgpack.unpackb(response.data)['data']) == 40
+        
+        response = client.get('/api/waste-logs/', headers=dict(auth_headers, Accept='*/*'))
+        assert response.mimetype == 'application/json'
+    
+    def test_etag_differs_per_format(self, client, auth_headers, many_logs):
+        """Test JSON and MessagePack representations get their own ETag, and a JSON tag does not validate MessagePack"""
+        as_json = client.get('/api/waste-logs/', headers=auth_headers)
+        msgpack_headers = dict(auth_headers, Accept='application/msgpack')
+        as_msgpack = client.get('/api/waste-logs/', headers=msgpack_headers)
+        
+        assert as_json.headers['ETag'] != as_msgpack.headers['ETag']
+        assert 'Accept' in as_json.headers['Vary']
+        
+        response = client.get('/api/waste-logs/', headers=dict(msgpack_headers, **{'If-None-Match': as_json.headers['ETag']}))
+        assert response.status_code == 200
+        assert response.mimetype == 'application/msgpack'
+        
+        response = client.get('/api/waste-logs/', headers=dict(msgpack_headers, **{'If-None-Match': as_msgpack.headers['ETag']}))
+        assert response.status_code == 304
+        assert 'Accept' in response.headers['Vary']
+    
+    def test_centers_msgpack(self, client, db):
+        """Test the center list is also served as MessagePack"""
+        client.post('/api/recycling-centers/', json={'name': 'Packed', 'location': 'Nairobi'})
+        
+        as_json = client.get('/api/recycling-centers/')
+        as_msgpack = client.get('/api/recycling-centers/', headers={'Accept': 'application/msgpack'})
+        
+        assert as_msgpack.mimetype == 'application/msgpack'
+        assert msgpack.unpackb(as_msgpack.data) == as_json.get_json()
+        assert as_json.headers['ETag'] != as_msgpack.headers['ETag']
+
+
+class TestCompression:
+    """Test response compression"""
+    
+    def test_gzip(self, client, auth_headers, many_logs):
+        """Test large responses are gzipped for clients that accept it"""
+        response = client.get('/api/waste-logs/', headers=dict(auth_headers, **{'Accept-Encoding': 'gzip'}))
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert len(json.loads(gzip.decompress(response.data))['data']) == 40
+    
+    def test_brotli_preferred(self, client, auth_headers, many_logs):
+        """Test brotli is used when the client accepts both"""
+        response = client.get('/api/waste-logs/', headers=dict(auth_headers, **{'Accept-Encoding': 'gzip, br'}))
+        
+        assert response.headers['Content-Encoding'] == 'br'
+        assert len(json.loads(brotli.decompress(response.data))['data']) == 40
+    
+    def test_small_or_unaccepted_not_compressed(self, client, auth_headers, many_logs):
+        """Test small responses and clients without Accept-Encoding get plain bodies"""
+        response = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        
+        response = client.get('/api/waste-logs/', headers=auth_headers)
+        assert 'Content-Encoding' not in response.headers
+        assert len(response.get_json()['data']) == 40
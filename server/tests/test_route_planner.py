@@ -0,0 +1,116 @@
+import pytest
+from models import WasteLog, RecyclingCenter
+from services.route_planner import haversine_matrix, plan_collection_routes
+
+@pytest.fixture
+def centers(db):
+    """Centers in Nairobi and Mombasa, plus one without coordinates"""
+    db.session.add_all([
+        RecyclingCenter(id='nbo', name='Nairobi Plastics', location='Westlands, Nairobi',
+                        latitude=-1.2676, longitude=36.8108, accepted_types='Plastic,paper'),
+        RecyclingCenter(id='mba', name='Mombasa Depot', location='Nyali, Mombasa',
+                        latitude=-4.0240, longitude=39.7190, accepted_types='glass,paper'),
+        RecyclingCenter(id='unlisted', name='Unlisted Depot', location='Kilimani, Nairobi',
+                        latitude=-1.2921, longitude=36.7836, accepted_types=''),
+        RecyclingCenter(id='nowhere', name='No Coordinates', location='Thika', accepted_types='glass')
+    ])
+    db.session.commit()
+
+def add_logs(db, user, location, waste_type, weights, status='pending'):
+    db.session.add_all([
+        WasteLog(user_id=user.id, waste_type=waste_type, weight=weight,
+                 collection_location=location, collection_status=status)
+        for weight in weights
+    ])
+    db.session.commit()
+
+class TestRoutePlanner:
+    """Test the pickup route planner"""
+    
+    def test_haversine_matrix(self):
+        """Test distances come out in kilometres"""
+        distances = haversine_matrix([(-1.2864, 36.8172)], [(-1.2864, 36.8172), (-4.0435, 39.6682)])
+        assert distances.shape == (1, 2)
+        assert distances[0, 0] == 0
+        assert 430 < distances[0, 1] < 450
+    
+    def test_assigns_nearest_compatible_center(self, app, sample_user, centers, db):
+        """Test logs go to the nearest center that accepts their type"""
+        add_logs(db, sample_user, 'Westlands, Nairobi', 'plastic', [10, 20])
+        # Glass is only accepted by the Mombasa center; the nearer Kilimani one lists no types
+        add_logs(db, sample_user, 'Kilimani, Nairobi', 'glass', [5])
+        add_logs(db, sample_user, 'Westlands, Nairobi', 'plastic', [50], status='collected')
+        
+        plan = plan_collection_routes(1000)
+        
+        assert plan['pending_logs'] == 3
+        assert plan['planned_logs'] == 3
+        by_center = {center['center_id']: center for center in plan['centers']}
+        assert by_center['nbo']['routes'][0]['load'] == 30
+        assert by_center['mba']['routes'][0]['stops'][0]['area'] == 'Kilimani, Nairobi'
+        assert plan['unassigned'] == []
+    
+    def test_routes_respect_capacity(self, app, sample_user, centers, db):
+        """Test stops heavier than a vehicle are split across routes"""
+        add_logs(db, sample_user, 'Westlands, Nairobi', 'paper', [40, 40, 30, 30])
+        add_logs(db, sample_user, 'Ruiru, Kiambu', 'paper', [10])
+        
+        plan = plan_collection_routes(80)
+        
+        routes = plan['centers'][0]['routes']
+        assert all(route['load'] <= 80 for route in routes)
+        assert sum(route['load'] for route in routes) == 150
+        assert len(routes) == 2
+        planned = [log_id for route in routes for stop in route['stops'] for log_id in stop['log_ids']]
+        assert len(planned) == len(set(planned)) == 5
+        # The Westlands stop sits at the center itself; only the Ruiru detour adds distance
+        assert routes[0]['distance_km'] == 0
+        assert routes[-1]['distance_km'] > 0
+    
+    def test_oversized_log_gets_its_own_route(self, app, sample_user, centers, db):
+        """Test a log heavier than the vehicle is still planned"""
+        add_logs(db, sample_user, 'Westlands, Nairobi', 'paper', [120])
+        
+        plan = plan_collection_routes(100)
+        
+        assert plan['planned_logs'] == 1
+        assert plan['centers'][0]['routes'][0]['load'] == 120
+    
+    def test_unknown_location_is_unassigned(self, app, sample_user, centers, db):
+        """Test logs that cannot be placed on the map are reported"""
+        add_logs(db, sample_user, 'Somewhere', 'paper', [5, 5])
+        
+        plan = plan_collection_routes(100)
+        
+        assert plan['planned_logs'] == 0
+        assert plan['unassigned'] == [{
+            'area': 'Somewhere',
+            'waste_type': 'paper',
+            'log_count': 2,
+            'weight': 10,
+            'reason': 'Unknown collection location'
+        }]
+    
+    def test_center_without_accepted_types_takes_nothing(self, app, sample_user, centers, db):
+        """Test a center that lists no accepted types is never assigned logs, even the nearest one"""
+        add_logs(db, sample_user, 'Kilimani, Nairobi', 'metal', [5])
+        
+        plan = plan_collection_routes(100)
+        
+        assert plan['centers'] == []
+        assert plan['unassigned'][0]['reason'] == 'No active center accepts this waste type'
+    
+    def test_route_plan_endpoint(self, client, sample_user, auth_headers, centers, db):
+        """Test the route plan endpoint with filters"""
+        add_logs(db, sample_user, 'Westlands, Nairobi', 'paper', [5])
+        add_logs(db, sample_user, 'Nyali, Mombasa', 'paper', [5])
+        
+        response = client.get('/api/waste-logs/route-plan?capacity=50&location=mombasa', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['pending_logs'] == 1
+        assert data['centers'][0]['center_id'] == 'mba'
+        
+        assert client.get('/api/waste-logs/route-plan?capacity=0', headers=auth_headers).status_code == 400
+        assert client.get('/api/waste-logs/route-plan').status_code == 401
@@ -0,0 +1,45 @@
+from datetime import datetime
+from models import WasteLog, RecyclingCenter
+from utils.serializers import center_serializer, waste_log_serializer
+
+class TestRowSerializer:
+    """Test the column-projection serializers"""
+    
+    def test_waste_log_rows(self, sample_user, db):
+        """Test rows are plain tuples and datetimes become ISO strings"""
+        db.session.add(WasteLog(id='log-1', user_id=sample_user.id, waste_type='paper', weight=2.0,
+                                date=datetime(2025, 5, 1, 8, 30), collection_date=None))
+        db.session.commit()
+        
+        rows = waste_log_serializer.query().all()
+        
+        assert not isinstance(rows[0], WasteLog)
+        data = waste_log_serializer.serialize(rows)
+        assert data == [{
+            'id': 'log-1',
+            'waste_type': 'paper',
+            'weight': 2.0,
+            'co2_saved': None,
+            'date': '2025-05-01T08:30:00',
+            'collection_location': None,
+            'collection_status': 'pending',
+            'collection_date': None,
+            'disposal_method': None,
+            'image_url': None
+        }]
+    
+    def test_center_defaults_and_objects(self, db):
+        """Test converters fill the API defaults, for rows and ORM objects alike"""
+        center = RecyclingCenter(id='c1', name='Depot', location='Nairobi', accepted_types='plastic,glass',
+                                 facility_type=None, operating_hours=None)
+        db.session.add(center)
+        db.session.commit()
+        
+        row = db.session.execute(center_serializer.select()).one()
+        
+        assert center_serializer.serialize([row])[0] == center_serializer.to_dict(center)
+        data = center_serializer.to_dict(center)
+        assert data['facility_type'] == 'recycling'
+        assert data['operating_hours'] == 'Mon-Fri: 8AM-5PM'
+        assert data['accepted_types'] == ['plastic', 'glass']
+        assert data['is_active'] is True
@@ -1,5 +1,8 @@
+import csv
+import io
+import json
 import pytest
-from models import WasteLog
+from models import User, WasteLog
 from datetime import datetime
 
 class TestWasteRoutes:
@@ -24,7 +27,8 @@ class TestWasteRoutes:
         assert data['message'] == 'Waste log created successfully'
         assert data['data']['waste_type'] == 'plastic'
         assert data['data']['weight'] == 5.5
-        assert data['data']['co2_saved'] == 2.75
+        # co2_saved is computed server-side (5.5 kg x 2.5 default plastic factor)
+        assert data['data']['co2_saved'] == 13.75
     
     def test_create_waste_log_missing_fields(self, client, auth_headers):
         """Test creating waste log with missing required fields"""
@@ -158,3 +162,254 @@ class TestWasteRoutes:
         assert response.status_code == 404
         data = response.get_json()
         assert 'Waste log not found' in data['message']
+    
+    def test_create_waste_logs_batch(self, client, sample_user, auth_headers, db):
+        """Test bulk creating waste logs with per-item errors"""
+        response = client.post('/api/waste-logs/batch',
+            headers=auth_headers,
+            json=[
+                {'waste_type': 'plastic', 'weight': 2.0, 'co2_saved': 5.0},
+                {'waste_type': 'paper'},
+                {'waste_type': 'glass', 'weight': 1.5, 'collection_date': 'not-a-date'},
+                {'waste_type': 'metal', 'weight': '3'}
+            ]
+        )
+        
+        assert response.status_code == 201
+        data = response.get_json()
+        assert data['created'] == 2
+        assert data['failed'] == 2
+        assert [error['index'] for error in data['errors']] == [1, 2]
+        assert WasteLog.query.filter_by(user_id=sample_user.id).count() == 2
+    
+    def test_create_waste_logs_batch_ndjson(self, client, sample_user, auth_headers, db):
+        """Test bulk creating waste logs from an NDJSON body"""
+        body = '{"waste_type": "plastic", "weight": 1}\n{broken\n{"waste_type": "organic", "weight": 4}\n'
+        response = client.post('/api/waste-logs/batch',
+            headers={**auth_headers, 'Content-Type': 'application/x-ndjson'},
+            data=body
+        )
+        
+        assert response.status_code == 201
+        data = response.get_json()
+        assert data['created'] == 2
+        assert data['errors'] == [{'index': 1, 'message': 'Invalid JSON line'}]
+    
+    def test_create_waste_logs_batch_all_invalid(self, client, auth_headers):
+        """Test bulk create rejects a batch without any valid log"""
+        response = client.post('/api/waste-logs/batch',
+            headers=auth_headers,
+            json={'logs': [{'weight': 1}]}
+        )
+        
+        assert response.status_code == 400
+        assert response.get_json()['created'] == 0
+    
+    def test_create_waste_logs_batch_invalid_weights(self, client, sample_user, auth_headers, db):
+        """Test bulk create rejects negative, zero, NaN and infinite weights by index"""
+        response = client.post('/api/waste-logs/batch',
+            headers=auth_headers,
+            json=[
+                {'waste_type': 'plastic', 'weight': -2},
+                {'waste_type': 'plastic', 'weight': '0'},
+                {'waste_type': 'plastic', 'weight': 'nan'},
+                {'waste_type': 'plastic', 'weight': 'inf'}
+            ]
+        )
+        
+        assert response.status_code == 400
+        data = response.get_json()
+        assert [error['index'] for error in data['errors']] == [0, 1, 2, 3]
+        assert data['errors'][0]['message'] == 'Weight must be a positive number'
+        assert WasteLog.query.filter_by(user_id=sample_user.id).count() == 0
+    
+    def test_create_waste_logs_batch_no_auth(self, client):
+        """Test bulk create without authentication"""
+        response = client.post('/api/waste-logs/batch', json=[{'waste_type': 'plastic', 'weight': 1}])
+        
+        assert response.status_code == 401
+    
+    def test_export_waste_logs_ndjson(self, client, sample_user, auth_headers, db):
+        """Test streaming export as NDJSON with filters"""
+        db.session.add_all([
+            WasteLog(id='export-1', user_id=sample_user.id, waste_type='Plastic', weight=1.0,
+                     date=datetime(2024, 3, 1, 9, 0), collection_status='pending'),
+            WasteLog(id='export-2', user_id=sample_user.id, waste_type='plastic', weight=2.0,
+                     date=datetime(2024, 3, 31, 18, 0), collection_status='collected'),
+            WasteLog(id='export-3', user_id=sample_user.id, waste_type='paper', weight=3.0,
+                     date=datetime(2024, 4, 2), collection_status='pending')
+        ])
+        db.session.commit()
+        
+        response = client.get('/api/waste-logs/export?waste_type=plastic&start=2024-03-01&end=2024-03-31',
+                              headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row['id'] for row in rows] == ['export-1', 'export-2']
+        assert rows[0]['date'] == '2024-03-01T09:00:00'
+    
+    def test_export_waste_logs_csv(self, client, sample_user, auth_headers, db):
+        """Test streaming export as CSV"""
+        db.session.add(WasteLog(id='export-csv', user_id=sample_user.id, waste_type='glass',
+                                weight=1.5, collection_status='scheduled'))
+        db.session.commit()
+        
+        response = client.get('/api/waste-logs/export?format=csv&status=scheduled', headers=auth_headers)
+        
+        assert response.status_code == 200
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        assert rows[0][:3] == ['id', 'user_id', 'waste_type']
+        assert len(rows) == 2 and rows[1][0] == 'export-csv'
+    
+    def test_export_waste_logs_only_own_logs(self, client, sample_user, auth_headers, db):
+        """Test export only contains the authenticated user's logs"""
+        other = User(id='export-other', name='Other', email='other@example.com')
+        other.set_password('password123')
+        db.session.add(other)
+        db.session.add_all([
+            WasteLog(id='export-mine', user_id=sample_user.id, waste_type='glass', weight=1.0),
+            WasteLog(id='export-theirs', user_id=other.id, waste_type='glass', weight=1.0)
+        ])
+        db.session.commit()
+        
+        response = client.get('/api/waste-logs/export', headers=auth_headers)
+        
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row['id'] for row in rows] == ['export-mine']
+    
+    def test_export_waste_logs_admin(self, client, sample_user, admin_headers, db):
+        """Test administrators export every user's logs, or one user's with user_id"""
+        other = User(id='export-other', name='Other', email='other@example.com', password_hash='x')
+        db.session.add(other)
+        db.session.add_all([
+            WasteLog(id='export-mine', user_id=sample_user.id, waste_type='glass', weight=1.0, date=datetime(2024, 1, 1)),
+            WasteLog(id='export-theirs', user_id=other.id, waste_type='glass', weight=1.0, date=datetime(2024, 1, 2))
+        ])
+        db.session.commit()
+        
+        def exported(query=''):
+            response = client.get(f'/api/waste-logs/export{query}', headers=admin_headers)
+            return [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+        
+        assert exported() == ['export-mine', 'export-theirs']
+        assert exported('?user_id=export-other') == ['export-theirs']
+    
+    def test_export_other_users_logs_forbidden(self, client, sample_user, auth_headers):
+        """Test regular users cannot export someone else's logs"""
+        response = client.get('/api/waste-logs/export?user_id=someone-else', headers=auth_headers)
+        
+        assert response.status_code == 403
+        assert client.get(f'/api/waste-logs/export?user_id={sample_user.id}', headers=auth_headers).status_code == 200
+    
+    def test_export_waste_logs_no_auth(self, client):
+        """Test export without authentication"""
+        response = client.get('/api/waste-logs/export')
+        
+        assert response.status_code == 401
+    
+    def test_export_waste_logs_invalid_format(self, client, auth_headers):
+        """Test export rejects unknown formats"""
+        response = client.get('/api/waste-logs/export?format=xml', headers=auth_headers)
+        
+        assert response.status_code == 400
+    
+    def test_bulk_update_status_by_ids(self, client, sample_user, auth_headers, db):
+        """Test a bulk transition changes valid logs and skips the rest"""
+        db.session.add_all([
+            WasteLog(id='bulk-1', user_id=sample_user.id, waste_type='paper', weight=1.0, collection_status='pending'),
+            WasteLog(id='bulk-2', user_id=sample_user.id, waste_type='paper', weight=1.0, collection_status='pending'),
+            WasteLog(id='bulk-3', user_id=sample_user.id, waste_type='paper', weight=1.0, collection_status='collected')
+        ])
+        db.session.commit()
+        
+        response = client.put('/api/waste-logs/status', headers=auth_headers, json={
+            'collection_status': 'scheduled',
+            'ids': ['bulk-1', 'bulk-2', 'bulk-3', 'missing']
+        })
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['changed'] == 2
+        assert data['skipped'] == 2
+        db.session.expire_all()
+        assert db.session.get(WasteLog, 'bulk-1').collection_status == 'scheduled'
+        # Never moved backwards
+        assert db.session.get(WasteLog, 'bulk-3').collection_status == 'collected'
+    
+    def test_bulk_update_status_forward_only(self, client, sample_user, auth_headers, db):
+        """Test logs cannot skip the scheduled step"""
+        db.session.add(WasteLog(id='bulk-1', user_id=sample_user.id, waste_type='paper', weight=1.0, collection_status='pending'))
+        db.session.commit()
+        
+        response = client.put('/api/waste-logs/status', headers=auth_headers, json={
+            'collection_status': 'collected',
+            'ids': ['bulk-1']
+        })
+        
+        assert response.get_json()['changed'] == 0
+        assert response.get_json()['skipped'] == 1
+    
+    def test_bulk_update_status_by_filter(self, client, sample_user, auth_headers, db):
+        """Test a bulk transition selected by location and date range"""
+        db.session.add_all([
+            WasteLog(user_id=sample_user.id, waste_type='paper', weight=1.0, collection_location='Westlands, Nairobi',
+                     collection_status='scheduled', date=datetime(2025, 3, 1, 9, 0)),
+            WasteLog(user_id=sample_user.id, waste_type='paper', weight=1.0, collection_location='Westlands, Nairobi',
+                     collection_status='pending', date=datetime(2025, 3, 1, 15, 0)),
+            WasteLog(user_id=sample_user.id, waste_type='paper', weight=1.0, collection_location='Nyali, Mombasa',
+                     collection_status='scheduled', date=datetime(2025, 3, 1, 9, 0))
+        ])
+        db.session.commit()
+        
+        response = client.put('/api/waste-logs/status', headers=auth_headers, json={
+            'collection_status': 'collected',
+            'filter': {'location': 'nairobi', 'start': '2025-03-01', 'end': '2025-03-01'}
+        })
+        
+        assert response.status_code == 200
+        assert response.get_json()['changed'] == 1
+        assert response.get_json()['skipped'] == 1
+    
+    def test_bulk_update_status_invalid(self, client, auth_headers):
+        """Test invalid bulk transition requests are rejected"""
+        response = client.put('/api/waste-logs/status', headers=auth_headers, json={
+            'collection_status': 'pending', 'ids': ['a']
+        })
+        assert response.status_code == 400
+        
+        response = client.put('/api/waste-logs/status', headers=auth_headers, json={
+            'collection_status': 'scheduled', 'filter': {}
+        })
+        assert response.status_code == 400
+        
+        response = client.put('/api/waste-logs/status', json={'collection_status': 'scheduled', 'ids': ['a']})
+        assert response.status_code == 401
+    
+    def test_get_waste_logs_conditional(self, client, sample_user, auth_headers, db):
+        """Test the log list answers 304 until one of the user's logs changes"""
+        db.session.add(WasteLog(id='etag-1', user_id=sample_user.id, waste_type='paper', weight=1.0))
+        db.session.commit()
+        
+        response = client.get('/api/waste-logs/', headers=auth_headers)
+        etag = response.headers['ETag']
+        assert etag.startswith('W/')
+        assert 'private' in response.headers['Cache-Control']
+        
+        conditional_headers = dict(auth_headers, **{'If-None-Match': etag})
+        response = client.get('/api/waste-logs/', headers=conditional_headers)
+        assert response.status_code == 304
+        assert response.data == b''
+        
+        # A status change does not touch the totals but must change the ETag
+        client.put('/api/waste-logs/etag-1/status', json={'collection_status': 'scheduled'})
+        response = client.get('/api/waste-logs/', headers=conditional_headers)
+        assert response.status_code == 200
+        assert response.get_json()['data'][0]['collection_status'] == 'scheduled'
+        
+        conditional_headers['If-None-Match'] = response.headers['ETag']
+        client.put('/api/waste-logs/status', headers=auth_headers, json={
+            'collection_status': 'collected', 'ids': ['etag-1']
+        })
+        assert client.get('/api/waste-logs/', headers=conditional_headers).status_code == 200
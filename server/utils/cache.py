@@ -0,0 +1,107 @@
+import threading
+import time
+from flask import current_app, has_app_context
+
+class SnapshotCache:
+    """
+    In-memory snapshot of an expensive computation
+
+    The snapshot is rebuilt when it is older than the TTL or has been marked
+    dirty. Rebuilds happen on a background thread while callers keep getting
+    the previous snapshot (stale-while-revalidate); only the very first load,
+    or a snapshot older than ``ttl + max_stale``, is built synchronously.
+    Every rebuild bumps ``generation``, which callers can use as a version.
+    """
+
+    def __init__(self, loader, name='snapshot'):
+        """
+        Args:
+            loader: Callable returning the value to cache; runs in an app context
+            name: Label used in log messages and for the refresh thread
+        """
+        self._loader = loader
+        self._name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._built_at = None
+        self._generation = 0
+        self._dirty_seq = 0
+        self._built_seq = 0
+        self._refreshing = False
+
+    @property
+    def generation(self):
+        """Counter bumped every time a new snapshot is stored"""
+        return self._generation
+
+    def peek(self):
+        """Return the current snapshot (or None) without triggering a rebuild"""
+        return self._value
+
+    def mark_dirty(self):
+        """Flag the snapshot as outdated; the next read triggers a rebuild"""
+        with self._lock:
+            self._dirty_seq += 1
+
+    def get(self, ttl, max_stale=None, background=True):
+        """
+        Return the cached value, scheduling a rebuild when it is outdated
+
+        Args:
+            ttl: Seconds a snapshot stays fresh
+            max_stale: Seconds past the TTL a stale snapshot may still be
+                served while it is rebuilt (None: no limit)
+            background: Rebuild on a background thread instead of inline
+        """
+        with self._lock:
+            value = self._value
+            built_at = self._built_at
+            outdated = self._dirty_seq != self._built_seq
+
+        if built_at is None:
+            return self.refresh()
+
+        age = time.monotonic() - built_at
+        if max_stale is not None and age > ttl + max_stale:
+            return self.refresh()
+        if outdated or age >= ttl:
+            if not background:
+                return self.refresh()
+            self._refresh_in_background()
+        return value
+
+    def refresh(self):
+        """Rebuild the snapshot now and return it"""
+        with self._lock:
+            seq = self._dirty_seq
+        value = self._loader()
+        with self._lock:
+            self._value = value
+            self._built_at = time.monotonic()
+            self._generation += 1
+            # Marks that arrived while loading keep the snapshot dirty
+            self._built_seq = seq
+        return value
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def run():
+            try:
+                if app is None:
+                    self.refresh()
+                else:
+                    with app.app_context():
+                        self.refresh()
+            except Exception as e:
+                print(f"{self._name} refresh error: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name=f'{self._name}-refresh', daemon=True).start()
@@ -0,0 +1,53 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/msgpack',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain'
+}
+
+def _encode(body, encoding, app):
+    if encoding == 'br':
+        return brotli.compress(body, quality=app.config.get('COMPRESS_BROTLI_QUALITY', 5))
+    return gzip.compress(body, compresslevel=app.config.get('COMPRESS_GZIP_LEVEL', 6))
+
+def init_compression(app):
+    """
+    Compress responses above COMPRESS_MIN_SIZE bytes
+
+    Uses brotli when the client accepts it and the package is installed,
+    otherwise gzip. Streamed responses (e.g. exports) are left as they are.
+    """
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        body = response.get_data()
+        if len(body) < app.config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if not encoding:
+            return response
+
+        response.set_data(_encode(body, encoding, app))
+        response.headers['Content-Encoding'] = encoding
+        return response
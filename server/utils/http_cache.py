@@ -0,0 +1,74 @@
+import hashlib
+from flask import current_app, request, Response
+from utils.json_provider import negotiated_mimetype
+
+def make_etag(*parts):
+    """
+    Build an ETag value from data version markers
+
+    Args:
+        parts: Values identifying the representation, e.g. a resource name,
+            a data version and the query string
+
+    Returns:
+        str: Opaque tag (without quotes or the W/ prefix)
+    """
+    raw = '\x1f'.join(part.decode('utf-8', 'replace') if isinstance(part, bytes) else str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _representation_etag(etag):
+    # JSON and MessagePack bodies of the same data must not share a tag
+    return make_etag(etag, negotiated_mimetype())
+
+def _set_cache_headers(response, etag, public):
+    response.set_etag(etag, weak=True)
+    response.vary.add('Accept')
+    if public:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('PUBLIC_CACHE_MAX_AGE', 60)
+    else:
+        # Per-user data: never shared, always revalidated (a 304 is cheap)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+def not_modified(etag, public=False):
+    """
+    Answer 304 Not Modified when the client already holds this version
+
+    Call before building the response, so a match skips the queries and
+    serialization behind it.
+
+    Returns:
+        Response or None: The 304 response, or None when the client's copy
+            is missing or outdated
+    """
+    etag = _representation_etag(etag)
+    if request.if_none_match.contains_weak(etag):
+        return _set_cache_headers(Response(status=304), etag, public)
+    return None
+
+def conditional(response, etag=None, public=False):
+    """
+    Attach ETag/Cache-Control headers to a successful GET response
+
+    Without an etag, one is derived from the serialized body, which still
+    saves the transfer when the client's copy matches.
+
+    Args:
+        response: Response or (response, status) tuple as returned by a view
+        etag: Tag from make_etag, if the data has a cheap version marker
+        public: Whether shared caches may store the response
+
+    Returns:
+        Response: The response with validators, or a 304 if it matches If-None-Match
+    """
+    if isinstance(response, tuple):
+        response, status = response
+        response.status_code = status
+    if response.status_code != 200:
+        return response
+
+    if etag is None:
+        etag = hashlib.sha1(response.get_data()).hexdigest()
+    return not_modified(etag, public) or _set_cache_headers(response, _representation_etag(etag), public)
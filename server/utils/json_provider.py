@@ -0,0 +1,81 @@
+from datetime import date, datetime
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional fast encoders: the app falls back to the standard library without them
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+def negotiated_mimetype():
+    """
+    Mimetype jsonify() answers the current request with
+
+    MessagePack when the client prefers it in its Accept header (and msgpack
+    is installed), JSON otherwise; JSON comes first, so it wins ties such
+    as "*/*".
+    """
+    if msgpack is not None and \
+            request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+        return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding with orjson when it is installed
+
+    Output matches the default provider (sorted keys, compact outside debug
+    mode) except that dates and datetimes are written as ISO 8601 strings
+    by both encoders. jsonify() responses are also offered as MessagePack
+    to clients that prefer application/msgpack in their Accept header.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # Callers asking for specific json.dumps behaviour (indent, ...) get the stdlib
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        if negotiated_mimetype() == MSGPACK_MIMETYPE:
+            response = self._app.response_class(
+                msgpack.packb(obj, default=self.default, use_bin_type=True),
+                mimetype=MSGPACK_MIMETYPE
+            )
+        elif orjson is not None and not self._app.debug:
+            # Encode straight to bytes, skipping the str round-trip
+            body = orjson.dumps(obj, default=self.default, option=self._orjson_options() | orjson.OPT_APPEND_NEWLINE)
+            response = self._app.response_class(body, mimetype=self.mimetype)
+        else:
+            return super().response(obj)
+
+        response.vary.add('Accept')
+        return response
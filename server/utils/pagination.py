@@ -1,36 +1,62 @@
-from flask import request
+import base64
+import bisect
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import request, current_app
+from sqlalchemy import and_, or_, DateTime
 
-def paginate_query(query, default_per_page=10, max_per_page=100):
+# Cached COUNT(*) results keyed by compiled query: {key: (expires_at, total)}
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+_COUNT_CACHE_MAX_ENTRIES = 256
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def paginate_query(query, default_per_page=10, max_per_page=100, keyset=None):
     """
     Apply pagination to a SQLAlchemy query
-    
+
+    Page numbers are used by default. When ``keyset`` is given the query is
+    ordered by those columns, and a request carrying a ``cursor`` argument
+    (empty for the first page) switches to keyset pagination, which seeks
+    straight to the next page instead of scanning past an OFFSET.
+
     Args:
         query: SQLAlchemy query object
         default_per_page: Default number of items per page
         max_per_page: Maximum allowed items per page
-    
+        keyset: Optional list of (column, 'asc' | 'desc') pairs that uniquely
+            order the rows, e.g. [(WasteLog.date, 'desc'), (WasteLog.id, 'desc')]
+
     Returns:
         dict: Paginated response with data and metadata
+
+    Raises:
+        InvalidCursorError: If the cursor argument is malformed
     """
-    # Get pagination parameters from request
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', default_per_page, type=int)
-    
-    # Validate parameters
-    if page < 1:
-        page = 1
-    if per_page < 1:
-        per_page = default_per_page
-    if per_page > max_per_page:
-        per_page = max_per_page
-    
+    page, per_page = _page_args(default_per_page, max_per_page)
+
+    if keyset:
+        query = query.order_by(*[
+            column.desc() if direction == 'desc' else column.asc()
+            for column, direction in keyset
+        ])
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            return _paginate_keyset(query, keyset, cursor, per_page)
+
     # Execute pagination
     paginated = query.paginate(
         page=page,
         per_page=per_page,
         error_out=False
     )
-    
+
     return {
         'items': paginated.items,
         'pagination': {
@@ -44,3 +70,181 @@ def paginate_query(query, default_per_page=10, max_per_page=100):
             'prev_page': page - 1 if paginated.has_prev else None
         }
     }
+
+def _page_args(default_per_page, max_per_page):
+    """Read and clamp the page/per_page request arguments"""
+    # Get pagination parameters from request
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', default_per_page, type=int)
+
+    # Validate parameters
+    if page < 1:
+        page = 1
+    if per_page < 1:
+        per_page = default_per_page
+    if per_page > max_per_page:
+        per_page = max_per_page
+    return page, per_page
+
+def paginate_sequence(items, sort_keys, default_per_page=10, max_per_page=100):
+    """
+    Paginate an in-memory list the same way paginate_query paginates a query
+
+    Accepts the same page/per_page/cursor/include_total arguments and
+    returns the same structure, so cached data can back an endpoint without
+    changing its responses. Cursor mode seeks with a binary search.
+
+    Args:
+        items: Items in display order
+        sort_keys: Tuple key of each item, ascending and unique (the keyset)
+
+    Returns:
+        dict: Paginated response with data and metadata
+
+    Raises:
+        InvalidCursorError: If the cursor argument is malformed
+    """
+    page, per_page = _page_args(default_per_page, max_per_page)
+    cursor = request.args.get('cursor')
+
+    if cursor is None:
+        total = len(items)
+        pages = math.ceil(total / per_page) if total else 0
+        start = (page - 1) * per_page
+        return {
+            'items': items[start:start + per_page],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total_items': total,
+                'total_pages': pages,
+                'has_next': page < pages,
+                'has_prev': page > 1,
+                'next_page': page + 1 if page < pages else None,
+                'prev_page': page - 1 if page > 1 else None
+            }
+        }
+
+    start = 0
+    if cursor:
+        values = _decode_cursor_values(cursor, len(sort_keys[0]) if sort_keys else None)
+        try:
+            start = bisect.bisect_right(sort_keys, tuple(values))
+        except TypeError as e:
+            raise InvalidCursorError('Invalid cursor') from e
+
+    page_items = items[start:start + per_page]
+    has_next = start + per_page < len(items)
+    pagination = {
+        'per_page': per_page,
+        'cursor': cursor or None,
+        'next_cursor': encode_cursor(sort_keys[start + per_page - 1]) if has_next else None,
+        'has_next': has_next
+    }
+    if request.args.get('include_total', 'false').lower() == 'true':
+        pagination['total_items'] = len(items)
+
+    return {'items': page_items, 'pagination': pagination}
+
+def _paginate_keyset(query, keyset, cursor, per_page):
+    """Fetch one page after ``cursor`` and build the cursor for the next one"""
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    total_items = cached_count(query) if include_total else None
+
+    if cursor:
+        values = decode_cursor(cursor, keyset)
+        query = query.filter(_keyset_predicate(keyset, values))
+
+    # Fetch one extra row to learn whether another page exists without counting
+    items = query.limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in keyset])
+
+    pagination = {
+        'per_page': per_page,
+        'cursor': cursor or None,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    if include_total:
+        pagination['total_items'] = total_items
+
+    return {'items': items, 'pagination': pagination}
+
+def _keyset_predicate(keyset, values):
+    """
+    Build the "row comes after values" filter for a keyset ordering
+
+    Expanded as (a > x) OR (a = x AND b > y) ... rather than a row-value
+    comparison so mixed directions work on every backend.
+    """
+    clauses = []
+    for index, (column, direction) in enumerate(keyset):
+        value = values[index]
+        after = column < value if direction == 'desc' else column > value
+        equal_prefix = [keyset[i][0] == values[i] for i in range(index)]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+def encode_cursor(values):
+    """Encode keyset values into an opaque, URL-safe cursor string"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, keyset):
+    """Decode a cursor produced by encode_cursor back into column values"""
+    values = _decode_cursor_values(cursor, len(keyset))
+    try:
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for (column, _), value in zip(keyset, values)
+        ]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+def _decode_cursor_values(cursor, length):
+    """Decode the raw JSON values of a cursor, checking how many there are"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or (length is not None and len(values) != length):
+            raise ValueError('cursor does not match ordering')
+        return values
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+def cached_count(query):
+    """
+    Count the rows of a query, reusing the result for a short period
+
+    The cache lifetime comes from PAGINATION_COUNT_CACHE_TTL (seconds);
+    a value of 0 always counts.
+    """
+    ttl = current_app.config.get('PAGINATION_COUNT_CACHE_TTL', 30)
+    count_query = query.order_by(None)
+    if ttl <= 0:
+        return count_query.count()
+
+    compiled = count_query.statement.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    now = time.monotonic()
+
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    total = count_query.count()
+
+    with _count_cache_lock:
+        _count_cache[key] = (now + ttl, total)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > _COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.popitem(last=False)
+    return total
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from flask_bcrypt import Bcrypt
+
+# Hashing needs no app; the cost comes from BCRYPT_LOG_ROUNDS at call time
+_bcrypt = Bcrypt()
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = None
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already queued"""
+
+def _get_executor():
+    global _executor, _pending
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                config = current_app.config
+                workers = max(1, config.get('PASSWORD_HASH_WORKERS', 2))
+                _pending = threading.BoundedSemaphore(workers + max(0, config.get('PASSWORD_HASH_MAX_PENDING', 32)))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor
+
+def _run(fn, *args):
+    """
+    Run a bcrypt call on the password hash pool and wait for the result
+
+    bcrypt releases the GIL while hashing, so the pool caps how many cores
+    login spikes can take no matter how many request threads are busy.
+    """
+    executor = _get_executor()
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        _pending.release()
+
+def hash_rounds(password_hash):
+    """Cost factor of a bcrypt hash ('$2b$12$...' -> 12), or None if it is not one"""
+    parts = (password_hash or '').split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def hash_password(password):
+    """Hash a password with the configured cost (BCRYPT_LOG_ROUNDS)"""
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+    return _run(_bcrypt.generate_password_hash, password, rounds).decode('utf-8')
+
+def check_password(password_hash, password):
+    """Check a password against its hash, whatever cost it was made with"""
+    return _run(_bcrypt.check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """Whether a hash was made with a different cost than the configured one"""
+    return hash_rounds(password_hash) != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
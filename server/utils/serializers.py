@@ -0,0 +1,109 @@
+from sqlalchemy import DateTime, select
+from database import db
+from models import RecyclingCenter, WasteLog
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+class RowSerializer:
+    """
+    Serialize plain column rows instead of ORM objects
+
+    Queries built from ``columns`` return lightweight rows (no identity map,
+    no instance state), and ``serialize`` turns a whole batch of them into
+    response dicts with one precomputed converter per column.
+    """
+
+    def __init__(self, columns, converters=None):
+        """
+        Args:
+            columns: Model columns to select, in output order; each column's
+                key is its output key
+            converters: Optional {key: callable} applied to that column's
+                values; DateTime columns default to ISO 8601 strings
+        """
+        self.columns = list(columns)
+        self.keys = [column.key for column in self.columns]
+        converters = converters or {}
+        self._converters = [
+            (position, converters.get(key) or _isoformat)
+            for position, (key, column) in enumerate(zip(self.keys, self.columns))
+            if key in converters or isinstance(column.type, DateTime)
+        ]
+
+    def query(self):
+        """Legacy Query over the columns (supports .paginate and .filter_by)"""
+        return db.session.query(*self.columns)
+
+    def select(self):
+        """Core SELECT over the columns"""
+        return select(*self.columns)
+
+    def values(self, row):
+        """Converted values of one row, in column order"""
+        values = list(row)
+        for position, convert in self._converters:
+            values[position] = convert(values[position])
+        return values
+
+    def to_dict(self, row):
+        """Serialize one row, or an ORM object with the same attributes"""
+        if isinstance(row, db.Model):
+            row = [getattr(row, key) for key in self.keys]
+        return dict(zip(self.keys, self.values(row)))
+
+    def serialize(self, rows):
+        """Serialize a batch of rows"""
+        keys = self.keys
+        if not self._converters:
+            return [dict(zip(keys, row)) for row in rows]
+        values = self.values
+        return [dict(zip(keys, values(row))) for row in rows]
+
+# Waste log fields returned by the list endpoints
+waste_log_serializer = RowSerializer([
+    WasteLog.id,
+    WasteLog.waste_type,
+    WasteLog.weight,
+    WasteLog.co2_saved,
+    WasteLog.date,
+    WasteLog.collection_location,
+    WasteLog.collection_status,
+    WasteLog.collection_date,
+    WasteLog.disposal_method,
+    WasteLog.image_url
+])
+
+# Waste log fields of the NDJSON/CSV export
+waste_log_export_serializer = RowSerializer([
+    WasteLog.id,
+    WasteLog.user_id,
+    WasteLog.waste_type,
+    WasteLog.weight,
+    WasteLog.co2_saved,
+    WasteLog.date,
+    WasteLog.collection_location,
+    WasteLog.collection_status,
+    WasteLog.collection_date,
+    WasteLog.disposal_method,
+    WasteLog.image_url
+])
+
+# Recycling center fields, with the defaults the API has always filled in
+center_serializer = RowSerializer([
+    RecyclingCenter.id,
+    RecyclingCenter.name,
+    RecyclingCenter.location,
+    RecyclingCenter.latitude,
+    RecyclingCenter.longitude,
+    RecyclingCenter.facility_type,
+    RecyclingCenter.contact,
+    RecyclingCenter.operating_hours,
+    RecyclingCenter.accepted_types,
+    RecyclingCenter.is_active
+], converters={
+    'facility_type': lambda value: value or 'recycling',
+    'operating_hours': lambda value: value or 'Mon-Fri: 8AM-5PM',
+    'accepted_types': lambda value: value.split(',') if value else [],
+    'is_active': lambda value: value if value is not None else True
+})
@@ -0,0 +1,136 @@
+import heapq
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_matrix(origins, destinations):
+    """
+    Great-circle distances between two sets of points
+
+    Args:
+        origins: Array of shape (n, 2) with latitude/longitude in degrees
+        destinations: Array of shape (m, 2) with latitude/longitude in degrees
+
+    Returns:
+        numpy.ndarray: (n, m) distances in kilometres
+    """
+    origins = np.radians(np.asarray(origins, dtype=float))[:, None, :]
+    destinations = np.radians(np.asarray(destinations, dtype=float))[None, :, :]
+    dlat = destinations[..., 0] - origins[..., 0]
+    dlng = destinations[..., 1] - origins[..., 1]
+    a = np.sin(dlat / 2) ** 2 + np.cos(origins[..., 0]) * np.cos(destinations[..., 0]) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def to_unit_vectors(coordinates):
+    """
+    Map (latitude, longitude) pairs in degrees onto the unit sphere
+
+    Straight-line (chord) distance between the vectors grows with the
+    great-circle distance, so nearest neighbours are the same and there is
+    no special case at the poles or the antimeridian.
+    """
+    radians = np.radians(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+    lat, lng = radians[:, 0], radians[:, 1]
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+def km_to_chord(distance_km):
+    """Chord length on the unit sphere for a great-circle distance"""
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+def chord_to_km(chord):
+    """Great-circle distance for a chord length on the unit sphere"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+class KDTree:
+    """
+    Static k-d tree over points on the unit sphere
+
+    Built once from an array of points; queries only visit the cells that
+    can still hold a closer point, so a k-nearest lookup touches a few
+    leaves instead of every point.
+    """
+
+    LEAF_SIZE = 16
+
+    def __init__(self, points):
+        """
+        Args:
+            points: Array of shape (n, 3), e.g. from to_unit_vectors
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.order = np.arange(len(points))
+        # (start, end, axis, split, left, right); axis -1 marks a leaf
+        self.nodes = []
+        if len(points):
+            self._build(points, 0, len(points))
+        # Points laid out leaf by leaf so every leaf is one contiguous slice
+        self.points = points[self.order]
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, points, start, end):
+        node = len(self.nodes)
+        self.nodes.append(None)
+        if end - start <= self.LEAF_SIZE:
+            self.nodes[node] = (start, end, -1, 0.0, -1, -1)
+            return node
+
+        indices = self.order[start:end]
+        block = points[indices]
+        axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        self.order[start:end] = indices[np.argsort(block[:, axis], kind='stable')]
+        middle = (start + end) // 2
+        split = float(points[self.order[middle], axis])
+
+        left = self._build(points, start, middle)
+        right = self._build(points, middle, end)
+        self.nodes[node] = (start, end, axis, split, left, right)
+        return node
+
+    def query(self, point, k=None, max_distance=math.inf):
+        """
+        Find the points closest to a query point
+
+        Args:
+            point: Query point as a 3-vector
+            k: Maximum number of results (None: every point within max_distance)
+            max_distance: Ignore points farther away than this chord length
+
+        Returns:
+            list: (distance, index) tuples sorted by distance, where index is
+                the position of the point in the array given to the constructor
+        """
+        if not self.nodes or k == 0:
+            return []
+        point = np.asarray(point, dtype=float)
+        target = point.tolist()
+        # Max-heap of the best candidates so far, as (-distance, index)
+        best = []
+
+        def bound():
+            if k is not None and len(best) == k:
+                return min(max_distance, -best[0][0])
+            return max_distance
+
+        def visit(node):
+            start, end, axis, split, left, right = self.nodes[node]
+            if axis < 0:
+                distances = np.sqrt(((self.points[start:end] - point) ** 2).sum(axis=1))
+                for position, distance in enumerate(distances.tolist(), start):
+                    if distance > bound():
+                        continue
+                    if k is not None and len(best) == k:
+                        heapq.heapreplace(best, (-distance, position))
+                    else:
+                        heapq.heappush(best, (-distance, position))
+                return
+            offset = target[axis] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if abs(offset) <= bound():
+                visit(far)
+
+        visit(0)
+        return sorted((-distance, int(self.order[position])) for distance, position in best)